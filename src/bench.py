@@ -0,0 +1,295 @@
+"""
+Offline benchmark for the full recognition pipeline.
+
+Feeds a recorded video or an image folder through PlateDetector (detection, OCR,
+validation and access decision) against a local SQLite file, with MQTT and HTTP
+stubbed out, and prints a JSON report with frames/s and per-stage latency
+percentiles so runs can be compared across commits and boards.
+
+    python -m src.bench --video tests/media/20250308_104102.mp4 --frames 300 --plates TTWC85
+    python -m src.bench --images /data/plates --output bench.json
+    python -m src.bench --video lane.mp4 --profile PI4 --output pi4.json
+    python -m src.bench --video lane.mp4 --lanes 2 --frames 200
+    PIPELINE_ENABLED=true PIPELINE_WORKERS=2 python -m src.bench --video lane.mp4 --processes 2
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+from src.config import Config
+from src.metrics import metrics
+from src.database.event_writer import event_writer
+
+STAGES = (
+    "capture",
+    "plate_detection",
+    "ocr",
+    "validation",
+    "access_decision",
+    "event_write",
+    "publish",
+)
+BENCH_DB = "bench_local.db"
+
+
+class StubMqttClient:
+    """Drop-in for paho's Client that accepts every publish without a broker."""
+
+    def __init__(self, *args, **kwargs):
+        self._mid = 0
+        self.on_connect = self.on_publish = self.on_disconnect = self.on_message = None
+
+    def connect(self, host, port=1883, *args, **kwargs):
+        return 0
+
+    def loop_start(self):
+        return 0
+
+    def subscribe(self, topic, qos=0):
+        return 0, 0
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        import paho.mqtt.client as mqtt
+        self._mid += 1
+        return mqtt.MQTT_ERR_SUCCESS, self._mid
+
+
+class NullGPIO:
+    """LED/sensor stand-in, the benchmark measures software stages only."""
+
+    def led_on(self, led_type):
+        pass
+
+    def led_off(self, led_type):
+        pass
+
+
+def install_stubs(http_latency):
+    """Replaces the MQTT client and the remote API with local stand-ins."""
+    import paho.mqtt.client as mqtt
+    from src.http.synchronous_api_client import SynchronousAPIClient
+
+    def stub_get(self, endpoint, params=None, headers=None):
+        if http_latency:
+            time.sleep(http_latency)
+        return None
+
+    mqtt.Client = StubMqttClient
+    SynchronousAPIClient.get = stub_get
+
+
+def prepare_database(path, plates):
+    """Creates a fresh SQLite file with one vehicle and one free parking spot per plate."""
+    from src.database.database_connector import DatabaseConnector
+    from src.database.models import VehicleModel, ParkingModel
+    from src.database.authorization_index import authorization_index
+    from src.database.last_event_cache import last_event_cache
+
+    DatabaseConnector.close_all()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    Config.DATABASE_URL = path
+    DatabaseConnector().initialize_database()
+
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    vehicles, parking = VehicleModel(), ParkingModel()
+    for index, plate in enumerate(plates):
+        user_id = f"bench-user-{index}"
+        vehicles.create_vehicle((f"bench-vehicle-{index}", plate, "CAR", user_id, "RESIDENT", now, now))
+        parking.create_parking((f"bench-parking-{index}", user_id, f"B-{index}", None, False, True, now, None, now))
+    authorization_index.hydrate()
+    last_event_cache.clear()
+
+
+def build_source(args):
+    from src.processing.frame_sources import VideoFileFrameSource, ImageDirectoryFrameSource
+
+    if args.video:
+        return VideoFileFrameSource(args.video, args.pacing, loop=args.loop)
+    return ImageDirectoryFrameSource(args.images, args.pacing, fps=args.fps, loop=args.loop)
+
+
+def board_info():
+    info = {
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    }
+    try:
+        with open("/proc/device-tree/model") as model:
+            info["model"] = model.read().strip("\x00\n")
+    except OSError:
+        pass
+    return info
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(args, frames, elapsed, cold_start, inference_settings, lanes=None):
+    snapshot = metrics.snapshot()
+    timings = snapshot["timings"]
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "board": board_info(),
+        "source": {"video": args.video, "images": args.images, "pacing": args.pacing},
+        "inference": inference_settings,
+        "settings": {
+            "pipeline": Config.PIPELINE_ENABLED,
+            "pipeline_workers": Config.PIPELINE_WORKERS,
+            "inference_processes": Config.INFERENCE_PROCESSES,
+            "consensus": Config.CONSENSUS_ENABLED,
+            "change_gate": Config.CHANGE_GATE_ENABLED,
+            "cooldown_s": Config.DECISION_COOLDOWN_S,
+        },
+        "cold_start_ms": cold_start * 1000,
+        "frames": frames,
+        "elapsed_s": elapsed,
+        "fps": frames / elapsed if elapsed else 0.0,
+        "stages": {stage: timings.get(f"stage.{stage}") for stage in STAGES},
+        "counters": snapshot["counters"],
+    }
+    if Config.INFERENCE_PROCESSES:
+        # deteccion y OCR se miden dentro de los workers, aqui solo el ida y vuelta
+        report["inference_pool"] = {name: timings.get(f"inference_pool.{name}") for name in ("slot_wait", "round_trip", "worker")}
+    decisions = {outcome: timings.get(f"decision.latency.{outcome}") for outcome in ("local", "remote", "fallback")}
+    if any(decisions.values()):
+        report["decisions"] = {outcome: timing for outcome, timing in decisions.items() if timing}
+    if Config.EVENT_WRITER_ENABLED:
+        commits = snapshot["counters"].get("event_writer.commits", 0)
+        report["event_writer"] = {
+            "commit": timings.get("event_writer.commit"),
+            "events_per_commit": snapshot["counters"].get("event_writer.events", 0) / commits if commits else 0.0,
+        }
+    if lanes is not None:
+        report["lanes"] = lanes
+    return report
+
+
+def run_lanes(args):
+    """Runs --lanes copies of the source as separate lanes sharing one engine through the LaneScheduler."""
+    from threading import Thread
+    from src.processing.detection_engine import DetectionEngine
+    from src.processing.detector import PlateDetector
+    from src.processing.lanes import Lane, LaneEngine, LaneScheduler
+
+    engine = DetectionEngine(default_source=False)
+    scheduler = LaneScheduler(engine).start()
+    lane_engines = [LaneEngine(Lane(f"lane{index}"), scheduler, source=build_source(args)) for index in range(args.lanes)]
+    detectors = [PlateDetector(engine=lane_engine, gpio=NullGPIO()) for lane_engine in lane_engines]
+    metrics.reset()
+
+    frames = [0] * len(detectors)
+
+    def run(index):
+        frames[index] = detectors[index].detect_plates(args.frames or None)
+
+    threads = [Thread(target=run, args=(index,)) for index in range(len(detectors))]
+    started_at = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        scheduler.stop()
+        for lane_engine in lane_engines:
+            lane_engine.shutdown()
+    elapsed = time.perf_counter() - started_at
+    event_writer.stop()
+    return build_report(args, sum(frames), elapsed, engine.cold_start_seconds, engine.inference_settings, scheduler.stats())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.bench", description="Offline ALPR pipeline benchmark")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--video", help="recorded video file")
+    source.add_argument("--images", help="folder of still images")
+    parser.add_argument("--frames", type=int, default=0, help="frames to analyse (0 = whole source)")
+    parser.add_argument("--pacing", choices=("FAST", "REALTIME"), default="FAST")
+    parser.add_argument("--fps", type=float, default=10, help="image folder rate in REALTIME pacing")
+    parser.add_argument("--loop", action="store_true", help="restart the source when exhausted")
+    parser.add_argument("--plates", default="", help="comma separated plates registered in the bench DB")
+    parser.add_argument("--db", default=BENCH_DB, help="SQLite file used by the decision path")
+    parser.add_argument("--http-latency-ms", type=float, default=0, help="simulated remote API latency")
+    parser.add_argument("--consensus", action="store_true", help="stop on K-of-N consensus like the gate does")
+    parser.add_argument("--no-cooldown", action="store_true", help="run the decision path for every valid read")
+    parser.add_argument("--processes", type=int, default=0, help="run inference in this many worker processes")
+    parser.add_argument("--lanes", type=int, default=1, help="serve the source as this many lanes sharing the models")
+    parser.add_argument("--profile", help="inference profile from Config.INFERENCE_PROFILES (default INFERENCE_PROFILE)")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def run_single(args):
+    from src.processing.detection_engine import DetectionEngine
+    from src.processing.detector import PlateDetector
+
+    if Config.INFERENCE_PROCESSES:
+        from src.processing.inference_pool import ProcessPoolEngine
+        engine = ProcessPoolEngine(source=build_source(args))
+    else:
+        engine = DetectionEngine(source=build_source(args))
+    detector = PlateDetector(engine=engine, gpio=NullGPIO())
+    metrics.reset()
+
+    started_at = time.perf_counter()
+    try:
+        frames = detector.detect_plates(args.frames or None)
+        elapsed = time.perf_counter() - started_at
+    finally:
+        engine.shutdown()
+    event_writer.stop()
+    return build_report(args, frames, elapsed, engine.cold_start_seconds, engine.inference_settings)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.getLogger().setLevel(logging.DEBUG if args.verbose else logging.WARNING)
+
+    Config.ENTITY_ID = Config.ENTITY_ID or "bench"
+    Config.POC_ID = Config.POC_ID or "bench"
+    if args.profile:
+        Config.INFERENCE_PROFILE = args.profile
+    Config.CONSENSUS_ENABLED = args.consensus
+    Config.DETECTION_TIME_BUDGET_S = 0
+    Config.POST_DETECTION_DELAY_S = 0
+    if args.processes:
+        Config.INFERENCE_PROCESSES = args.processes
+    if args.no_cooldown:
+        Config.DECISION_COOLDOWN_S = 0
+
+    install_stubs(args.http_latency_ms / 1000)
+    prepare_database(args.db, [plate.strip().upper() for plate in args.plates.split(",") if plate.strip()])
+
+    if args.lanes > 1:
+        report = run_lanes(args)
+    else:
+        report = run_single(args)
+
+    report = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,9 +8,13 @@ class Config:
     PROFILE = os.getenv("PROFILE", "RASPBERRY")  # Opciones: "UBUNTU" o "RASPBERRY" <button class="citation-flag" data-index="7">
 
     # Configuración general
-    SOURCE_TYPE = os.getenv("SOURCE_TYPE", "CAMERA")  # Default a "VIDEO"
+    SOURCE_TYPE = os.getenv("SOURCE_TYPE", "CAMERA")  # CAMERA, VIDEO, STREAM o IMAGES
     VIDEO_PATH = os.getenv("VIDEO_PATH")
     STREAM_URL = os.getenv("STREAM_URL")
+    IMAGE_DIR = os.getenv("IMAGE_DIR")
+    SOURCE_PACING = os.getenv("SOURCE_PACING", "FAST")  # FAST o REALTIME (solo VIDEO e IMAGES)
+    SOURCE_FPS = float(os.getenv("SOURCE_FPS", 10))  # ritmo de IMAGES en modo REALTIME
+    SOURCE_LOOP = os.getenv("SOURCE_LOOP", "false").lower() == "true"
 
     # Ocr
     os.environ["QT_QPA_PLATFORM"] = "xcb" # vnc for raspberry and xcb for ubuntu
@@ -19,13 +23,125 @@ class Config:
     DETECTION_CONFIDENCE = 0.85
     OCR_CONFIDENCE = 0.95
 
+    # Perfiles de ONNX Runtime por placa. Cada valor se puede sobreescribir con
+    # {DETECTOR|OCR}_{AJUSTE}, ej. DETECTOR_INTRA_OP_THREADS=2 u OCR_MODEL_PATH=ocr_int8.onnx
+    INFERENCE_PROFILE = os.getenv("INFERENCE_PROFILE", "DEFAULT")
+    INFERENCE_PROFILES = {
+        "DEFAULT": {},  # lo que elijan fast_alpr / onnxruntime
+        "PI4": {
+            "detector": {"model": "yolo-v9-t-256-license-plate-end2end", "intra_op_threads": 3, "inter_op_threads": 1,
+                         "graph_optimization": "ALL", "execution_mode": "SEQUENTIAL"},
+            "ocr": {"intra_op_threads": 1, "inter_op_threads": 1, "graph_optimization": "ALL",
+                    "execution_mode": "SEQUENTIAL", "arena_extend_strategy": "kSameAsRequested"},
+        },
+        "PI5": {
+            "detector": {"model": "yolo-v9-t-384-license-plate-end2end", "intra_op_threads": 3, "inter_op_threads": 1,
+                         "graph_optimization": "ALL", "execution_mode": "SEQUENTIAL"},
+            "ocr": {"intra_op_threads": 1, "inter_op_threads": 1, "graph_optimization": "ALL",
+                    "execution_mode": "SEQUENTIAL"},
+        },
+        "X86": {
+            "detector": {"model": "yolo-v9-t-384-license-plate-end2end", "graph_optimization": "ALL"},
+            "ocr": {"graph_optimization": "ALL"},
+        },
+    }
+
+    # Politica de deteccion por activacion del sensor
+    DETECTION_TIME_BUDGET_S = float(os.getenv("DETECTION_TIME_BUDGET_S", 5))
+    DETECTION_MAX_FRAMES = int(os.getenv("DETECTION_MAX_FRAMES", 0))  # 0 = sin limite, manda el presupuesto de tiempo
+    CONSENSUS_ENABLED = os.getenv("CONSENSUS_ENABLED", "true").lower() == "true"
+    CONSENSUS_REQUIRED_READS = int(os.getenv("CONSENSUS_REQUIRED_READS", 3))  # K
+    CONSENSUS_WINDOW_FRAMES = int(os.getenv("CONSENSUS_WINDOW_FRAMES", 5))  # N
+    POST_DETECTION_DELAY_S = float(os.getenv("POST_DETECTION_DELAY_S", 0))  # antes 5 s fijos
+    MOTION_REARM_DELAY_S = float(os.getenv("MOTION_REARM_DELAY_S", 0))  # antes 3 s fijos
+
+    # Correccion de lecturas contra las patentes registradas (O/0, I/1, B/8... cuestan 0.5)
+    PLATE_REGISTRY_ENABLED = os.getenv("PLATE_REGISTRY_ENABLED", "true").lower() == "true"
+    # 0.5 = un solo caracter confundible; 1 acepta cualquier caracter distinto (abre a otra patente real)
+    PLATE_REGISTRY_MAX_DISTANCE = float(os.getenv("PLATE_REGISTRY_MAX_DISTANCE", 0.5))
+
+    # Ventana durante la cual una misma patente no vuelve a generar una decision
+    DECISION_COOLDOWN_S = float(os.getenv("DECISION_COOLDOWN_S", 30))
+
+    # Compuerta de cambio: evita inferir sobre escenas estaticas
+    CHANGE_GATE_ENABLED = os.getenv("CHANGE_GATE_ENABLED", "true").lower() == "true"
+    CHANGE_GATE_WIDTH = int(os.getenv("CHANGE_GATE_WIDTH", 160))  # ancho de la copia en gris
+    CHANGE_GATE_PIXEL_DELTA = int(os.getenv("CHANGE_GATE_PIXEL_DELTA", 25))  # 0-255
+    CHANGE_GATE_MIN_CHANGED_RATIO = float(os.getenv("CHANGE_GATE_MIN_CHANGED_RATIO", 0.005))
+    # Poligono normalizado "x,y;x,y;..." que delimita la pista (vacio = frame completo)
+    CHANGE_GATE_ROI = os.getenv("CHANGE_GATE_ROI", "")
+
+    # Seguimiento de patentes: el detector corre cada K frames y entre medio la caja se sigue con flujo optico
+    TRACKER_ENABLED = os.getenv("TRACKER_ENABLED", "false").lower() == "true"
+    TRACKER_DETECT_EVERY = int(os.getenv("TRACKER_DETECT_EVERY", 5))  # K
+    TRACKER_MIN_IOU = float(os.getenv("TRACKER_MIN_IOU", 0.3))  # para mantener el id de la pista entre detecciones
+    TRACKER_MIN_POINTS = int(os.getenv("TRACKER_MIN_POINTS", 6))  # menos puntos seguidos = se perdio la patente
+
+    # Camara: stream lores para deteccion + recorte del stream main para OCR
+    CAMERA_DUAL_STREAM = os.getenv("CAMERA_DUAL_STREAM", "true").lower() == "true"
+    # El ancho debe ser multiplo de 64 para que el stride del plano YUV coincida con el ancho
+    CAMERA_LORES_RESOLUTION = tuple(int(v) for v in os.getenv("CAMERA_LORES_RESOLUTION", "640x360").split("x"))
+    # Cada frame en vuelo retiene un buffer: debe superar PIPELINE_RING_SIZE + PIPELINE_WORKERS
+    CAMERA_BUFFER_COUNT = int(os.getenv("CAMERA_BUFFER_COUNT", 6))
+
+    # Pipeline captura -> inferencia
+    PIPELINE_ENABLED = os.getenv("PIPELINE_ENABLED", "false").lower() == "true"
+    PIPELINE_RING_SIZE = int(os.getenv("PIPELINE_RING_SIZE", 4))
+    PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", 1))
+    PIPELINE_DROP_POLICY = os.getenv("PIPELINE_DROP_POLICY", "LATEST")  # LATEST o FIFO
+    PIPELINE_MAX_FRAME_AGE_MS = int(os.getenv("PIPELINE_MAX_FRAME_AGE_MS", 500))
+    # Deteccion y OCR en hilos separados; el OCR agrupa recortes de varios frames por llamada
+    PIPELINE_STAGED_OCR = os.getenv("PIPELINE_STAGED_OCR", "true").lower() == "true"
+    OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", 8))
+
+    # Cache de lecturas OCR por hash perceptual del recorte, por vehiculo seguido (requiere TRACKER_ENABLED)
+    OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").lower() == "true"
+    OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", 256))
+    # Bits distintos (de 512) tolerados entre recortes de la misma pista; el ruido del sensor mueve ~3-8
+    OCR_CACHE_MAX_DISTANCE = int(os.getenv("OCR_CACHE_MAX_DISTANCE", 4))
+
+    # Inferencia en procesos dedicados (0 = en el proceso principal). Los frames viajan por
+    # slots de memoria compartida; conviene PIPELINE_ENABLED con PIPELINE_WORKERS = INFERENCE_PROCESSES
+    INFERENCE_PROCESSES = int(os.getenv("INFERENCE_PROCESSES", 0))
+    INFERENCE_SLOTS = int(os.getenv("INFERENCE_SLOTS", 0))  # 0 = 2 por proceso
+    INFERENCE_MAX_FRAME_SIZE = tuple(int(v) for v in os.getenv("INFERENCE_MAX_FRAME_SIZE", "1920x1080").split("x"))
+    INFERENCE_START_METHOD = os.getenv("INFERENCE_START_METHOD", "spawn")  # spawn, forkserver o fork
+    INFERENCE_TASK_TIMEOUT_S = float(os.getenv("INFERENCE_TASK_TIMEOUT_S", 10))
+    INFERENCE_READY_TIMEOUT_S = float(os.getenv("INFERENCE_READY_TIMEOUT_S", 120))  # carga y warm-up de cada proceso
+    INFERENCE_MAX_WORKER_RESTARTS = int(os.getenv("INFERENCE_MAX_WORKER_RESTARTS", 3))  # despues el motor queda fallado
+
+    # Multi-pista: JSON con las pistas (fuente, pines GPIO, ROI y POC de cada una), vacio = una sola pista
+    LANES_CONFIG = os.getenv("LANES_CONFIG", "")
+
     # Local database
     DATABASE_URL = "gate_command_local.db"
+    # Una conexion persistente por hilo, con los pragmas aplicados una sola vez
+    SQLITE_POOL_ENABLED = os.getenv("SQLITE_POOL_ENABLED", "true").lower() == "true"
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # con WAL, NORMAL no arriesga corrupcion
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 8192))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 64 * 1024 * 1024))
+    SQLITE_CACHED_STATEMENTS = int(os.getenv("SQLITE_CACHED_STATEMENTS", 256))
+    DB_BULK_CHUNK_SIZE = int(os.getenv("DB_BULK_CHUNK_SIZE", 1000))  # filas por executemany en las cargas masivas
+    # Eventos del portón: un hilo los escribe en grupos, fuera del camino de la decision
+    EVENT_WRITER_ENABLED = os.getenv("EVENT_WRITER_ENABLED", "true").lower() == "true"
+    EVENT_WRITER_MAX_BATCH = int(os.getenv("EVENT_WRITER_MAX_BATCH", 32))
+    EVENT_WRITER_MAX_LATENCY_MS = int(os.getenv("EVENT_WRITER_MAX_LATENCY_MS", 50))
     ENTITY_ID = os.getenv("ENTITY_ID")
     POC_ID = os.getenv("POC_ID")
 
     # HTTP Server
     HTTP_SERVER_HOST = os.getenv("HTTP_SERVER_HOST")
+    # Cache de consultas remotas de patentes desconocidas (segundos); "no encontrado" tambien se guarda
+    REMOTE_CACHE_SIZE = int(os.getenv("REMOTE_CACHE_SIZE", 1024))
+    REMOTE_ACCESS_TTL_S = float(os.getenv("REMOTE_ACCESS_TTL_S", 30))
+    REMOTE_EVENT_TTL_S = float(os.getenv("REMOTE_EVENT_TTL_S", 10))
+    REMOTE_NOT_FOUND_TTL_S = float(os.getenv("REMOTE_NOT_FOUND_TTL_S", 60))
+    HTTP_TIMEOUT_S = float(os.getenv("HTTP_TIMEOUT_S", 5))  # antes sin timeout (el de TCP del sistema)
+    # Presupuesto de cada decision de acceso; si el servidor no responde a tiempo decide la politica local
+    # y la respuesta remota se concilia despues. 0 = esperar siempre al servidor
+    DECISION_BUDGET_MS = int(os.getenv("DECISION_BUDGET_MS", 300))
+    REMOTE_LOOKUP_WORKERS = int(os.getenv("REMOTE_LOOKUP_WORKERS", 4))
+    LAST_EVENT_CACHE_SIZE = int(os.getenv("LAST_EVENT_CACHE_SIZE", 4096))  # patentes con su ultimo evento en memoria
     # MQTT Server
     MQTT_SERVER_HOST = os.getenv("MQTT_SERVER_HOST")
     MQTT_SERVER_PORT = os.getenv("MQTT_SERVER_PORT", 1883)
@@ -50,8 +166,12 @@ class Config:
     print(f"VIDEO_PATH: {VIDEO_PATH}")
     print(f"STREAM_URL: {STREAM_URL}")
 
-    PATTERN_MAP = {
-    "CL_VEHICLE": r"^[A-Z]{4}\d{2}$",  # Ejemplo: TTWC85
-    "CL_MOTORBIKE": r"^[A-Z]{3}\d$",   # Ejemplo: ABC1
-    "CL_NEW_MOTORBIKE": r"^[A-Z]{4}\d$",  # Ejemplo: ABCD1
-    }   
\ No newline at end of file
+    # Formatos de patente por posicion: L = letra, D = digito, A = cualquiera. Para otros paises
+    # PLATE_FORMATS_FILE apunta a un JSON {"NOMBRE": "LLLDDD"} o {"NOMBRE": {"template": ..., "letters": ...}}
+    PLATE_FORMATS = {
+        "CL_VEHICLE": "LLLLDD",  # Ejemplo: TTWC85
+        "CL_MOTORBIKE": "LLLD",  # Ejemplo: ABC1
+        "CL_NEW_MOTORBIKE": "LLLLD",  # Ejemplo: ABCD1
+    }
+    PLATE_FORMATS_FILE = os.getenv("PLATE_FORMATS_FILE", "")
+    PLATE_MAX_CORRECTIONS = int(os.getenv("PLATE_MAX_CORRECTIONS", 2))  # caracteres corregidos por posicion   
\ No newline at end of file
@@ -0,0 +1,154 @@
+import logging
+import threading
+from src.database.database_connector import DatabaseConnector
+
+# Columnas de las filas, en el orden de SELECT * (igual que las tuplas que devuelven los modelos)
+VEHICLE_COLUMNS = ("id", "user_id", "user_type", "plate", "vehicle_type", "created_at", "updated_at")
+PARKING_COLUMNS = ("id", "user_id", "identifier", "current_license_plate", "is_for_visit", "available",
+                   "created_at", "expiration_date", "updated_at", "is_sync")
+
+_PLATE = VEHICLE_COLUMNS.index("plate")
+_USER_ID = PARKING_COLUMNS.index("user_id")
+_IDENTIFIER = PARKING_COLUMNS.index("identifier")
+_AVAILABLE = PARKING_COLUMNS.index("available")
+
+REFRESH_CHUNK_SIZE = 500  # ids por SELECT ... IN, debajo del limite de variables de SQLite
+
+
+class AuthorizationIndex:
+    """
+    In-memory plate -> vehicle -> parking index used for gate decisions.
+    Hydrated from SQLite once at startup and then kept current by the model writes
+    (vehicle inserts, parking sync, MQTT updates and local availability changes).
+    Rows are immutable tuples with the same layout as the SQLite rows, so readers never
+    need the lock. Writers serialize on it and never mutate a dict a reader may be
+    iterating: a user's parking dict is copied and swapped, hydrate() swaps whole maps,
+    and a replaced row is stored under its new key before the old key is dropped.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.loaded = False
+        self._vehicles = {}  # plate -> vehicle row
+        self._vehicle_plates = {}  # vehicle id -> plate
+        self._parking = {}  # parking id -> parking row
+        self._parking_ids = {}  # identifier -> parking id
+        self._user_parking = {}  # user id -> {parking id: None}, en orden de insercion como la tabla
+
+    def hydrate(self, db=None):
+        """Loads every vehicle and parking row; from here on lookups touch no I/O."""
+        conn = (db or DatabaseConnector()).get_conn()
+        try:
+            vehicles = conn.execute("SELECT * FROM vehicles").fetchall()
+            parking = conn.execute("SELECT * FROM parking ORDER BY rowid").fetchall()
+        finally:
+            conn.close()
+        vehicle_map = {row[_PLATE]: tuple(row) for row in vehicles}
+        vehicle_plates = {row[0]: row[_PLATE] for row in vehicles}
+        parking_map, parking_ids, user_parking = {}, {}, {}
+        for row in parking:
+            parking_map[row[0]] = tuple(row)
+            parking_ids[row[_IDENTIFIER]] = row[0]
+            user_parking.setdefault(row[_USER_ID], {})[row[0]] = None
+        with self._lock:
+            # Primero las filas y despues los mapas que apuntan a ellas
+            self._vehicles, self._vehicle_plates = vehicle_map, vehicle_plates
+            self._parking, self._parking_ids, self._user_parking = parking_map, parking_ids, user_parking
+            self.loaded = True
+        self.logger.info(f"Authorization index loaded: {len(vehicles)} vehicles, {len(parking)} parking lots")
+
+    def refresh(self, vehicle_ids=(), parking_ids=(), db=None):
+        """
+        Re-reads the given vehicle and parking rows (e.g. the ones a bulk upsert touched)
+        and applies them, instead of hydrating the whole index again.
+        """
+        if not self.loaded:
+            return
+        conn = (db or DatabaseConnector()).get_conn()
+        try:
+            vehicles = self._select(conn, "SELECT * FROM vehicles WHERE id IN ({})", vehicle_ids)
+            parking = self._select(conn, "SELECT * FROM parking WHERE id IN ({}) ORDER BY rowid", parking_ids)
+        finally:
+            conn.close()
+        with self._lock:
+            for row in vehicles:
+                self._put_vehicle(tuple(row))
+            for row in parking:
+                self._put_parking(tuple(row))
+        self.logger.debug(f"Authorization index refreshed: {len(vehicles)} vehicles, {len(parking)} parking lots")
+
+    @staticmethod
+    def _select(conn, query, ids):
+        ids = list(dict.fromkeys(ids))
+        rows = []
+        for start in range(0, len(ids), REFRESH_CHUNK_SIZE):
+            chunk = ids[start:start + REFRESH_CHUNK_SIZE]
+            rows.extend(conn.execute(query.format(", ".join("?" * len(chunk))), chunk).fetchall())
+        return rows
+
+    def find_vehicle(self, plate):
+        return self._vehicles.get(plate)
+
+    def find_available_parking(self, user_id):
+        """First available parking of the user, like ParkingModel.find_by_user_id."""
+        for parking_id in self._user_parking.get(user_id, ()):
+            row = self._parking.get(parking_id)
+            if row is not None and row[_AVAILABLE] == 1:
+                return row
+        return None
+
+    def put_vehicle(self, values):
+        """Inserts or replaces a vehicle given as {column: value}."""
+        if not self.loaded:
+            return
+        with self._lock:
+            previous = self._vehicles.get(self._vehicle_plates.get(values["id"]))
+            base = dict(zip(VEHICLE_COLUMNS, previous)) if previous is not None else dict.fromkeys(VEHICLE_COLUMNS)
+            self._put_vehicle(tuple((base | values)[column] for column in VEHICLE_COLUMNS))
+
+    def put_parking(self, values):
+        """Inserts or updates (by id) a parking lot given as {column: value}."""
+        if not self.loaded:
+            return
+        with self._lock:
+            previous = self._parking.get(values["id"])
+            base = dict(zip(PARKING_COLUMNS, previous)) if previous is not None else dict.fromkeys(PARKING_COLUMNS)
+            self._put_parking(tuple((base | values)[column] for column in PARKING_COLUMNS))
+
+    def update_parking_by_identifier(self, identifier, values):
+        if not self.loaded:
+            return
+        parking_id = self._parking_ids.get(identifier)
+        if parking_id is None:
+            self.logger.warning(f"Parking {identifier} not in authorization index")
+            return
+        self.put_parking(dict(values, id=parking_id))
+
+    def _put_vehicle(self, row):
+        previous_plate = self._vehicle_plates.get(row[0])
+        self._vehicles[row[_PLATE]] = row
+        self._vehicle_plates[row[0]] = row[_PLATE]
+        if previous_plate is not None and previous_plate != row[_PLATE]:
+            # La patente vieja puede ser ya de otro vehiculo del mismo lote
+            if self._vehicles.get(previous_plate, (None,))[0] == row[0]:
+                del self._vehicles[previous_plate]
+
+    def _put_parking(self, row):
+        parking_id = row[0]
+        previous = self._parking.get(parking_id)
+        self._parking[parking_id] = row
+        self._parking_ids[row[_IDENTIFIER]] = parking_id
+        user_parking = self._user_parking.get(row[_USER_ID], {})
+        if parking_id not in user_parking:
+            self._user_parking[row[_USER_ID]] = {**user_parking, parking_id: None}
+        if previous is None:
+            return
+        if previous[_IDENTIFIER] != row[_IDENTIFIER] and self._parking_ids.get(previous[_IDENTIFIER]) == parking_id:
+            del self._parking_ids[previous[_IDENTIFIER]]
+        if previous[_USER_ID] != row[_USER_ID]:
+            previous_user = self._user_parking.get(previous[_USER_ID], {})
+            self._user_parking[previous[_USER_ID]] = {key: None for key in previous_user if key != parking_id}
+
+
+authorization_index = AuthorizationIndex()
@@ -1,19 +1,100 @@
 import sqlite3
 import logging
+import threading
 from src.config import Config
+from src.database.migrations import run_migrations
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection kept open for the thread that created it. close() only discards
+    an unfinished transaction (like a real close would) and leaves the connection, its
+    pragmas and its statement cache ready for the next call of the same thread.
+    """
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def dispose(self):
+        super().close()
+
+
+class _ThreadConnections(dict):
+    """
+    db_path -> PooledConnection of one thread. Only the thread's local storage references
+    it, so when the thread ends (pipeline workers, reconcile threads, executor threads)
+    it is freed and its connections are closed instead of staying open in the pool.
+    """
+
+    def __del__(self):
+        with DatabaseConnector._pool_lock:
+            for conn in self.values():
+                DatabaseConnector._pool.discard(conn)
+        for conn in self.values():
+            conn.dispose()
+
 
 class DatabaseConnector:
-    def __init__(self, db_path=Config.DATABASE_URL):
-        self.db_path = db_path
+    _local = threading.local()  # por hilo: _ThreadConnections
+    _pool_lock = threading.RLock()  # reentrante: el GC puede correr __del__ en un hilo que ya lo tiene
+    _pool = set()  # todas las conexiones abiertas, para poder cerrarlas desde cualquier hilo
+    _generation = 0
+
+    def __init__(self, db_path=None, pooled=None):
+        self.db_path = db_path or Config.DATABASE_URL
+        self.pooled = Config.SQLITE_POOL_ENABLED if pooled is None else pooled
         self.logger = logging.getLogger(__name__)
 
 
     def get_conn(self):
-        conn = sqlite3.connect(self.db_path)
-        # Habilitar WAL para mejorar la concurrencia
+        if not self.pooled:
+            conn = sqlite3.connect(self.db_path)
+            # Habilitar WAL para mejorar la concurrencia
+            conn.execute('PRAGMA journal_mode=WAL;')
+            return conn
+
+        local = DatabaseConnector._local
+        if getattr(local, "generation", None) != DatabaseConnector._generation:
+            local.connections = _ThreadConnections()
+            local.generation = DatabaseConnector._generation
+        conn = local.connections.get(self.db_path)
+        if conn is None:
+            conn = local.connections[self.db_path] = self._connect()
+        return conn
+
+    def _connect(self):
+        """Opens a pooled connection and applies the pragmas once."""
+        # check_same_thread=False solo para que close_all pueda cerrarla; cada hilo usa la suya
+        conn = sqlite3.connect(
+            self.db_path, factory=PooledConnection, check_same_thread=False,
+            cached_statements=Config.SQLITE_CACHED_STATEMENTS,
+        )
         conn.execute('PRAGMA journal_mode=WAL;')
+        conn.execute(f'PRAGMA synchronous={Config.SQLITE_SYNCHRONOUS};')
+        conn.execute(f'PRAGMA cache_size=-{Config.SQLITE_CACHE_SIZE_KB};')  # negativo = KiB
+        conn.execute(f'PRAGMA mmap_size={Config.SQLITE_MMAP_SIZE};')
+        conn.execute('PRAGMA temp_store=MEMORY;')
+        with DatabaseConnector._pool_lock:
+            DatabaseConnector._pool.add(conn)
+        self.logger.debug(f"Opened pooled SQLite connection to {self.db_path} for {threading.current_thread().name}")
         return conn
 
+    @classmethod
+    def close_all(cls):
+        """Closes every pooled connection (before replacing or deleting the database file)."""
+        with cls._pool_lock:
+            connections, cls._pool = cls._pool, set()
+            cls._generation += 1
+        for conn in connections:
+            conn.dispose()
+
+    @classmethod
+    def open_connections(cls):
+        """Number of pooled connections still open."""
+        with cls._pool_lock:
+            return len(cls._pool)
+
     
     def initialize_database(self):
         conn = self.get_conn()
@@ -76,12 +157,10 @@ class DatabaseConnector:
             )
         ''')
 
-        # Crear índices para optimizar búsquedas
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_vehicles_plate ON vehicles (plate)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_parking_identifier ON parking (identifier)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_synced ON events (plate)')
-
         conn.commit()
+
+        # Los indices se crean (y se agregan en instalaciones existentes) con migraciones versionadas
+        run_migrations(conn)
         conn.close()
         self.logger.info("Database created")
 
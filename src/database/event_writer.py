@@ -0,0 +1,146 @@
+import time
+import queue
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import Future
+from src.config import Config
+from src.metrics import metrics
+from src.database.database_connector import DatabaseConnector
+from src.database.last_event_cache import last_event_cache
+
+_STOP = object()
+
+
+class EventWriter:
+    """
+    Write-behind queue for gate events. The decision path only enqueues the event; a
+    dedicated thread commits the queue in groups of up to max_batch events, waiting at
+    most max_latency_s after the first one, so the fsync of the commit is paid once per
+    group and never before the barrier reacts.
+    Queued events are visible to find_last_event_by_plate through pending_event() and
+    the last event cache from the moment they are submitted. Once stopped, submit writes
+    the event synchronously in the caller's thread.
+    """
+
+    def __init__(self, max_batch=32, max_latency_s=0.05):
+        self.logger = logging.getLogger(__name__)
+        self.max_batch = max_batch
+        self.max_latency_s = max_latency_s
+        self._queue = queue.Queue()
+        self._pending = {}  # plate -> fila en cola, todavia sin escribir
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+
+    def submit(self, event_id, event_type, poc_id, plate):
+        """Queues the event and returns a Future resolved (with the event id) once it is committed."""
+        # Misma forma que SELECT * (id, poc_id, plate, type, created_at, sync)
+        row = (event_id, poc_id, plate, event_type, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 0)
+        future = Future()
+        with self._lock:
+            # Encolar bajo el lock: stop no puede meter el _STOP entre el chequeo y el put
+            queued = not self._stopped
+            if queued:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+                    self._thread.start()
+                self._pending[plate] = row
+                last_event_cache.put(plate, row)
+                self._queue.put((row, future))
+        if not queued:
+            last_event_cache.put(plate, row)
+            self._write_batch([(row, future)])
+            return future
+        metrics.set_gauge("event_writer.queue", self._queue.qsize())
+        return future
+
+    def pending_event(self, plate):
+        """Last queued but not yet committed event row of plate, or None."""
+        return self._pending.get(plate)
+
+    def stop(self, timeout=10):
+        """Writes everything already queued and stops the thread, later submits write synchronously."""
+        with self._lock:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            flush_at = time.monotonic() + self.max_latency_s
+            while len(batch) < self.max_batch:
+                remaining = flush_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        try:
+            self._write(batch)
+        except Exception as e:
+            self.logger.error(f"Unable to write {len(batch)} events: {e}")
+            self._finish(batch, [e] * len(batch))
+
+    def _write(self, batch):
+        statement = 'INSERT INTO events (id, type, poc_id, plate, created_at) VALUES (?, ?, ?, ?, ?)'
+        params = [(row[0], row[3], row[1], row[2], row[4]) for row, _ in batch]
+        conn = DatabaseConnector().get_conn()
+        started_at = time.perf_counter()
+        try:
+            conn.execute('BEGIN TRANSACTION')
+            conn.executemany(statement, params)
+            conn.commit()
+            results = [None] * len(batch)
+        except Exception as e:
+            conn.rollback()
+            self.logger.warning(f"Event group commit failed ({e}), writing events one by one")
+            results = []
+            for values in params:
+                try:
+                    conn.execute('BEGIN TRANSACTION')
+                    conn.execute(statement, values)
+                    conn.commit()
+                    results.append(None)
+                except Exception as row_error:
+                    conn.rollback()
+                    self.logger.error(f"Error registering event {values[0]}: {row_error}")
+                    results.append(row_error)
+        finally:
+            conn.close()
+        metrics.observe("event_writer.commit", time.perf_counter() - started_at)
+        metrics.increment("event_writer.commits")
+        metrics.increment("event_writer.events", len(batch))
+        self._finish(batch, results)
+
+    def _finish(self, batch, results):
+        with self._lock:
+            for row, _ in batch:
+                if self._pending.get(row[2]) is row:
+                    del self._pending[row[2]]
+        for (row, future), error in zip(batch, results):
+            if error is None:
+                future.set_result(row[0])
+            else:
+                last_event_cache.discard(row[2], row)  # no quedo en la tabla, que se vuelva a leer
+                future.set_exception(error)
+        metrics.set_gauge("event_writer.queue", self._queue.qsize())
+
+
+event_writer = EventWriter(Config.EVENT_WRITER_MAX_BATCH, Config.EVENT_WRITER_MAX_LATENCY_MS / 1000)
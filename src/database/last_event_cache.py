@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+from src.config import Config
+from src.metrics import metrics
+
+NOT_CACHED = object()
+
+
+class LastEventCache:
+    """
+    plate -> last events row (None when the plate has no events), so the ACCESS/EXIT
+    resolution of a decision does not touch the events table. Every local event goes
+    through EventModel.register_event, which refreshes the entry after the commit, so
+    type and created_at never go stale; the bound only limits memory. The sync column is
+    the one of the insert, later sync marks do not touch the cache.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, plate, default=NOT_CACHED):
+        """Cached row (or None) for plate; `default` when the plate was never looked up."""
+        with self._lock:
+            event = self._entries.get(plate, NOT_CACHED)
+            if event is NOT_CACHED:
+                metrics.increment("last_event_cache.misses")
+                return default
+            self._entries.move_to_end(plate)
+        metrics.increment("last_event_cache.hits")
+        return event
+
+    def put(self, plate, event):
+        with self._lock:
+            self._entries[plate] = event
+            self._entries.move_to_end(plate)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put_if_absent(self, plate, event):
+        """Stores a row read from the table unless an event written meanwhile already did."""
+        with self._lock:
+            if plate not in self._entries:
+                self._entries[plate] = event
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def discard(self, plate, event):
+        """Forgets plate if its cached row is still event."""
+        with self._lock:
+            if self._entries.get(plate, NOT_CACHED) is event:
+                del self._entries[plate]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+last_event_cache = LastEventCache(Config.LAST_EVENT_CACHE_SIZE)
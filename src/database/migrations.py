@@ -0,0 +1,53 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (version, descripcion, sentencias). Nunca modificar una migracion ya publicada: agregar una nueva.
+MIGRATIONS = [
+    (1, "last event per plate index", [
+        'DROP INDEX IF EXISTS idx_events_synced',  # solo (plate), mal nombrado; lo cubre el compuesto
+        'CREATE INDEX IF NOT EXISTS idx_events_plate_created_at ON events (plate, created_at)',
+    ]),
+    (2, "indexes for the hot model queries", [
+        # plate e identifier ya tienen el indice de su UNIQUE, estos solo duplicaban escrituras
+        'DROP INDEX IF EXISTS idx_vehicles_plate',
+        'DROP INDEX IF EXISTS idx_parking_identifier',
+        # ParkingModel.find_by_user_id: solo los lugares disponibles
+        'CREATE INDEX IF NOT EXISTS idx_parking_user_available ON parking (user_id) WHERE available = 1',
+        # find_last_sync_parking / find_last_sync_vehicle
+        'CREATE INDEX IF NOT EXISTS idx_parking_updated_at ON parking (updated_at)',
+        'CREATE INDEX IF NOT EXISTS idx_vehicles_updated_at ON vehicles (updated_at)',
+        # find_pending_events: el indice solo contiene los eventos sin sincronizar
+        'CREATE INDEX IF NOT EXISTS idx_events_pending ON events (created_at) WHERE sync = 0',
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def run_migrations(conn, migrations=MIGRATIONS):
+    """
+    Applies, in order and each in its own transaction, the migrations newer than the
+    PRAGMA user_version of the database, and returns the resulting version.
+    """
+    version = schema_version(conn)
+    for target, description, statements in migrations:
+        if target <= version:
+            continue
+        try:
+            conn.execute('BEGIN TRANSACTION')
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {int(target)}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Migration {target} ({description}) failed, database left at version {version}")
+            raise
+        logger.info(f"Database migrated to version {target}: {description}")
+        version = target
+    return version
@@ -1,6 +1,12 @@
+import time
 import logging
+from itertools import islice
 from datetime import datetime, timezone, timedelta
+from src.config import Config
 from src.database.database_connector import DatabaseConnector
+from src.database.authorization_index import authorization_index
+from src.database.last_event_cache import last_event_cache, NOT_CACHED
+from src.database.event_writer import event_writer
 
 # Configuración básica de logging
 logging.basicConfig(level=logging.DEBUG)
@@ -18,6 +24,62 @@ def _parse_to_local_date(date_str):
 
     return date_str  #
 
+
+def _bulk_upsert(db, statement, rows, label, chunk_size=None):
+    """
+    Runs statement with executemany over rows (any iterable of tuples, consumed lazily)
+    in chunks of chunk_size inside one transaction, logging progress and rows/s.
+    A chunk that fails (e.g. a plate that already belongs to another id) is retried row
+    by row so only the offending rows are skipped, like the previous one-insert-per-row
+    loaders did. Returns the number of rows actually inserted or updated (an upsert whose
+    DO UPDATE ... WHERE does not match writes nothing).
+    """
+    chunk_size = chunk_size or Config.DB_BULK_CHUNK_SIZE
+    rows = iter(rows)
+    conn = db.get_conn()
+    started_at = time.perf_counter()
+    read = written = skipped = 0
+    try:
+        conn.execute('BEGIN TRANSACTION')
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            read += len(chunk)
+            conn.execute('SAVEPOINT chunk')
+            try:
+                written += conn.executemany(statement, chunk).rowcount
+            except Exception as e:
+                conn.execute('ROLLBACK TO chunk')
+                logging.warning(f"Bulk {label} chunk failed ({e}), retrying row by row")
+                for row in chunk:
+                    try:
+                        written += conn.execute(statement, row).rowcount
+                    except Exception as row_error:
+                        skipped += 1
+                        logging.error(f"Error upserting {label} {row[0]}: {row_error}")
+            conn.execute('RELEASE chunk')
+            elapsed = time.perf_counter() - started_at
+            logging.info(f"Bulk {label}: {read} rows, {written} written ({read / elapsed:.0f} rows/s)")
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Error in bulk {label}: {e}")
+        raise
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - started_at
+    logging.info(f"Bulk {label} done: {read} rows, {written} written, {skipped} skipped in {elapsed:.2f}s")
+    return written
+
+
+def _collect_ids(rows, ids):
+    """Passes rows through, appending the id (first column) of each one to ids."""
+    for row in rows:
+        ids.append(row[0])
+        yield row
+
+
 class VehicleModel:
     
     def __init__(self):
@@ -32,6 +94,14 @@ class VehicleModel:
         logging.debug(f"Vehicle found by plate {plate}: {vehicle}")
         return vehicle
     
+    def find_all_plates(self):
+        conn = self.db.get_conn()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, plate FROM vehicles")
+        plates = cursor.fetchall()
+        conn.close()
+        return plates
+
     def find_last_sync_vehicle(self):
         conn = self.db.get_conn()
         cursor = conn.cursor()
@@ -51,6 +121,9 @@ class VehicleModel:
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', vehicle_data)
             conn.commit()  # Confirma la transacción
+            authorization_index.put_vehicle(dict(zip(
+                ("id", "plate", "vehicle_type", "user_id", "user_type", "created_at", "updated_at"), vehicle_data
+            )))
             logging.debug(f"Vehicle inserted with data: {vehicle_data}")
         except Exception as e:
             conn.rollback()  # Revertir cambios en caso de error
@@ -58,6 +131,36 @@ class VehicleModel:
         finally:
             conn.close()
 
+    def upsert_vehicles(self, vehicles, chunk_size=None):
+        """
+        Bulk insert/update of vehicle tuples in create_vehicle order (see map_to_insert_db).
+        An existing row keeps its created_at.
+        """
+        ids = []
+        written = _bulk_upsert(self.db, '''
+            INSERT INTO vehicles (id, plate, vehicle_type, user_id, user_type, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                plate = excluded.plate, vehicle_type = excluded.vehicle_type, user_id = excluded.user_id,
+                user_type = excluded.user_type, updated_at = excluded.updated_at
+        ''', _collect_ids(vehicles, ids), "vehicles", chunk_size)
+        authorization_index.refresh(vehicle_ids=ids, db=self.db)
+        return written
+
+    @staticmethod
+    def map_to_insert_db(vehicle):
+        """Maps a vehicle from the API to the create_vehicle / upsert_vehicles tuple."""
+        user = vehicle.get("user")
+        return (
+            vehicle.get("id"),
+            vehicle.get("plate"),
+            vehicle.get("vehicleType"),
+            user.get("id"),
+            user.get("type"),
+            vehicle.get("createdAt"),
+            vehicle.get("lastUpdatedAt"),
+        )
+
     def update_vehicle(self, vehicle_data):
         conn = self.db.get_conn()
         try:
@@ -68,6 +171,9 @@ class VehicleModel:
                 WHERE id = ?
             ''', vehicle_data)
             conn.commit()  # Confirma la transacción
+            authorization_index.put_vehicle(dict(zip(
+                ("plate", "vehicle_type", "user_id", "user_type", "created_at", "updated_at", "id"), vehicle_data
+            )))
             logging.debug(f"Vehicle updated with data: {vehicle_data}")
         except Exception as e:
             conn.rollback()  # Revertir cambios en caso de error
@@ -181,6 +287,9 @@ class ParkingModel:
                 WHERE identifier = ?
             ''', (available, plate, last_updated, identifier))
             conn.commit()  # Confirma la transacción
+            authorization_index.update_parking_by_identifier(
+                identifier, {"available": available, "current_license_plate": plate, "updated_at": last_updated}
+            )
             logging.debug(f"Parking availability updated with identifier {identifier} to available: {available}")
         except Exception as e:
             conn.rollback()  # Revertir cambios en caso de error
@@ -199,6 +308,7 @@ class ParkingModel:
                 WHERE identifier = ?
             ''', (identifier,))
             conn.commit()  # Confirma la transacción
+            authorization_index.update_parking_by_identifier(identifier, {"is_sync": 1})
             logging.debug(f"Parking sync status updated for identifier {identifier}")
         except Exception as e:
             conn.rollback()  # Revertir cambios en caso de error
@@ -216,6 +326,10 @@ class ParkingModel:
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', parking_data)
             conn.commit()  # Confirma la transacción
+            authorization_index.put_parking(dict(zip(
+                ("id", "user_id", "identifier", "current_license_plate", "is_for_visit", "available",
+                 "created_at", "expiration_date", "updated_at"), parking_data
+            )))
             logging.debug(f"Parking inserted with data: {parking_data}")
         except Exception as e:
             conn.rollback()  # Revertir cambios en caso de error
@@ -223,6 +337,29 @@ class ParkingModel:
         finally:
             conn.close()
 
+    def upsert_parking(self, parking_lots, chunk_size=None, only_newer=False):
+        """
+        Bulk insert/update of parking tuples in create_parking order (see map_to_insert_db).
+        With only_newer, existing rows are updated only when the incoming updated_at is later
+        (incremental sync merge); an existing row keeps its created_at. Returns the rows
+        actually written.
+        """
+        statement = '''
+            INSERT INTO parking (id, user_id, identifier, current_license_plate, is_for_visit, available, created_at, expiration_date, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                user_id = excluded.user_id, identifier = excluded.identifier,
+                current_license_plate = excluded.current_license_plate, is_for_visit = excluded.is_for_visit,
+                available = excluded.available, expiration_date = excluded.expiration_date,
+                updated_at = excluded.updated_at
+        '''
+        if only_newer:
+            statement += "WHERE parking.updated_at IS NULL OR excluded.updated_at > parking.updated_at"
+        ids = []
+        written = _bulk_upsert(self.db, statement, _collect_ids(parking_lots, ids), "parking", chunk_size)
+        authorization_index.refresh(parking_ids=ids, db=self.db)
+        return written
+
     def update_parking(self, parking_data):
 
         conn = self.db.get_conn()
@@ -240,6 +377,10 @@ class ParkingModel:
                 WHERE id = ?
             ''', parking_data)
             conn.commit()  # Confirma la transacción
+            authorization_index.put_parking(dict(zip(
+                ("user_id", "identifier", "current_license_plate", "is_for_visit", "available",
+                 "expiration_date", "updated_at", "id"), parking_data
+            )))
             logging.debug(f"Parking updated with data: {parking_data}")
         except Exception as e:
             conn.rollback()  # Revertir cambios en caso de error
@@ -320,11 +461,14 @@ class EventModel:
         try:
             conn.execute('BEGIN TRANSACTION')  # Inicia la transacción
             cursor = conn.cursor()
+            created_at = _parse_to_local_date(datetime.now())
             cursor.execute('''
                 INSERT INTO events (id, type, poc_id, plate, created_at)
                 VALUES (?, ?, ?, ?, ?)
-            ''', (event_id, event_type, poc_id, plate,  _parse_to_local_date(datetime.now())))
+            ''', (event_id, event_type, poc_id, plate, created_at))
             conn.commit()  # Confirma la transacción
+            # Misma forma que SELECT * (id, poc_id, plate, type, created_at, sync)
+            last_event_cache.put(plate, (event_id, poc_id, plate, event_type, created_at, 0))
             logging.debug(f"Event registered with type {event_type} and plate {plate}")
         except Exception as e:
             conn.rollback()  # Revertir cambios en caso de error
@@ -333,11 +477,21 @@ class EventModel:
             conn.close()
         
     def find_last_event_by_plate(self, plate):
+        event = event_writer.pending_event(plate)  # en la cola de escritura, todavia no en la tabla
+        if event is not None:
+            return event
+        event = last_event_cache.get(plate)
+        if event is not NOT_CACHED:
+            return event
         conn = self.db.get_conn()
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM events WHERE plate = ? ORDER BY created_at DESC", (plate,))
+        # Resuelto con idx_events_plate_created_at sin ordenar el historial de la patente
+        cursor.execute(
+            "SELECT * FROM events WHERE plate = ? ORDER BY created_at DESC, rowid DESC LIMIT 1", (plate,)
+        )
         event = cursor.fetchone()
         conn.close()
+        last_event_cache.put_if_absent(plate, event)
         logging.debug(f"Event found by plate {plate}: {event}")
         return event
 
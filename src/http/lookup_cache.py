@@ -0,0 +1,160 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import requests
+from src.config import Config
+from src.metrics import metrics
+
+
+def is_not_found(error):
+    """True for the HTTP 404 the backend answers for unknown plates."""
+    response = getattr(error, "response", None)
+    return isinstance(error, requests.HTTPError) and response is not None and response.status_code == 404
+
+
+class DeadlineExceeded(Exception):
+    """A remote lookup was not back within the decision budget; `future` gets its answer later."""
+
+    def __init__(self, key, future):
+        super().__init__(f"Deadline exceeded waiting for {key}")
+        self.key = key
+        self.future = future
+
+
+class Deadline:
+    """
+    Latency budget of one gate decision, shared by every remote lookup it makes.
+    budget_s None means unbounded. `answers` keeps the value of every lookup answered in
+    time and `missed` the Future of every lookup that was not, both by lookup name, so the
+    decision can be reconciled once the late ones arrive.
+    """
+
+    def __init__(self, budget_s=None, clock=time.monotonic):
+        self.clock = clock
+        self.expires_at = clock() + budget_s if budget_s is not None else None
+        self.remote = False  # hubo al menos una consulta al servidor
+        self.answers = {}
+        self.missed = {}
+
+    def remaining(self):
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self.clock())
+
+    @property
+    def outcome(self):
+        """local, remote (answered in time) or fallback (local policy decided)."""
+        if self.missed:
+            return "fallback"
+        return "remote" if self.remote else "local"
+
+
+class LookupCache:
+    """
+    Bounded LRU with TTLs in front of remote GET lookups.
+    Found answers live `ttl` seconds and "not found" answers (None or HTTP 404) live
+    `negative_ttl` seconds. Identical lookups issued while one is in flight wait for it
+    instead of making their own HTTP call. Errors are returned to every waiting caller
+    but never cached.
+    """
+
+    def __init__(self, max_entries=1024, clock=time.monotonic, workers=4):
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.workers = workers
+        self._executor = None  # hilos para las consultas con deadline, se crean al primer uso
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expira, valor)
+        self._in_flight = {}  # key -> Future
+        self._lock = threading.Lock()
+
+    def get(self, key, fetch, ttl, negative_ttl=None, name="remote", deadline=None):
+        """
+        Cached value of key, calling fetch() on a miss. `name` labels the metrics
+        (lookup_cache.<name>.hits / misses / coalesced). With a bounded deadline the call
+        runs on a background thread and DeadlineExceeded is raised when it is not back
+        in time; the call keeps running and its answer is cached when it arrives.
+        """
+        negative_ttl = ttl if negative_ttl is None else negative_ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                metrics.increment(f"lookup_cache.{name}.hits")
+                if deadline is not None:
+                    deadline.answers[name] = entry[1]
+                return entry[1]
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+
+        if deadline is not None:
+            deadline.remote = True
+        if not leader:
+            metrics.increment(f"lookup_cache.{name}.coalesced")
+        else:
+            metrics.increment(f"lookup_cache.{name}.misses")
+            if deadline is None or deadline.remaining() is None:
+                self._load(key, fetch, ttl, negative_ttl, future)
+            else:
+                self._get_executor().submit(self._load, key, fetch, ttl, negative_ttl, future)
+
+        try:
+            value = future.result(timeout=deadline.remaining() if deadline is not None else None)
+        except FutureTimeoutError:
+            metrics.increment(f"lookup_cache.{name}.deadline_exceeded")
+            deadline.missed[name] = future
+            raise DeadlineExceeded(key, future)
+        if deadline is not None:
+            deadline.answers[name] = value
+        return value
+
+    def _load(self, key, fetch, ttl, negative_ttl, future):
+        try:
+            try:
+                value = fetch()
+            except Exception as e:
+                if not is_not_found(e):
+                    raise
+                value = None
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            return
+        self._store(key, value, ttl if value is not None else negative_ttl)
+        with self._lock:
+            self._in_flight.pop(key, None)
+        future.set_result(value)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="remote-lookup")
+            return self._executor
+
+    def _store(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+remote_lookup_cache = LookupCache(Config.REMOTE_CACHE_SIZE, workers=Config.REMOTE_LOOKUP_WORKERS)
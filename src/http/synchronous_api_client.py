@@ -2,10 +2,12 @@ import requests
 import logging
 import json
 from requests.auth import HTTPBasicAuth
+from src.config import Config
 
 class SynchronousAPIClient:
-    def __init__(self, base_url, username="root", password="root"):
+    def __init__(self, base_url, username="root", password="root", timeout=None):
         self.base_url = base_url
+        self.timeout = timeout or Config.HTTP_TIMEOUT_S
         self.auth = HTTPBasicAuth(username, password)
         self.logger = logging.getLogger(__name__)
 
@@ -29,7 +31,7 @@ class SynchronousAPIClient:
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         full_headers = headers or {}
         self.log_request("GET", url, full_headers, params)
-        response = requests.get(url, params=params, headers=full_headers, auth=self.auth)
+        response = requests.get(url, params=params, headers=full_headers, auth=self.auth, timeout=self.timeout)
         self.log_response(response)
         response.raise_for_status()  
         return response.json()
@@ -39,7 +41,7 @@ class SynchronousAPIClient:
         full_headers = headers or {}
         payload = json if json else data
         self.log_request("POST", url, full_headers, data=payload)
-        response = requests.post(url, data=data, json=json, headers=full_headers, auth=self.auth)
+        response = requests.post(url, data=data, json=json, headers=full_headers, auth=self.auth, timeout=self.timeout)
         self.log_response(response)
         response.raise_for_status()
         return response.json()
@@ -49,7 +51,7 @@ class SynchronousAPIClient:
         full_headers = headers or {}
         payload = json if json else data
         self.log_request("PATCH", url, full_headers, data=payload)
-        response = requests.patch(url, data=data, json=json, headers=full_headers, auth=self.auth)
+        response = requests.patch(url, data=data, json=json, headers=full_headers, auth=self.auth, timeout=self.timeout)
         self.log_response(response)
         response.raise_for_status()
         return response.json()
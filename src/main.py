@@ -1,9 +1,17 @@
 from src.processing.detector import PlateDetector
+from src.processing.detection_engine import DetectionEngine
+from src.processing.change_gate import create_change_gate
+from src.processing.lanes import LaneEngine, LaneScheduler, load_lanes
+from src.processing.inference_pool import ProcessPoolEngine
+from src.config import Config
 from src.database.database_connector import DatabaseConnector
 from src.database.data_loader import Dataloader
+from src.database.authorization_index import authorization_index
+from src.database.event_writer import event_writer
 from src.scheduler.sync_scheduler import SyncScheduler
 from src.processing.gpio_controller import GPIOController
 from src.messaging.mqtt_parking_service import MqttParkingService
+import logging
 import threading
 import time
 
@@ -16,27 +24,49 @@ def initialize_db():
     data_loader = Dataloader()
     data_loader.load_data()
 
+    # Decisiones de acceso en memoria; las escrituras de los modelos lo mantienen al dia
+    authorization_index.hydrate()
 
-def on_motion_detected():
-    """Action to perform when motion is detected."""
-    detector = PlateDetector()
-    detector.detect_plates(30)
-    time.sleep(3)
 
-def monitor_motion_in_background(gpio_controller):
+def on_motion_detected(detector):
+    """Action to perform when motion is detected: only arms capture on the warm engine."""
+    detector.arm()
+
+def monitor_motion_in_background(gpio_controller, detector):
     """
     Monitor the motion sensor in a separate thread.
     This ensures the main program remains responsive.
     """
     try:
         print("Starting motion sensor monitoring...")
-        gpio_controller.monitor_motion_sensor(callback=on_motion_detected)
+        gpio_controller.monitor_motion_sensor(callback=lambda: on_motion_detected(detector))
     except KeyboardInterrupt:
         print("Stopping motion sensor monitoring...")
     except Exception as e:
         print(f"Error in motion sensor monitoring: {e}")
 
 
+def start_lane(lane, scheduler):
+    """Starts the source, detector and motion monitor of one lane on the shared scheduler."""
+    gpio_controller = GPIOController(pins=lane.gpio_pins)
+    lane_engine = LaneEngine(lane, scheduler)
+    detector = PlateDetector(
+        engine=lane_engine,
+        gpio=gpio_controller,
+        change_gate=create_change_gate(lane.roi),
+        poc_id=lane.poc_id,
+        name=f"plate-detector-{lane.name}",
+    )
+    detector.start()
+
+    motion_monitor_thread = threading.Thread(
+        target=monitor_motion_in_background, args=(gpio_controller, detector),
+        name=f"motion-{lane.name}", daemon=True
+    )
+    motion_monitor_thread.start()
+    return lane_engine
+
+
 def main():
     # Initialize the database with initial data
     initialize_db()
@@ -46,16 +76,35 @@ def main():
     scheduler_thread = threading.Thread(target=scheduler.start_scheduler, daemon=True)
     scheduler_thread.start()
 
-    # Configure the GPIO controller
-    gpio_controller = GPIOController()
-
-
-
-    # Monitor the motion sensor in a background thread
-    motion_monitor_thread = threading.Thread(
-        target=monitor_motion_in_background, args=(gpio_controller,), daemon=True
-    )
-    motion_monitor_thread.start()
+    lanes = load_lanes()
+    if lanes:
+        # Varias pistas comparten los modelos cargados una sola vez
+        if Config.INFERENCE_PROCESSES:
+            # El scheduler ya agrupa los frames de todas las pistas en un solo hilo de inferencia
+            logging.getLogger(__name__).warning(
+                f"INFERENCE_PROCESSES={Config.INFERENCE_PROCESSES} is ignored with LANES_CONFIG: "
+                "lanes share one in-process engine"
+            )
+        engine = DetectionEngine.get_instance(default_source=False)
+        lane_scheduler = LaneScheduler(engine).start()
+        lane_engines = [start_lane(lane, lane_scheduler) for lane in lanes]
+    else:
+        # Configure the GPIO controller
+        gpio_controller = GPIOController()
+
+        # Load and warm up the models and camera once, before the first car arrives
+        if Config.INFERENCE_PROCESSES:
+            engine = ProcessPoolEngine()
+        else:
+            engine = DetectionEngine.get_instance()
+        detector = PlateDetector(engine=engine, gpio=gpio_controller)
+        detector.start()
+
+        # Monitor the motion sensor in a background thread
+        motion_monitor_thread = threading.Thread(
+            target=monitor_motion_in_background, args=(gpio_controller, detector), daemon=True
+        )
+        motion_monitor_thread.start()
 
     # Keep the main program running
     try:    
@@ -66,6 +115,13 @@ def main():
             time.sleep(1)  # Prevent excessive CPU usage
     except KeyboardInterrupt:
         print("Program stopped.")
+    finally:
+        if lanes:
+            lane_scheduler.stop()
+            for lane_engine in lane_engines:
+                lane_engine.shutdown()
+        engine.shutdown()
+        event_writer.stop()  # escribe los eventos que quedaron en cola
 
 
 if __name__ == "__main__":
@@ -3,7 +3,9 @@ import json
 import uuid
 from datetime import datetime
 from src.database.models import EventModel
+from src.database.event_writer import event_writer
 from src.config import Config
+from src.metrics import metrics
 import logging
 
 MQTT_BROKER = Config.MQTT_SERVER_HOST
@@ -39,10 +41,19 @@ class MqttEventService:
     def on_disconnect(self, client, userdata, rc):
         self.logger.warning("Desconnected from broker")
 
-    def publish_event(self, event_type, plate):
-        poc_id = Config.POC_ID
+    def publish_event(self, event_type, plate, poc_id=None):
+        """
+        Registers the event locally. With the event writer enabled the insert is only queued
+        and the returned Future resolves once it is committed (for callers that need durability).
+        """
+        poc_id = poc_id or Config.POC_ID
         event_id = str(uuid.uuid4())
-        self.event_model.register_event(event_id, event_type, poc_id, plate)
+        written = None
+        with metrics.timer("stage.event_write"):
+            if Config.EVENT_WRITER_ENABLED:
+                written = event_writer.submit(event_id, event_type, poc_id, plate)
+            else:
+                self.event_model.register_event(event_id, event_type, poc_id, plate)
 
         payload = json.dumps({"id": event_id, "pocId": poc_id, "type": event_type, "plate": plate})
 
@@ -52,7 +63,22 @@ class MqttEventService:
         #    self.event_model.mark_event_as_synced(event_id)
         #else:
         #    self.logger.error(f"Error sending message to MQTT broker: {result}")
+        return written
             
+    def publish_correction(self, event_type, decided_type, plate, poc_id=None):
+        """
+        Sends a CORRECTED_ event for a gate decision that the late remote answer contradicts.
+        Only published to the server: it is not a gate event, so it is not stored in the local
+        events table where it would become the plate's last event.
+        """
+        poc_id = poc_id or Config.POC_ID
+        payload = json.dumps({
+            "id": str(uuid.uuid4()), "pocId": poc_id, "type": event_type, "plate": plate, "decidedType": decided_type,
+        })
+        result, mid = self.client.publish(EVENTS_TOPIC, payload, qos=1)
+        if result != mqtt.MQTT_ERR_SUCCESS:
+            self.logger.error(f"Error sending correction to MQTT broker: {result}")
+
     def publish_pending_events(self, event_buffer):
         """
         Send pending events batch to server and mark them as synchronized in the database.
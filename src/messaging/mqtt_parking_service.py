@@ -5,6 +5,7 @@ from datetime import datetime
 from src.database.models import ParkingModel
 from src.database.models import _parse_to_local_date
 from src.config import Config
+from src.metrics import metrics
 import logging
 
 MQTT_BROKER = Config.MQTT_SERVER_HOST
@@ -94,7 +95,8 @@ class MqttParkingService:
             })
 
         # Publicar mensaje
-        result, mid = self.client.publish(EVENTS_TOPIC, payload, qos=2)
+        with metrics.timer("stage.publish"):
+            result, mid = self.client.publish(EVENTS_TOPIC, payload, qos=2)
 
         if result == mqtt.MQTT_ERR_SUCCESS:
             self.parking_db.update_parking_sync(identifier)
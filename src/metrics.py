@@ -0,0 +1,96 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and latency samples shared by the whole application."""
+
+    MAX_SAMPLES = 2048  # muestras por timing, las mas antiguas se descartan
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._timings = {}
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, seconds):
+        """Records a latency sample (in seconds) for the given timing."""
+        with self._lock:
+            samples = self._timings.get(name)
+            if samples is None:
+                samples = self._timings[name] = deque(maxlen=self.MAX_SAMPLES)
+            samples.append(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        """Times the enclosed block and records it under name."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started_at)
+
+    def counter(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def gauge(self, name):
+        with self._lock:
+            return self._gauges.get(name)
+
+    def timing(self, name):
+        """Returns count and p50/p95/p99/max in milliseconds for a timing, or None."""
+        with self._lock:
+            samples = list(self._timings.get(name, ()))
+        return summarize(samples)
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            timings = {name: list(samples) for name, samples in self._timings.items()}
+        return {
+            "counters": counters,
+            "gauges": gauges,
+            "timings": {name: summarize(samples) for name, samples in timings.items()},
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile over an already sorted list."""
+    if not sorted_samples:
+        return None
+    rank = max(0, min(len(sorted_samples) - 1, int(round(pct / 100 * len(sorted_samples))) - 1))
+    return sorted_samples[rank]
+
+
+def summarize(samples):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,122 @@
+"""
+Micro-benchmarks for hot helpers of the decision path.
+
+    python -m src.microbench validation --iterations 20000
+    python -m src.microbench sqlite --iterations 2000
+"""
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import argparse
+import random
+import string
+
+
+def _time_per_call(fn, inputs, iterations):
+    started_at = time.perf_counter()
+    for index in range(iterations):
+        fn(inputs[index % len(inputs)])
+    return (time.perf_counter() - started_at) / iterations * 1e6
+
+
+def bench_validation(args):
+    """Compiled PlateValidator against the previous loop of re.match over pattern strings."""
+    import re
+    from src.processing.plates import PlateValidator, load_plate_formats, normalize_plate
+
+    formats = load_plate_formats()
+    validator = PlateValidator(formats)
+    legacy_patterns = {plate_format.name: f"^{plate_format.pattern()}$" for plate_format in validator.formats}
+
+    def legacy(plate):
+        for plate_type, pattern in legacy_patterns.items():
+            if re.match(pattern, plate):
+                return plate_type
+        return None
+
+    rng = random.Random(0)
+    clean = ["".join(rng.choices(string.ascii_uppercase, k=4)) + "".join(rng.choices(string.digits, k=2)) for _ in range(200)]
+    noisy = [plate[:4] + plate[4:].replace("0", "O").replace("8", "B") for plate in clean[:100]]
+    formatted = [f"{plate[:2]}-{plate[2:4]} {plate[4:]}".lower() for plate in clean[:100]]
+    invalid = ["".join(rng.choices(string.ascii_uppercase + string.digits, k=rng.randint(3, 8))) for _ in range(100)]
+    reads = clean + noisy + formatted + invalid
+    rng.shuffle(reads)
+
+    return {
+        "reads": len(reads),
+        "iterations": args.iterations,
+        "legacy_us": _time_per_call(lambda plate: legacy(normalize_plate(plate)), reads, args.iterations),
+        "compiled_us": _time_per_call(validator.validate, reads, args.iterations),
+        "legacy_valid": sum(legacy(normalize_plate(plate)) is not None for plate in reads),
+        "compiled_valid": sum(validator.validate(plate) is not None for plate in reads),
+    }
+
+
+def bench_sqlite(args):
+    """Model queries with a new connection per call (previous behaviour) against pooled per-thread connections."""
+    from src.config import Config
+    from src.database.database_connector import DatabaseConnector
+    from src.database.models import VehicleModel, ParkingModel, EventModel
+
+    logging.disable(logging.INFO)  # los modelos loguean cada consulta en DEBUG
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    database_url, pool_enabled = Config.DATABASE_URL, Config.SQLITE_POOL_ENABLED
+    Config.DATABASE_URL = path
+    try:
+        DatabaseConnector(pooled=False).initialize_database()
+        plates = [f"BN{index:04d}" for index in range(500)]
+        conn = DatabaseConnector(pooled=False).get_conn()
+        conn.executemany(
+            "INSERT INTO vehicles (id, user_id, user_type, plate, vehicle_type) VALUES (?, ?, 'OWNER', ?, 'CAR')",
+            [(f"v{index}", f"u{index}", plate) for index, plate in enumerate(plates)],
+        )
+        conn.executemany(
+            "INSERT INTO parking (id, user_id, identifier, is_for_visit, available) VALUES (?, ?, ?, 0, 1)",
+            [(f"p{index}", f"u{index}", f"P-{index}") for index in range(len(plates))],
+        )
+        conn.commit()
+        conn.close()
+
+        results = {"iterations": args.iterations}
+        for label, pooled in (("per_call", False), ("pooled", True)):
+            Config.SQLITE_POOL_ENABLED = pooled
+            vehicles, parking, events = VehicleModel(), ParkingModel(), EventModel()
+            counter = iter(range(10 ** 9))
+            results[label] = {
+                "find_vehicle_us": _time_per_call(vehicles.find_vehicle_by_plate, plates, args.iterations),
+                "find_parking_us": _time_per_call(parking.find_by_user_id, [f"u{index}" for index in range(len(plates))], args.iterations),
+                "register_event_us": _time_per_call(
+                    lambda plate: events.register_event(f"{label}-{next(counter)}", "ACCESS", 1, plate), plates, args.iterations
+                ),
+            }
+        return results
+    finally:
+        Config.DATABASE_URL, Config.SQLITE_POOL_ENABLED = database_url, pool_enabled
+        DatabaseConnector.close_all()
+        logging.disable(logging.NOTSET)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+BENCHMARKS = {
+    "validation": bench_validation,
+    "sqlite": bench_sqlite,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.microbench", description="Decision path micro-benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args(argv)
+    print(json.dumps(BENCHMARKS[args.benchmark](args), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import logging
+import threading
+import cv2
+import numpy as np
+from src.config import Config
+from src.metrics import metrics
+
+
+def parse_roi(roi):
+    """
+    Parses a region of interest given as normalized polygon points "x,y;x,y;..."
+    (fractions of the frame width/height). Returns a list of (x, y) tuples or None.
+    """
+    if not roi:
+        return None
+    points = [tuple(float(v) for v in point.split(",")) for point in roi.split(";") if point.strip()]
+    if len(points) < 3:
+        raise ValueError(f"ROI needs at least 3 points: {roi}")
+    return points
+
+
+class FrameChangeGate:
+    """
+    Cheap pre-inference stage.
+    Compares a downsampled grayscale copy of each frame with the last analysed one and
+    reports when the change inside the region of interest is too small to be worth a
+    model call.
+    """
+
+    def __init__(self, width=160, pixel_delta=25, min_changed_ratio=0.005, roi=None):
+        self.logger = logging.getLogger(__name__)
+        self.width = width
+        self.pixel_delta = pixel_delta
+        self.min_changed_ratio = min_changed_ratio
+        self.roi = roi
+        self._lock = threading.Lock()
+        self._reference = None
+        self._mask = None
+        self._mask_pixels = 0
+        self.frames = 0
+        self.skipped = 0
+        self._inference_seconds = 0.0
+        self._inferences = 0
+
+    def reset(self):
+        """Forgets the reference frame so the next frame is always analysed."""
+        with self._lock:
+            self._reference = None
+
+    def _downsample(self, image):
+        height, width = image.shape[:2]
+        size = (self.width, max(1, round(height * self.width / width)))
+        small = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def _build_mask(self, shape):
+        height, width = shape
+        if not self.roi:
+            self._mask = None
+            self._mask_pixels = height * width
+            return
+        polygon = np.array([(x * width, y * height) for x, y in self.roi], dtype=np.int32)
+        self._mask = np.zeros(shape, dtype=np.uint8)
+        cv2.fillPoly(self._mask, [polygon], 255)
+        self._mask_pixels = max(1, cv2.countNonZero(self._mask))
+
+    def should_skip(self, image):
+        """Returns True when the frame barely differs from the last analysed frame."""
+        small = self._downsample(image)
+        with self._lock:
+            self.frames += 1
+            if self._reference is None or self._reference.shape != small.shape:
+                self._build_mask(small.shape)
+                self._reference = small
+                return False
+
+            diff = cv2.absdiff(self._reference, small)
+            _, changed = cv2.threshold(diff, self.pixel_delta, 255, cv2.THRESH_BINARY)
+            if self._mask is not None:
+                changed = cv2.bitwise_and(changed, self._mask)
+            changed_ratio = cv2.countNonZero(changed) / self._mask_pixels
+
+            if changed_ratio < self.min_changed_ratio:
+                self.skipped += 1
+                metrics.increment("change_gate.skipped")
+                return True
+
+            self._reference = small
+            return False
+
+    def record_inference(self, seconds):
+        """Feeds the measured model time used to estimate the time saved by skips."""
+        with self._lock:
+            self._inference_seconds += seconds
+            self._inferences += 1
+
+    def stats(self):
+        with self._lock:
+            mean_inference = self._inference_seconds / self._inferences if self._inferences else 0.0
+            return {
+                "frames": self.frames,
+                "skipped": self.skipped,
+                "skip_ratio": self.skipped / self.frames if self.frames else 0.0,
+                "time_saved_s": self.skipped * mean_inference,
+            }
+
+
+def create_change_gate(roi=None):
+    """FrameChangeGate from the CHANGE_GATE_* settings, None when the gate is disabled."""
+    if not Config.CHANGE_GATE_ENABLED:
+        return None
+    return FrameChangeGate(
+        width=Config.CHANGE_GATE_WIDTH,
+        pixel_delta=Config.CHANGE_GATE_PIXEL_DELTA,
+        min_changed_ratio=Config.CHANGE_GATE_MIN_CHANGED_RATIO,
+        roi=parse_roi(roi if roi is not None else Config.CHANGE_GATE_ROI),
+    )
@@ -0,0 +1,196 @@
+import time
+import logging
+from dataclasses import replace
+import threading
+import cv2
+import numpy as np
+from fast_alpr import ALPRResult
+from fast_alpr.base import OcrResult
+from src.metrics import metrics
+from src.processing.frame_sources import DualStreamFrame, create_frame_source
+from src.processing.inference_settings import create_alpr, resolve_inference_settings
+from src.processing.ocr_cache import create_ocr_cache, crop_hash
+
+
+class PlateCandidate:
+    """
+    A detected plate and its grayscale crop, waiting for (or already holding) its OCR read.
+    track identifies the tracked vehicle ((tracker id, track id)), None without a tracker.
+    """
+
+    def __init__(self, detection, crop, ocr=None, track=None):
+        self.detection = detection
+        self.crop = crop
+        self.ocr = ocr
+        self.track = track
+
+    def to_result(self):
+        return ALPRResult(detection=self.detection, ocr=self.ocr)
+
+
+class DetectionEngine:
+    """
+    Process-wide detection engine.
+    Loads the ALPR models once, runs a warm-up inference and keeps the frame source
+    started so a motion trigger only has to start analysing frames.
+    """
+    WARM_UP_PLATE_SIZE = (70, 140)  # alto x ancho de un recorte de patente tipico
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls, **kwargs):
+        """Returns the shared engine, creating (and warming up) it on first use."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(**kwargs)
+            return cls._instance
+
+    def __init__(self, source=None, default_source=True, inference_settings=None, frame_size=None):
+        self.logger = logging.getLogger(__name__)
+        started_at = time.perf_counter()
+        self._warm_up_lock = threading.Lock()
+        self._warmed_sizes = set()
+        self._ocr_warmed = False
+
+        self.inference_settings = inference_settings or resolve_inference_settings()
+        self.alpr = create_alpr(self.inference_settings)
+        self.ocr_cache = create_ocr_cache()
+        models_loaded_at = time.perf_counter()
+        metrics.observe("engine.model_load", models_loaded_at - started_at)
+
+        # En modo multi-pista cada pista trae su propia fuente y el engine solo comparte los modelos
+        if source is None and default_source:
+            source = create_frame_source()
+        self.source = source.start() if source is not None else None
+        if frame_size is None and self.source is not None:
+            frame_size = self.source.frame_size()
+        self.warm_up(frame_size)
+
+        self.cold_start_seconds = time.perf_counter() - started_at
+        metrics.observe("engine.cold_start", self.cold_start_seconds)
+        self.logger.info(
+            f"Detection engine ready: cold start {self.cold_start_seconds * 1000:.0f} ms "
+            f"(models {(models_loaded_at - started_at) * 1000:.0f} ms)"
+        )
+
+    def warm_up(self, frame_size):
+        """
+        Runs one inference through both models, the detector on a frame of the source's
+        frame_size (width, height), so the first real frame pays no lazy-init cost. Each
+        size is warmed up once (lanes with different sources call it again); without a
+        known size only the OCR model is warmed up.
+        """
+        with self._warm_up_lock:
+            frame_size = tuple(frame_size) if frame_size is not None else None
+            if frame_size in self._warmed_sizes or (frame_size is None and self._ocr_warmed):
+                return
+            started_at = time.perf_counter()
+            if frame_size is not None:
+                width, height = frame_size
+                self.alpr.predict(np.zeros((height, width, 3), dtype=np.uint8))
+                self._warmed_sizes.add(frame_size)
+            else:
+                self.logger.info("Frame size unknown, the detector warms up on the first frame")
+            if not self._ocr_warmed:
+                self.alpr.ocr.predict(np.zeros((*self.WARM_UP_PLATE_SIZE, 3), dtype=np.uint8))
+                self._ocr_warmed = True
+            elapsed = time.perf_counter() - started_at
+        metrics.observe("engine.warm_up", elapsed)
+        self.logger.info(f"Models warmed up for {frame_size or 'OCR only'} in {elapsed * 1000:.0f} ms")
+
+    def capture_frame(self):
+        """Reads the next frame from the running source."""
+        return self.source.read()
+
+    def predict(self, frame, tracker=None):
+        """Detection followed by OCR of every plate found in the frame."""
+        return self.read_plates(self.detect(frame, tracker))
+
+    def detect(self, frame, tracker=None):
+        """
+        Runs the plate detector and returns one PlateCandidate (with its grayscale crop)
+        per detection. With a PlateTracker the detector only runs when the tracker needs it.
+        The frame is released once the crops have been taken.
+        """
+        try:
+            with metrics.timer("stage.plate_detection"):
+                if tracker is None:
+                    detections = self.alpr.detector.predict(frame.image)
+                else:
+                    detections = tracker.update(frame.image, self.alpr.detector.predict)
+            if not detections:
+                return []
+            if isinstance(frame, DualStreamFrame):
+                with frame.map_main() as main:
+                    candidates = [
+                        self._candidate(main.array, detection, frame.to_main_box(detection.bounding_box))
+                        for detection in detections
+                    ]
+            else:
+                candidates = [self._candidate(frame.image, detection, detection.bounding_box) for detection in detections]
+            if tracker is not None:
+                for candidate in candidates:
+                    track_id = getattr(candidate.detection, "track_id", None)
+                    if track_id is not None:
+                        candidate.track = (tracker.tracker_id, track_id)
+            return candidates
+        finally:
+            frame.release()
+
+    def _candidate(self, image, detection, bbox):
+        """Crops bbox (clipped to the image bounds) and converts it to the OCR input format."""
+        height, width = image.shape[:2]
+        x1, y1 = max(bbox.x1, 0), max(bbox.y1, 0)
+        x2, y2 = min(bbox.x2, width), min(bbox.y2, height)
+        crop = cv2.cvtColor(image[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+        if bbox is not detection.bounding_box:
+            detection = replace(detection, bounding_box=bbox)
+        return PlateCandidate(detection, crop)
+
+    def read_plates(self, candidates):
+        """OCR for the candidates of one frame, returns their ALPRResults."""
+        return self.read_plates_batch([candidates])[0]
+
+    def read_plates_batch(self, candidate_groups):
+        """
+        OCR for the candidates of several frames in a single model call. Candidates that
+        already carry an OCR result (e.g. reused from a static frame) or whose crop is in
+        the OCR cache of their track are not read again.
+        """
+        pending = [candidate for group in candidate_groups for candidate in group if candidate.ocr is None]
+        keys = {}
+        if self.ocr_cache is not None:
+            for candidate in pending:
+                if candidate.track is None:
+                    continue  # sin pista no hay con que comparar el recorte
+                keys[id(candidate)] = crop_hash(candidate.crop)
+                candidate.ocr = self.ocr_cache.get(candidate.track, keys[id(candidate)])
+            pending = [candidate for candidate in pending if candidate.ocr is None]
+
+        if pending:
+            started_at = time.perf_counter()
+            texts, probabilities = self.alpr.ocr.ocr_model.run(
+                [candidate.crop for candidate in pending], return_confidence=True
+            )
+            elapsed = time.perf_counter() - started_at
+            metrics.observe("stage.ocr", elapsed)
+            metrics.increment("ocr.batches")
+            metrics.increment("ocr.crops", len(pending))
+            for candidate, text, confidence in zip(pending, texts, probabilities):
+                # fast_plate_ocr rellena las posiciones vacias con '_'
+                candidate.ocr = OcrResult(text=text.replace("_", ""), confidence=float(np.mean(confidence)))
+            if self.ocr_cache is not None:
+                self.ocr_cache.record_cost(elapsed, len(pending))
+                for candidate in pending:
+                    if id(candidate) in keys:
+                        self.ocr_cache.put(candidate.track, keys[id(candidate)], candidate.ocr)
+        if keys:
+            metrics.set_gauge("ocr_cache.hit_rate", self.ocr_cache.hit_rate())
+        return [[candidate.to_result() for candidate in group] for group in candidate_groups]
+
+    def shutdown(self):
+        """Stops the frame source, only called when the process is exiting."""
+        if self.source is not None:
+            self.source.stop()
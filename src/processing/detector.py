@@ -1,113 +1,387 @@
 import time
 import logging
-import re
-from threading import Thread  # For handling background blinking
-from picamera2 import Picamera2
-import cv2
-from fast_alpr import ALPR
+import threading
+from collections import Counter
+from concurrent.futures import wait
 from src.config import Config
+from src.metrics import metrics
+from src.processing.detection_engine import DetectionEngine
+from src.processing.change_gate import create_change_gate
+from src.processing.frame_pipeline import FramePipeline
+from src.processing.plate_consensus import PlateConsensus
+from src.processing.plate_cooldown import PlateCooldownCache
+from src.processing.plate_tracker import create_plate_tracker
+from src.processing.plate_registry import get_plate_registry
+from src.processing.plates import create_plate_validator, normalize_plate
 from src.processing.gpio_controller import GPIOController
 from src.messaging.mqtt_event_service import MqttEventService
 from src.messaging.mqtt_parking_service import MqttParkingService
 from src.services.access_service import AccessService
 from src.services.event_service import EventService
+from src.http.lookup_cache import Deadline
+from src.services.access_policy import reconcile_decision
 
 class PlateDetector:
-    DETECTOR_MODEL = "yolo-v9-t-384-license-plate-end2end"
-    OCR_MODEL = "global-plates-mobile-vit-v2-model"
-    CAMERA_RESOLUTION = (1920, 1080)
-    CAMERA_FORMAT = "RGB888"
-    CAMERA_INIT_DELAY = 1  # seconds
 
-    def __init__(self):
+    def __init__(self, engine=None, gpio=None, cooldown=None, change_gate=None, tracker=None, registry=None,
+                 poc_id=None, name="plate-detector"):
         self.logger = logging.getLogger(__name__)
-        self.gpio = GPIOController()
-        self.alpr = ALPR(detector_model=self.DETECTOR_MODEL, ocr_model=self.OCR_MODEL)
-        self.picam = self._initialize_camera()
+        self.name = name
+        self.poc_id = poc_id  # punto de control de la pista, None = Config.POC_ID
+        self.gpio = gpio or GPIOController()
+        self.engine = engine or DetectionEngine.get_instance()
+        self.cooldown = cooldown or PlateCooldownCache(Config.DECISION_COOLDOWN_S)
+        self.change_gate = change_gate or create_change_gate()
+        self.tracker = tracker or create_plate_tracker()
+        self.registry = registry or get_plate_registry()
+        self.validator = create_plate_validator()
+        self._track_reads = {}  # track id -> Counter de lecturas validas del vehiculo
+        self.alpr = self.engine.alpr
         self.processing_led_active = False
+        self._armed = threading.Event()
+        self._busy = threading.Event()
+        self._triggered_at = None
+        self._worker = None
+        self._results_lock = threading.Lock()
 
-    def _initialize_camera(self):
-        """Configures and starts the camera."""
-        picam = Picamera2()
-        config = picam.create_preview_configuration(main={"size": self.CAMERA_RESOLUTION, "format": self.CAMERA_FORMAT})
-        picam.configure(config)
-        picam.start()
+    def start(self):
+        """Starts the background worker that runs a detection pass every time capture is armed."""
+        self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._worker.start()
 
-        time.sleep(self.CAMERA_INIT_DELAY)
-        self.logger.info("Camera activated (PyCamera2 display)")
-        return picam
+    def arm(self):
+        """Arms capture for the next detection pass; returns immediately (motion callback)."""
+        if self._busy.is_set():
+            self.logger.debug("Detection already running, trigger ignored")
+            return
+        self._triggered_at = time.perf_counter()
+        self._armed.set()
 
-    def detect_plates(self, max_frames=None):
+    def _run(self):
+        while True:
+            self._armed.wait()
+            self._armed.clear()
+            self._busy.set()
+            try:
+                self.detect_plates(Config.DETECTION_MAX_FRAMES or None, triggered_at=self._triggered_at)
+                if Config.MOTION_REARM_DELAY_S:
+                    time.sleep(Config.MOTION_REARM_DELAY_S)
+            except Exception as e:
+                self.logger.error(f"Error in detection pass: {e}")
+            finally:
+                self._busy.clear()
+
+    def _new_consensus(self):
+        if not Config.CONSENSUS_ENABLED:
+            return None
+        return PlateConsensus(Config.CONSENSUS_REQUIRED_READS, Config.CONSENSUS_WINDOW_FRAMES)
+
+    def _pass_expired(self, deadline, consensus):
+        """A detection pass ends when the plate is confirmed or the time budget runs out."""
+        if consensus is not None and consensus.confirmed is not None:
+            return True
+        return deadline is not None and time.perf_counter() >= deadline
+
+    def _pass_deadline(self):
+        if not Config.DETECTION_TIME_BUDGET_S:
+            return None
+        return time.perf_counter() + Config.DETECTION_TIME_BUDGET_S
+
+    def _infer(self, frame):
+        """
+        Runs the models on a frame unless the change gate sees a static scene, in which
+        case None is returned: a skipped frame is not a new read and must not vote.
+        """
+        if self.change_gate is not None and self.change_gate.should_skip(frame.image):
+            frame.release()
+            return None
+
+        started_at = time.perf_counter()
+        results = self.engine.predict(frame, self.tracker)
+        elapsed = time.perf_counter() - started_at
+        metrics.observe("detector.inference", elapsed)
+        if self.change_gate is not None:
+            self.change_gate.record_inference(elapsed)
+        return results
+
+    def _detect(self, frame):
+        """
+        Detection stage of the staged pipeline: returns the plate candidates of the frame,
+        or None on a static scene so neither model runs.
+        """
+        if self.change_gate is not None and self.change_gate.should_skip(frame.image):
+            frame.release()
+            return None
+
+        started_at = time.perf_counter()
+        candidates = self.engine.detect(frame, self.tracker)
+        if self.change_gate is not None:
+            self.change_gate.record_inference(time.perf_counter() - started_at)
+        return candidates
+
+    def detect_plates(self, max_frames=None, triggered_at=None):
         """Main loop for detecting license plates."""
+        if Config.PIPELINE_ENABLED:
+            return self._detect_plates_pipelined(max_frames, triggered_at)
+
         self._start_processing()
+        self._reset_change_gate()
+        consensus = self._new_consensus()
+        deadline = self._pass_deadline()
         frame_count = 0
 
         try:
             while not max_frames or frame_count < max_frames:
+                if self._pass_expired(deadline, consensus):
+                    break
                 frame = self._capture_frame()
                 if frame is None:
                     break
-                    # Convertir el frame a ASCII
-                results = self.alpr.predict(frame)
-                self._process_results(results)
-                
+                results = self._infer(frame)
+                self._process_results(results, consensus)
+
+                if frame_count == 0 and triggered_at is not None:
+                    self._record_trigger_latency(triggered_at)
                 frame_count += 1
-                
-            self.logger.info(f"Stopping after {frame_count} frames, waiting 5 s to start over....")
-            time.sleep(5) # 
+
+            self._finish_pass(frame_count, consensus)
+        finally:
+            self._cleanup()
+        return frame_count
+
+    def _detect_plates_pipelined(self, max_frames=None, triggered_at=None):
+        """Detection loop with capture and inference running concurrently over a frame ring."""
+        self._start_processing()
+        self._reset_change_gate()
+        consensus = self._new_consensus()
+        deadline = self._pass_deadline()
+        first_frame = threading.Event()
+
+        def on_results(frame, results):
+            with self._results_lock:
+                self._process_results(results, consensus)
+            if triggered_at is not None and not first_frame.is_set():
+                first_frame.set()
+                self._record_trigger_latency(triggered_at)
+
+        staged = Config.PIPELINE_STAGED_OCR
+        pipeline = FramePipeline(
+            capture_fn=self._capture_frame,
+            infer_fn=self._detect if staged else self._infer,
+            result_fn=on_results,
+            ring_size=Config.PIPELINE_RING_SIZE,
+            workers=Config.PIPELINE_WORKERS,
+            policy=Config.PIPELINE_DROP_POLICY,
+            max_age=Config.PIPELINE_MAX_FRAME_AGE_MS / 1000,
+            ocr_fn=self.engine.read_plates_batch if staged else None,
+            ocr_batch_size=Config.OCR_BATCH_SIZE,
+        )
+        try:
+            frame_count = pipeline.run(max_frames, should_stop=lambda: self._pass_expired(deadline, consensus))
+            self._finish_pass(frame_count, consensus)
         finally:
             self._cleanup()
+        return frame_count
+
+    def _reset_change_gate(self):
+        if self.change_gate is not None:
+            self.change_gate.reset()
+        self._track_reads = {}
+        if self.tracker is not None:
+            self.tracker.reset()
+
+    def _report_change_gate(self):
+        if self.change_gate is None:
+            return
+        stats = self.change_gate.stats()
+        metrics.set_gauge("change_gate.skip_ratio", stats["skip_ratio"])
+        metrics.set_gauge("change_gate.time_saved_s", stats["time_saved_s"])
+        self.logger.info(
+            f"Change gate skipped {stats['skipped']}/{stats['frames']} frames since start "
+            f"({stats['skip_ratio']:.0%}), ~{stats['time_saved_s'] * 1000:.0f} ms of inference saved"
+        )
+
+    def _report_tracker(self):
+        if self.tracker is None:
+            return
+        stats = self.tracker.stats()
+        metrics.set_gauge("tracker.detections_per_pass", stats["detections"])
+        for track_id, reads in self._track_reads.items():
+            plate, count = reads.most_common(1)[0]
+            self.logger.info(f"Track {track_id}: {plate} read {count} times {dict(reads)}")
+        self.logger.info(
+            f"Detector ran on {stats['detections']}/{stats['frames']} frames, "
+            f"{len(self._track_reads)} vehicle(s) tracked"
+        )
+
+    def _finish_pass(self, frame_count, consensus):
+        self._report_change_gate()
+        self._report_tracker()
+        if consensus is not None:
+            if consensus.confirmed is not None:
+                self.logger.info(f"Plate {consensus.confirmed} confirmed after {frame_count} frames")
+                metrics.set_gauge("detector.last_frames_to_consensus", frame_count)
+            else:
+                self.logger.info(f"No consensus after {frame_count} frames, giving up")
+                metrics.increment("detector.consensus_timeouts")
+        else:
+            self.logger.info(f"Stopping after {frame_count} frames")
+
+        if Config.POST_DETECTION_DELAY_S:
+            self.logger.info(f"Waiting {Config.POST_DETECTION_DELAY_S} s to start over....")
+            time.sleep(Config.POST_DETECTION_DELAY_S)
+
+    def _record_trigger_latency(self, triggered_at):
+        latency = time.perf_counter() - triggered_at
+        metrics.observe("detector.trigger_to_first_frame", latency)
+        self.logger.info(
+            f"Warm trigger: first frame analysed {latency * 1000:.0f} ms after motion "
+            f"(engine cold start was {self.engine.cold_start_seconds * 1000:.0f} ms)"
+        )
 
     def _capture_frame(self):
-        """Captures a frame from the camera."""
+        """Captures a frame from the configured source."""
         try:
-            return self.picam.capture_array()
+            with metrics.timer("stage.capture"):
+                return self.engine.capture_frame()
         except Exception as e:
             self.logger.error(f"Error capturing frame: {e}")
             return None
 
-    def _process_results(self, results):
-        """Processes the ALPR results."""
+    def _process_results(self, results, consensus=None):
+        """
+        Processes the ALPR results.
+        Without consensus every valid plate is handled right away; with consensus the frame's
+        valid reads are voted and the plate is handled once, when it gets confirmed.
+        results is None for a frame skipped by the change gate: it neither votes nor decides.
+        """
+        if results is None:
+            return
+        valid_plates = []
         for result in results:
-            plate = result.ocr.text
+            if result.ocr is None:
+                continue
             detection_confidence = result.detection.confidence
             ocr_confidence = result.ocr.confidence
             self.logger.debug(f"Plate detected: {result}")
 
-            if self._is_valid_plate(plate, detection_confidence, ocr_confidence):
-                self._handle_plate_detection(plate)
+            with metrics.timer("stage.validation"):
+                plate = self._valid_plate(normalize_plate(result.ocr.text), detection_confidence, ocr_confidence)
+            if plate is not None:
+                track_id = getattr(result.detection, "track_id", None)
+                if track_id is not None:
+                    self._track_reads.setdefault(track_id, Counter())[plate] += 1
+                if consensus is None:
+                    self._handle_plate_detection(plate)
+                else:
+                    valid_plates.append(plate)
 
-    def _is_valid_plate(self, plate, detection_confidence, ocr_confidence):
-        """Checks if the detected plate meets the confidence thresholds and validation rules."""
-        if ocr_confidence > Config.OCR_CONFIDENCE and detection_confidence > Config.DETECTION_CONFIDENCE:
-            if self.validate_plate(plate):
-                self.logger.info(f"Valid plate detected: {plate} (OCR: {ocr_confidence}, Detection: {detection_confidence})")
-                return True
-        return False
+        if consensus is not None and consensus.confirmed is None:
+            if consensus.add_frame(valid_plates) is not None:
+                self._handle_plate_detection(consensus.confirmed)
+
+    def _resolve_registered(self, plate):
+        """Maps a read within PLATE_REGISTRY_MAX_DISTANCE of exactly one registered plate to that plate."""
+        if self.registry is None or plate in self.registry:
+            return plate
+        resolved = self.registry.resolve(plate, Config.PLATE_REGISTRY_MAX_DISTANCE)
+        if resolved is None:
+            return plate
+        self.logger.info(f"Read {plate} resolved to registered plate {resolved}")
+        metrics.increment("plate_registry.resolved")
+        return resolved
+
+    def _valid_plate(self, plate, detection_confidence, ocr_confidence):
+        """
+        Returns the plate to act on when the read meets the confidence thresholds and a plate
+        format (after positional correction and registry resolution), otherwise None.
+        """
+        if ocr_confidence <= Config.OCR_CONFIDENCE or detection_confidence <= Config.DETECTION_CONFIDENCE:
+            return None
+        match = self.validate_plate(plate)
+        candidate = match.plate if match is not None else plate
+        resolved = self._resolve_registered(candidate)
+        if resolved != candidate:
+            match = self.validate_plate(resolved)
+        if match is None:
+            return None
+        self.logger.debug(
+            f"Valid plate detected: {match.plate} ({match.plate_type}, read {plate}, "
+            f"OCR: {ocr_confidence}, Detection: {detection_confidence})"
+        )
+        return match.plate
 
     def _handle_plate_detection(self, plate):
         """Handles the actions after detecting a valid plate."""
+        if self.cooldown.should_suppress(plate):
+            self.logger.debug(f"Decision for {plate} already taken, read suppressed by cooldown")
+            return
+
         access_service = AccessService()
         mqtt_event_service = MqttEventService()
         mqtt_parking_service = MqttParkingService()
         event_service = EventService()
         
-        last_event_type = event_service.find_last_registered_event_type(plate)
-        is_authorized, parking_identifier = access_service.is_vehicle_authorized(plate, last_event_type)
-        self.logger.info(f"Parking identifier: {parking_identifier}")
-        
+        deadline = Deadline(Config.DECISION_BUDGET_MS / 1000 if Config.DECISION_BUDGET_MS else None)
+        started_at = time.perf_counter()
+        with metrics.timer("stage.access_decision"):
+            last_event_type, is_authorized, parking_identifier = self._decide(event_service, access_service, plate, deadline)
         event_type = "EXIT" if last_event_type == "ACCESS" else "ACCESS"
-        
+        metrics.observe(f"decision.latency.{deadline.outcome}", time.perf_counter() - started_at)
+        self.logger.info(f"Parking identifier: {parking_identifier}")
+        metrics.increment("decision.granted" if is_authorized else "decision.denied")
+
         if is_authorized:
             self._grant_access(mqtt_event_service, mqtt_parking_service, event_type, plate, parking_identifier)
         else:
             self._deny_access(mqtt_event_service, plate, event_type)
 
+        if deadline.missed:
+            threading.Thread(
+                target=self._reconcile,
+                args=(mqtt_event_service, plate, last_event_type, is_authorized, deadline),
+                name=f"{self.name}-reconcile",
+                daemon=True,
+            ).start()
+
+    def _decide(self, event_service, access_service, plate, deadline=None):
+        """Returns (last event type, authorized, parking identifier) for plate."""
+        last_event_type = event_service.find_last_registered_event_type(plate, deadline)
+        is_authorized, parking_identifier = access_service.is_vehicle_authorized(plate, last_event_type, deadline)
+        return last_event_type, is_authorized, parking_identifier
+
+    def _reconcile(self, mqtt_event_service, plate, last_event_type, is_authorized, deadline):
+        """
+        Waits for the remote lookups that missed the decision budget and recomputes the
+        decision from their answers and the last event type the gate decided with (the local
+        tables already hold the gate's own event, so they are not read again). When the
+        result differs a CORRECTED_ event is sent to the server; it is not stored as a local
+        gate event.
+        """
+        wait(deadline.missed.values(), timeout=Config.HTTP_TIMEOUT_S * 2)
+        reconciled = reconcile_decision(deadline, last_event_type)
+        if reconciled is None:
+            self.logger.warning(f"Unable to reconcile decision for {plate}, remote lookups failed")
+            return
+        metrics.increment("decision.reconciled")
+        event_type = "EXIT" if last_event_type == "ACCESS" else "ACCESS"
+        remote_last_event_type, remote_authorized = reconciled
+        remote_event_type = "EXIT" if remote_last_event_type == "ACCESS" else "ACCESS"
+        if (remote_event_type, bool(remote_authorized)) == (event_type, bool(is_authorized)):
+            return
+        metrics.increment("decision.reconcile_mismatch")
+        corrected = remote_event_type if remote_authorized else f"DENIED_{remote_event_type}"
+        decided = event_type if is_authorized else f"DENIED_{event_type}"
+        self.logger.warning(
+            f"Remote answer for {plate} disagrees with the gate decision ({decided}), publishing CORRECTED_{corrected}"
+        )
+        mqtt_event_service.publish_correction(f"CORRECTED_{corrected}", decided, plate, self.poc_id)
+
 
     def _grant_access(self, mqtt_event_service, mqtt_parking_service, event_type, plate, parking_identifier):
         """Handles access granting logic."""
         self.gpio.led_off("processing")
-        mqtt_event_service.publish_event(event_type, plate)
+        mqtt_event_service.publish_event(event_type, plate, self.poc_id)
         available = event_type == "EXIT" or event_type is None
         mqtt_parking_service.publish_parking_update(available, parking_identifier, plate)
         self.gpio.led_on("access_granted")
@@ -117,7 +391,7 @@ class PlateDetector:
         """Handles access denial logic."""
         self.gpio.led_off("processing")
         final_event_type = f"DENIED_{event_type}"
-        mqtt_event_service.publish_event(final_event_type, plate)
+        mqtt_event_service.publish_event(final_event_type, plate, self.poc_id)
         self.gpio.led_on("access_denied")
 
     def _start_processing(self):
@@ -127,22 +401,12 @@ class PlateDetector:
         self.logger.info("Starting plate detection...")
 
     def _cleanup(self):
-        """Stops the camera and turns off LEDs."""
-        try:
-            self.picam.stop()
-            self.picam.close()
-        except Exception as e:
-            self.logger.debug("Unable to stop camera: {e}")
-        
+        """Turns off LEDs, the camera is owned by the engine and keeps running."""
         self.gpio.led_off("processing")
         self.gpio.led_off("access_granted")
         self.gpio.led_off("access_denied")
 
     def validate_plate(self, plate):
-        """Validates the license plate format."""
-        for plate_type, pattern in Config.PATTERN_MAP.items():
-            if re.match(pattern, plate):
-                self.logger.info(f"License plate matched type: {plate_type}")
-                return True
-        return False
+        """Validates the license plate format, returns the PlateMatch (corrected plate and type) or None."""
+        return self.validator.validate(plate)
 
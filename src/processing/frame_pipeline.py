@@ -0,0 +1,270 @@
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from src.metrics import metrics
+
+
+def release_frame(frame):
+    """Frees resources held by a frame that will not be analysed (e.g. camera request buffers)."""
+    frame.release()
+
+DROP_POLICY_LATEST = "LATEST"  # el worker toma el frame mas nuevo y descarta los anteriores
+DROP_POLICY_FIFO = "FIFO"      # el worker toma el mas antiguo, el ring lleno sobreescribe el mas viejo
+
+
+class FrameRing:
+    """Fixed-size frame ring shared by the capture thread and the inference workers."""
+
+    def __init__(self, size, policy=DROP_POLICY_LATEST, max_age=None):
+        if policy not in (DROP_POLICY_LATEST, DROP_POLICY_FIFO):
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.size = size
+        self.policy = policy
+        self.max_age = max_age  # seconds, None disables age based drops
+        self._frames = deque(maxlen=size)
+        self._condition = threading.Condition()
+        self._closed = False
+        self.dropped_overflow = 0
+        self.dropped_stale = 0
+
+    def put(self, frame):
+        with self._condition:
+            if len(self._frames) == self.size:
+                release_frame(self._frames.popleft())
+                self.dropped_overflow += 1
+                metrics.increment("pipeline.dropped_overflow")
+            self._frames.append(frame)
+            metrics.set_gauge("pipeline.ring_depth", len(self._frames))
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """
+        Returns the next frame according to the drop policy, or None when closed/timed out.
+        Frames older than max_age are never returned, whatever the policy.
+        """
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                remaining = None if give_up_at is None else max(0.0, give_up_at - time.monotonic())
+                if not self._condition.wait_for(lambda: self._frames or self._closed, remaining):
+                    return None
+                if not self._frames:
+                    return None
+                self._drop_expired()
+                if self._frames:
+                    break
+                metrics.set_gauge("pipeline.ring_depth", 0)  # todos vencidos, esperar uno nuevo
+
+            if self.policy == DROP_POLICY_LATEST:
+                frame = self._frames.pop()
+                self._drop_stale(len(self._frames))
+                for stale in self._frames:
+                    release_frame(stale)
+                self._frames.clear()
+            else:
+                frame = self._frames.popleft()
+            metrics.set_gauge("pipeline.ring_depth", len(self._frames))
+            return frame
+
+    def _drop_expired(self):
+        """Drops the frames older than max_age, the ring is in capture order so they are at its head."""
+        if self.max_age is None:
+            return
+        now = time.perf_counter()
+        expired = 0
+        while self._frames and now - self._frames[0].timestamp > self.max_age:
+            release_frame(self._frames.popleft())
+            expired += 1
+        self._drop_stale(expired)
+
+    def _drop_stale(self, count):
+        if count:
+            self.dropped_stale += count
+            metrics.increment("pipeline.dropped_stale", count)
+
+    def depth(self):
+        with self._condition:
+            return len(self._frames)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            for frame in self._frames:
+                release_frame(frame)
+            self._frames.clear()
+            self._condition.notify_all()
+
+
+class FramePipeline:
+    """
+    Producer/consumer pipeline: one capture thread fills a FrameRing while N inference
+    workers drain it, so throughput is bounded by the slowest stage instead of the sum.
+
+    When ocr_fn is given, inference is split in two stages: the workers only run plate
+    detection (infer_fn returns the plate candidates) and a dedicated OCR thread reads
+    the candidates of several frames per call (ocr_fn takes a list of candidate lists and
+    returns one result list per frame), so detection of frame N+1 overlaps OCR of frame N.
+    infer_fn may return None for a frame it skipped, which goes straight to result_fn.
+    """
+
+    def __init__(self, capture_fn, infer_fn, result_fn, ring_size=4, workers=1,
+                 policy=DROP_POLICY_LATEST, max_age=None, ocr_fn=None, ocr_batch_size=8):
+        self.logger = logging.getLogger(__name__)
+        self.capture_fn = capture_fn
+        self.infer_fn = infer_fn
+        self.result_fn = result_fn
+        self.workers = workers
+        self.ring = FrameRing(ring_size, policy, max_age)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.captured = 0
+        self.processed = 0
+        self._claimed = 0
+        self.ocr_fn = ocr_fn
+        self.ocr_batch_size = ocr_batch_size
+        self._ocr_queue = queue.Queue(maxsize=ring_size * 2)
+        self._detection_done = threading.Event()
+
+    def run(self, max_frames=None, should_stop=None):
+        """
+        Runs the pipeline until max_frames frames have been analysed, the source is exhausted
+        or should_stop() returns True. Returns the number of analysed frames.
+        """
+        self._max_frames = max_frames
+        self._should_stop = should_stop or (lambda: False)
+
+        threads = [threading.Thread(target=self._capture_loop, name="pipeline-capture", daemon=True)]
+        threads += [
+            threading.Thread(target=self._inference_loop, name=f"pipeline-infer-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        ocr_thread = None
+        if self.ocr_fn is not None:
+            ocr_thread = threading.Thread(target=self._ocr_loop, name="pipeline-ocr", daemon=True)
+
+        started_at = time.perf_counter()
+        for thread in threads + ([ocr_thread] if ocr_thread else []):
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._detection_done.set()
+        if ocr_thread is not None:
+            ocr_thread.join()
+
+        elapsed = time.perf_counter() - started_at
+        stats = self.stats()
+        metrics.increment("pipeline.captured", stats["captured"])
+        metrics.increment("pipeline.processed", stats["processed"])
+        self.logger.info(
+            f"Pipeline processed {stats['processed']}/{stats['captured']} frames in {elapsed:.2f} s "
+            f"(dropped overflow: {stats['dropped_overflow']}, stale: {stats['dropped_stale']})"
+        )
+        return self.processed
+
+    def stop(self):
+        self._stop.set()
+        self.ring.close()
+
+    def _finished(self):
+        if self._stop.is_set() or self._should_stop():
+            return True
+        with self._lock:
+            return self._max_frames is not None and self.processed >= self._max_frames
+
+    def _claim(self):
+        """Reserves one analysis slot so concurrent workers never exceed max_frames."""
+        with self._lock:
+            if self._max_frames is not None and self._claimed >= self._max_frames:
+                return False
+            self._claimed += 1
+            return True
+
+    def _capture_loop(self):
+        try:
+            while not self._finished():
+                started_at = time.perf_counter()
+                frame = self.capture_fn()
+                if frame is None:
+                    break
+                metrics.observe("pipeline.capture", time.perf_counter() - started_at)
+                with self._lock:
+                    self.captured += 1
+                self.ring.put(frame)
+        except Exception as e:
+            self.logger.error(f"Error in capture stage: {e}")
+        finally:
+            self.stop_when_drained()
+
+    def stop_when_drained(self):
+        """Lets the workers finish what is already in the ring before closing it."""
+        while self.ring.depth() and not self._stop.is_set():
+            time.sleep(0.005)
+        self.stop()
+
+    def _inference_loop(self):
+        while True:
+            frame = self.ring.get(timeout=0.5)
+            if frame is None:
+                if self._stop.is_set():
+                    return
+                continue
+            if self._stop.is_set() or self._should_stop() or not self._claim():
+                release_frame(frame)
+                return
+            try:
+                started_at = time.perf_counter()
+                results = self.infer_fn(frame)
+                metrics.observe("pipeline.inference", time.perf_counter() - started_at)
+                metrics.observe("pipeline.frame_age", started_at - frame.timestamp)
+                if self.ocr_fn is not None and results is not None:
+                    self._ocr_queue.put((frame, results))
+                    metrics.set_gauge("pipeline.ocr_queue_depth", self._ocr_queue.qsize())
+                else:
+                    self.result_fn(frame, results)
+            except Exception as e:
+                self.logger.error(f"Error in inference stage: {e}")
+            with self._lock:
+                self.processed += 1
+            if self._finished():
+                self.stop()
+
+    def _ocr_loop(self):
+        """Batches the pending candidates of as many queued frames as fit in one OCR call."""
+        while True:
+            try:
+                batch = [self._ocr_queue.get(timeout=0.1)]
+            except queue.Empty:
+                if self._detection_done.is_set():
+                    return
+                continue
+
+            crops = len(batch[0][1])
+            while crops < self.ocr_batch_size:
+                try:
+                    item = self._ocr_queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+                crops += len(item[1])
+            metrics.set_gauge("pipeline.ocr_queue_depth", self._ocr_queue.qsize())
+
+            try:
+                started_at = time.perf_counter()
+                results = self.ocr_fn([candidates for _, candidates in batch])
+                metrics.observe("pipeline.ocr", time.perf_counter() - started_at)
+                for (frame, _), frame_results in zip(batch, results):
+                    self.result_fn(frame, frame_results)
+            except Exception as e:
+                self.logger.error(f"Error in OCR stage: {e}")
+
+    def stats(self):
+        return {
+            "captured": self.captured,
+            "processed": self.processed,
+            "ring_depth": self.ring.depth(),
+            "dropped_overflow": self.ring.dropped_overflow,
+            "dropped_stale": self.ring.dropped_stale,
+            "ocr_queue_depth": self._ocr_queue.qsize(),
+        }
@@ -0,0 +1,392 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+import cv2
+import numpy as np
+from src.config import Config
+
+PACING_FAST = "FAST"          # entrega frames tan rapido como se consumen (benchmarks)
+PACING_REALTIME = "REALTIME"  # respeta los tiempos originales del video
+
+
+class Frame:
+    """A BGR image plus its capture timestamp (time.perf_counter) and sequence number."""
+
+    def __init__(self, image, timestamp=None, index=0):
+        self.image = image
+        self.timestamp = timestamp if timestamp is not None else time.perf_counter()
+        self.index = index
+
+    def release(self):
+        """Frees resources held by the frame, a no-op for plain in-memory frames."""
+
+
+class DualStreamFrame(Frame):
+    """
+    Frame backed by a held camera request.
+    `image` is the small lores conversion used for detection; OCR crops are read straight
+    from the main stream buffer, so the full resolution frame is never copied. The lores
+    buffer belongs to the frame until release(), which hands it back through on_release.
+    """
+
+    def __init__(self, request, lores, scale, timestamp=None, index=0, on_release=None):
+        super().__init__(lores, timestamp, index)
+        self.request = request
+        self.scale = scale  # (sx, sy) lores -> main
+        self._on_release = on_release
+        self._released = False
+
+    @property
+    def lores(self):
+        return self.image
+
+    def map_main(self):
+        """Context manager exposing the main stream buffer as a numpy array (zero copy)."""
+        from picamera2 import MappedArray
+        return MappedArray(self.request, "main")
+
+    def to_main_box(self, bbox):
+        from fast_alpr.base import BoundingBox
+        sx, sy = self.scale
+        return BoundingBox(
+            x1=int(bbox.x1 * sx), y1=int(bbox.y1 * sy),
+            x2=int(bbox.x2 * sx), y2=int(bbox.y2 * sy),
+        )
+
+    def release(self):
+        """Returns the request and lores buffers to the camera, safe to call more than once."""
+        if not self._released:
+            self._released = True
+            # Primero el buffer lores: la proxima captura puede llegar apenas se libere el request
+            if self._on_release is not None:
+                self._on_release(self.image)
+            self.request.release()
+
+
+class FrameSource:
+    """
+    Base class for frame sources. read() returns the next Frame, or None when the source
+    is exhausted or failed.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._index = 0
+
+    def start(self):
+        return self
+
+    def read(self):
+        raise NotImplementedError
+
+    def frame_size(self):
+        """(width, height) of the frames read() returns once started, None when not known."""
+        return None
+
+    def stop(self):
+        pass
+
+    def _next_index(self):
+        index = self._index
+        self._index += 1
+        return index
+
+
+class CameraFrameSource(FrameSource):
+    """Picamera2 source, optionally with a lores stream for detection (dual stream)."""
+    CAMERA_RESOLUTION = (1920, 1080)
+    CAMERA_FORMAT = "RGB888"
+    CAMERA_INIT_DELAY = 1  # seconds
+    LORES_FORMAT = "YUV420"  # el ISP del Pi 4 solo entrega YUV en el stream lores
+
+    def __init__(self, dual_stream=None, lores_resolution=None, buffer_count=None, camera_num=0):
+        super().__init__()
+        self.dual_stream = Config.CAMERA_DUAL_STREAM if dual_stream is None else dual_stream
+        self.lores_resolution = lores_resolution or Config.CAMERA_LORES_RESOLUTION
+        self.buffer_count = buffer_count or Config.CAMERA_BUFFER_COUNT
+        self.camera_num = camera_num
+        self.picam = None
+        self._lock = threading.Lock()
+        self._free_lores_buffers = deque()  # solo los de frames ya liberados
+
+    def start(self):
+        """Configures and starts the camera, it stays running until stop()."""
+        from picamera2 import Picamera2
+
+        picam = Picamera2(self.camera_num)
+        main = {"size": self.CAMERA_RESOLUTION, "format": self.CAMERA_FORMAT}
+        if self.dual_stream:
+            lores = {"size": self.lores_resolution, "format": self.LORES_FORMAT}
+            config = picam.create_preview_configuration(main=main, lores=lores, buffer_count=self.buffer_count)
+            self._allocate_lores_buffers()
+        else:
+            config = picam.create_preview_configuration(main=main)
+        picam.configure(config)
+        picam.start()
+
+        time.sleep(self.CAMERA_INIT_DELAY)
+        self.logger.info("Camera activated (PyCamera2 display)")
+        self.picam = picam
+        return self
+
+    def _allocate_lores_buffers(self):
+        """
+        One BGR buffer per camera buffer. A buffer is taken by each lores conversion and only
+        returns to the free list when its frame is released, so a frame still in use is
+        never overwritten.
+        """
+        width, height = self.lores_resolution
+        self._free_lores_buffers = deque(np.empty((height, width, 3), dtype=np.uint8) for _ in range(self.buffer_count))
+        main_width, main_height = self.CAMERA_RESOLUTION
+        self._lores_scale = (main_width / width, main_height / height)
+
+    def frame_size(self):
+        return tuple(self.lores_resolution) if self.dual_stream else self.CAMERA_RESOLUTION
+
+    def read(self):
+        with self._lock:
+            if self.dual_stream:
+                return self._read_dual_stream()
+            image = self.picam.capture_array()
+            return Frame(image, index=self._next_index())
+
+    def _read_dual_stream(self):
+        """Holds the next request and converts its lores YUV plane into a free BGR buffer."""
+        from picamera2 import MappedArray
+
+        request = self.picam.capture_request()
+        lores = None
+        try:
+            timestamp = time.perf_counter()
+            lores = self._take_lores_buffer()
+            with MappedArray(request, "lores") as yuv:
+                cv2.cvtColor(yuv.array, cv2.COLOR_YUV420p2BGR, dst=lores)
+            return DualStreamFrame(
+                request, lores, self._lores_scale, timestamp, self._next_index(),
+                on_release=self._free_lores_buffers.append,
+            )
+        except Exception:
+            if lores is not None:
+                self._free_lores_buffers.append(lores)
+            request.release()
+            raise
+
+    def _take_lores_buffer(self):
+        try:
+            return self._free_lores_buffers.popleft()
+        except IndexError:
+            # Mas frames retenidos que buffers de camara: no deberia pasar, pero nunca pisar uno en uso
+            width, height = self.lores_resolution
+            self.logger.warning("All lores buffers are held by unreleased frames, allocating another one")
+            return np.empty((height, width, 3), dtype=np.uint8)
+
+    def stop(self):
+        try:
+            self.picam.stop()
+            self.picam.close()
+        except Exception as e:
+            self.logger.debug(f"Unable to stop camera: {e}")
+
+
+class VideoFileFrameSource(FrameSource):
+    """Recorded video file, delivered as fast as possible or paced at its original frame rate."""
+
+    def __init__(self, path, pacing=PACING_FAST, loop=False):
+        super().__init__()
+        self.path = path
+        self.pacing = pacing
+        self.loop = loop
+        self.capture = None
+        self._started_at = None
+
+    def start(self):
+        if not self.path or not os.path.exists(self.path):
+            raise FileNotFoundError(f"Video file not found: {self.path}")
+        self.capture = cv2.VideoCapture(self.path)
+        if not self.capture.isOpened():
+            raise IOError(f"Unable to open video file: {self.path}")
+        self.logger.info(f"Video source opened: {self.path} ({self.capture.get(cv2.CAP_PROP_FPS):.1f} fps, {self.pacing})")
+        return self
+
+    def read(self):
+        ok, image = self.capture.read()
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self._started_at = None
+            ok, image = self.capture.read()
+        if not ok:
+            return None
+        if self.pacing == PACING_REALTIME:
+            self._pace(self.capture.get(cv2.CAP_PROP_POS_MSEC) / 1000)
+        return Frame(image, index=self._next_index())
+
+    def frame_size(self):
+        if self.capture is None:
+            return None
+        return int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    def _pace(self, position):
+        """Sleeps until the frame's presentation time relative to the first frame."""
+        now = time.perf_counter()
+        if self._started_at is None:
+            self._started_at = now - position
+            return
+        delay = self._started_at + position - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def stop(self):
+        if self.capture is not None:
+            self.capture.release()
+
+
+class StreamFrameSource(FrameSource):
+    """
+    RTSP/HTTP stream. A grabber thread keeps only the newest frame so a slow consumer
+    never reads stale frames out of the decoder buffer.
+    """
+    RECONNECT_DELAY = 2  # seconds
+    READ_TIMEOUT = 5  # seconds
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self.capture = None
+        self._condition = threading.Condition()
+        self._latest = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if not self.url:
+            raise ValueError("STREAM_URL is not configured")
+        self._running = True
+        self._thread = threading.Thread(target=self._grab_loop, name="stream-grabber", daemon=True)
+        self._thread.start()
+        return self
+
+    def _open(self):
+        capture = cv2.VideoCapture(self.url, cv2.CAP_FFMPEG)
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if not capture.isOpened():
+            raise IOError(f"Unable to open stream: {self.url}")
+        self.logger.info(f"Stream source connected: {self.url}")
+        return capture
+
+    def _grab_loop(self):
+        while self._running:
+            try:
+                if self.capture is None:
+                    self.capture = self._open()
+                ok, image = self.capture.read()
+                if not ok:
+                    raise IOError("stream read failed")
+                frame = Frame(image, index=self._next_index())
+                with self._condition:
+                    self._latest = frame
+                    self._condition.notify_all()
+            except Exception as e:
+                self.logger.warning(f"Stream error, reconnecting in {self.RECONNECT_DELAY} s: {e}")
+                if self.capture is not None:
+                    self.capture.release()
+                    self.capture = None
+                time.sleep(self.RECONNECT_DELAY)
+
+    def frame_size(self):
+        """Size of the newest frame, waiting up to READ_TIMEOUT for the first one (it is not consumed)."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._latest is not None or not self._running, self.READ_TIMEOUT)
+            if self._latest is None:
+                return None
+            height, width = self._latest.image.shape[:2]
+            return width, height
+
+    def read(self):
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._latest is not None or not self._running, self.READ_TIMEOUT):
+                self.logger.error("Timed out waiting for a stream frame")
+                return None
+            frame, self._latest = self._latest, None
+            return frame
+
+    def stop(self):
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=self.RECONNECT_DELAY + 1)
+        if self.capture is not None:
+            self.capture.release()
+
+
+class ImageDirectoryFrameSource(FrameSource):
+    """Images of a folder in name order, either as fast as possible or paced at a fixed fps."""
+    EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+    def __init__(self, path, pacing=PACING_FAST, fps=10, loop=False):
+        super().__init__()
+        self.path = path
+        self.pacing = pacing
+        self.fps = fps
+        self.loop = loop
+        self.files = []
+        self._position = 0
+        self._last_read_at = None
+
+    def start(self):
+        if not self.path or not os.path.isdir(self.path):
+            raise FileNotFoundError(f"Image directory not found: {self.path}")
+        self.files = sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.lower().endswith(self.EXTENSIONS)
+        )
+        self.logger.info(f"Image source opened: {self.path} ({len(self.files)} images, {self.pacing})")
+        return self
+
+    def frame_size(self):
+        """Size of the first readable image."""
+        for path in self.files:
+            image = cv2.imread(path)
+            if image is not None:
+                height, width = image.shape[:2]
+                return width, height
+        return None
+
+    def read(self):
+        while True:
+            if self._position >= len(self.files):
+                if not self.loop or not self.files:
+                    return None
+                self._position = 0
+            path = self.files[self._position]
+            self._position += 1
+            image = cv2.imread(path)
+            if image is not None:
+                break
+            self.logger.warning(f"Skipping unreadable image: {path}")
+
+        if self.pacing == PACING_REALTIME and self._last_read_at is not None:
+            delay = self._last_read_at + 1 / self.fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self._last_read_at = time.perf_counter()
+        return Frame(image, index=self._next_index())
+
+
+def create_frame_source(source_type=None, path=None, url=None, camera_num=0):
+    """
+    Builds the frame source selected by SOURCE_TYPE (CAMERA, VIDEO, STREAM or IMAGES).
+    path/url/camera_num override VIDEO_PATH, IMAGE_DIR and STREAM_URL, e.g. per lane.
+    """
+    source_type = (source_type or Config.SOURCE_TYPE).upper()
+    if source_type == "CAMERA":
+        return CameraFrameSource(camera_num=camera_num)
+    if source_type == "VIDEO":
+        return VideoFileFrameSource(path or Config.VIDEO_PATH, Config.SOURCE_PACING, Config.SOURCE_LOOP)
+    if source_type == "STREAM":
+        return StreamFrameSource(url or Config.STREAM_URL)
+    if source_type == "IMAGES":
+        return ImageDirectoryFrameSource(path or Config.IMAGE_DIR, Config.SOURCE_PACING, Config.SOURCE_FPS, Config.SOURCE_LOOP)
+    raise ValueError(f"Unknown SOURCE_TYPE: {source_type}")
@@ -4,8 +4,9 @@ import threading
 import time
 
 class GPIOController:
-    def __init__(self):
+    def __init__(self, pins=None):
         self.logger = logging.getLogger(__name__)
+        self.pins = Config.GPIO_PINS if pins is None else pins  # cada pista puede tener sus propios pines
         self._blink_threads = {}  # Hilos para parpadeo
         self._stop_events = {}    # Eventos para detener parpadeos
         self.mock_gpio = False
@@ -18,7 +19,7 @@ class GPIOController:
                 import RPi.GPIO as GPIO
                 self.GPIO = GPIO
                 self.GPIO.setmode(self.GPIO.BCM)
-                for pin in Config.GPIO_PINS.values():
+                for pin in self.pins.values():
                     self.GPIO.setup(pin, self.GPIO.OUT)
                     self.GPIO.output(pin, self.GPIO.LOW)
                 self.logger.info("GPIO initialized successfully")
@@ -31,19 +32,19 @@ class GPIOController:
 
         # Inicializar estados simulados
         if self.mock_gpio:
-            for led_type, pin in Config.GPIO_PINS.items():
+            for led_type, pin in self.pins.items():
                 self._mock_states[pin] = False  # Todos los LEDs comienzan apagados
 
         # Configurar el pin del sensor de movimiento
         
-        self.MOTION_SENSOR_PIN = Config.GPIO_PINS.get("motion_sensor")
-        if not self.MOTION_SENSOR_PIN:
-            raise ValueError("Motion sensor pin is not configured in GPIO_PINS.")
+        self.MOTION_SENSOR_PIN = self.pins.get("motion_sensor")
         if not self.mock_gpio:
+            if not self.MOTION_SENSOR_PIN:
+                raise ValueError("Motion sensor pin is not configured in GPIO_PINS.")
             self.GPIO.setup(self.MOTION_SENSOR_PIN, self.GPIO.IN, pull_up_down=self.GPIO.PUD_DOWN)
 
     def led_on(self, led_type):
-        pin = Config.GPIO_PINS.get(led_type)
+        pin = self.pins.get(led_type)
         if not pin:
             self.logger.error(f"Invalid LED type: {led_type}")
             return
@@ -61,7 +62,7 @@ class GPIOController:
 
 
     def led_off(self, led_type):
-        pin = Config.GPIO_PINS.get(led_type)
+        pin = self.pins.get(led_type)
         if not pin:
             self.logger.error(f"Invalid LED type: {led_type}")
             return
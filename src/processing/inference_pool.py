@@ -0,0 +1,306 @@
+import time
+import queue
+import logging
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+import numpy as np
+from src.config import Config
+from src.metrics import metrics
+from src.processing.detection_engine import PlateCandidate
+from src.processing.frame_sources import Frame, create_frame_source
+from src.processing.inference_settings import resolve_inference_settings
+
+
+class SharedFrameSlots:
+    """
+    Fixed number of frame-sized slots in one shared memory block. The parent copies each
+    frame into a free slot and the worker reads it in place, so no image is pickled.
+    """
+
+    def __init__(self, slots, max_frame_size):
+        width, height = max_frame_size
+        self.slot_bytes = width * height * 3
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * self.slot_bytes)
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def acquire(self, timeout=None):
+        """Index of a free slot; raises queue.Empty if none frees up within timeout."""
+        return self._free.get(timeout=timeout)
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def write(self, slot, image):
+        """Copies image into the slot, returns the (shape, dtype) the worker needs to view it."""
+        image = np.ascontiguousarray(image)
+        if image.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame {image.shape} does not fit a {self.slot_bytes} byte slot (INFERENCE_MAX_FRAME_SIZE)")
+        view = np.ndarray(image.shape, dtype=image.dtype, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+        view[...] = image
+        return image.shape, image.dtype.str
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _inference_worker(index, current, shm_name, slot_bytes, settings, frame_size, tasks, results):
+    """
+    Worker process: loads and warms up its own models (at the parent source's frame_size),
+    then answers (task_id, slot, shape, dtype)
+    tasks with the frame's ALPRResults. None stops the worker. A startup failure is reported
+    as the worker's ready message so the parent does not wait for it. current[index] holds
+    the task being analysed (-1 when idle), so the parent knows which slot a dead worker held.
+    """
+    from src.processing.detection_engine import DetectionEngine
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        try:
+            engine = DetectionEngine(default_source=False, inference_settings=settings, frame_size=frame_size)
+        except Exception as e:
+            results.put(("ready", None, repr(e)))
+            return
+        results.put(("ready", None, None))
+        for task in iter(tasks.get, None):
+            task_id, slot, shape, dtype = task
+            current[index] = task_id
+            try:
+                image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=slot * slot_bytes)
+                started_at = time.perf_counter()
+                plates = engine.predict(Frame(image))
+                results.put((task_id, (plates, time.perf_counter() - started_at), None))
+            except Exception as e:
+                results.put((task_id, None, repr(e)))
+            current[index] = -1
+    finally:
+        shm.close()
+
+
+class ProcessPoolEngine:
+    """
+    DetectionEngine counterpart that runs the models in INFERENCE_PROCESSES worker processes,
+    away from the GIL shared with MQTT, APScheduler and GPIO polling.
+    Frames go through SharedFrameSlots and only the ALPRResults come back. Several frames
+    are only in flight at once when several threads call predict (pipeline workers).
+    Dual stream frames are analysed on their lores image, crops are not taken from main,
+    and the PlateTracker is not used since the detector runs in the workers.
+    A worker that dies is restarted (up to INFERENCE_MAX_WORKER_RESTARTS times, then the
+    engine is marked failed) and the frames in flight fail instead of waiting for the timeout.
+    """
+
+    def __init__(self, source=None, processes=None, slots=None, inference_settings=None):
+        self.logger = logging.getLogger(__name__)
+        started_at = time.perf_counter()
+
+        self.processes = processes or Config.INFERENCE_PROCESSES
+        self.inference_settings = inference_settings or resolve_inference_settings()
+        self.alpr = None  # los modelos viven en los procesos de inferencia
+        self.slots = SharedFrameSlots(slots or Config.INFERENCE_SLOTS or 2 * self.processes, Config.INFERENCE_MAX_FRAME_SIZE)
+        self._task_ids = itertools.count()
+        self._pending = {}
+        self._orphaned = {}  # task_id -> slot de pedidos abandonados, el slot vuelve con su respuesta
+        self._pending_lock = threading.Lock()
+        self._restarts = 0
+        self._failed = None
+        # La fuente arranca primero para que los workers calienten los modelos con su tamano de frame
+        self.source = (source or create_frame_source()).start()
+        frame_size = self.source.frame_size()
+
+        self._context = multiprocessing.get_context(Config.INFERENCE_START_METHOD)
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        self._current = self._context.RawArray("q", [-1] * self.processes)
+        self._worker_args = (self.slots.name, self.slots.slot_bytes, self.inference_settings, frame_size, self._tasks, self._results)
+        self._workers = [self._start_worker(index) for index in range(self.processes)]
+        try:
+            self._wait_until_ready()
+        except Exception:
+            self._stop_workers()
+            self.slots.close()
+            self.source.stop()
+            raise
+
+        self._running = True
+        self._collector = threading.Thread(target=self._collect_results, name="inference-results", daemon=True)
+        self._collector.start()
+
+        self.cold_start_seconds = time.perf_counter() - started_at
+        metrics.observe("engine.cold_start", self.cold_start_seconds)
+        self.logger.info(f"Inference pool ready: {self.processes} processes, cold start {self.cold_start_seconds * 1000:.0f} ms")
+
+    def _start_worker(self, index):
+        self._current[index] = -1
+        worker = self._context.Process(
+            target=_inference_worker,
+            args=(index, self._current) + self._worker_args,
+            name=f"inference-{index}",
+            daemon=True,
+        )
+        worker.start()
+        return worker
+
+    def _wait_until_ready(self, timeout=None):
+        """
+        Blocks until every worker has loaded and warmed up its models. Raises RuntimeError if
+        a worker reports a startup error, exits without reporting or misses the timeout.
+        """
+        timeout = Config.INFERENCE_READY_TIMEOUT_S if timeout is None else timeout
+        give_up_at = time.monotonic() + timeout
+        ready = 0
+        while ready < len(self._workers):
+            try:
+                _, _, error = self._results.get(timeout=1)
+            except queue.Empty:
+                # Un worker listo no termina hasta el shutdown: si alguno murio, fallo al arrancar
+                dead = [f"{worker.name} (exit code {worker.exitcode})" for worker in self._workers if not worker.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Inference workers exited during startup: {dead}")
+                if time.monotonic() > give_up_at:
+                    raise RuntimeError(f"Inference workers not ready after {timeout:.0f} s ({ready}/{len(self._workers)} ready)")
+                continue
+            if error is not None:
+                raise RuntimeError(f"Inference worker failed to start: {error}")
+            ready += 1
+
+    def _collect_results(self):
+        check_at = time.monotonic() + 1
+        while self._running:
+            try:
+                task_id, value, error = self._results.get(timeout=1)
+            except queue.Empty:
+                task_id = None
+            if time.monotonic() >= check_at:
+                check_at = time.monotonic() + 1
+                self._check_workers()
+            if task_id is None:
+                continue
+            if task_id == "ready":  # un worker reiniciado
+                if error is not None:
+                    self.logger.error(f"Restarted inference worker failed to start: {error}")
+                continue
+            with self._pending_lock:
+                slot, future = self._pending.pop(task_id, (None, None))
+                if future is None:
+                    slot = self._orphaned.pop(task_id, None)
+            if slot is not None:
+                self.slots.release(slot)
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(RuntimeError(f"Inference worker error: {error}"))
+            else:
+                plates, elapsed = value
+                metrics.observe("inference_pool.worker", elapsed)
+                future.set_result(plates)
+
+    def _check_workers(self):
+        """
+        Fails the frames in flight when a worker died and restarts it. The slot the dead worker
+        was reading goes back to the pool right away, the other abandoned slots come back with
+        the late answer of the worker that still has them.
+        """
+        dead = [index for index, worker in enumerate(self._workers) if not worker.is_alive()]
+        if not dead or not self._running:
+            return
+        names = [f"{self._workers[index].name} (exit code {self._workers[index].exitcode})" for index in dead]
+        self.logger.error(f"Inference workers died: {names}")
+        metrics.increment("inference_pool.worker_deaths", len(dead))
+        self._fail_pending(RuntimeError(f"Inference workers died: {names}"))
+
+        with self._pending_lock:
+            lost = [self._orphaned.pop(self._current[index], None) for index in dead]
+        for slot in lost:
+            if slot is not None:
+                self.slots.release(slot)
+
+        if self._restarts + len(dead) > Config.INFERENCE_MAX_WORKER_RESTARTS:
+            self._failed = f"Inference pool failed: workers died more than {Config.INFERENCE_MAX_WORKER_RESTARTS} times"
+            self.logger.error(self._failed)
+            self._running = False
+            return
+        for index in dead:
+            self._restarts += 1
+            self.logger.warning(f"Restarting {self._workers[index].name} ({self._restarts}/{Config.INFERENCE_MAX_WORKER_RESTARTS})")
+            self._workers[index] = self._start_worker(index)
+
+    def _fail_pending(self, error):
+        """Fails every frame in flight, their slots wait in _orphaned until their answer arrives."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            for task_id, (slot, _) in pending.items():
+                self._orphaned[task_id] = slot
+        for _, future in pending.values():
+            future.set_exception(error)
+
+    def capture_frame(self):
+        return self.source.read()
+
+    def predict(self, frame, tracker=None):
+        """Copies the frame into a shared slot, releases it and waits for a worker's results."""
+        timeout = Config.INFERENCE_TASK_TIMEOUT_S
+        if self._failed is not None:
+            frame.release()
+            raise RuntimeError(self._failed)
+        try:
+            with metrics.timer("inference_pool.slot_wait"):
+                slot = self.slots.acquire(timeout=timeout)
+            try:
+                shape, dtype = self.slots.write(slot, frame.image)
+            except Exception:
+                self.slots.release(slot)
+                raise
+        finally:
+            frame.release()
+
+        future = Future()
+        task_id = next(self._task_ids)
+        with self._pending_lock:
+            self._pending[task_id] = (slot, future)
+        self._tasks.put((task_id, slot, shape, dtype))
+        try:
+            with metrics.timer("inference_pool.round_trip"):
+                return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Un worker todavia puede estar leyendo el slot: vuelve al pool con su respuesta
+            with self._pending_lock:
+                if self._pending.pop(task_id, None) is not None:
+                    self._orphaned[task_id] = slot
+            metrics.increment("inference_pool.timeouts")
+            raise
+
+    def detect(self, frame, tracker=None):
+        """Workers run detection and OCR together, the candidates already carry their read."""
+        return [PlateCandidate(result.detection, None, result.ocr) for result in self.predict(frame)]
+
+    def read_plates(self, candidates):
+        return self.read_plates_batch([candidates])[0]
+
+    def read_plates_batch(self, candidate_groups):
+        return [[candidate.to_result() for candidate in group] for group in candidate_groups]
+
+    def shutdown(self):
+        """Stops the source and the workers and frees the shared memory."""
+        self.source.stop()
+        self._running = False
+        self._collector.join(timeout=2)  # antes de parar los workers, para que no los reinicie
+        self._stop_workers()
+        self._fail_pending(RuntimeError("Inference pool shut down"))
+        self.slots.close()
+
+    def _stop_workers(self):
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
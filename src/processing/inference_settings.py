@@ -0,0 +1,138 @@
+import os
+import logging
+import onnxruntime as ort
+from fast_alpr import ALPR
+from fast_alpr.default_detector import DefaultDetector
+from open_image_models.detection.core.yolo_v9.inference import YoloV9ObjectDetector
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("detector", "ocr")
+
+# Ajustes por etapa y como se leen desde el entorno ({STAGE}_{KEY}, ej. DETECTOR_INTRA_OP_THREADS)
+SETTING_TYPES = {
+    "model": str,
+    "model_path": str,
+    "config_path": str,  # solo OCR, acompana a model_path
+    "intra_op_threads": int,
+    "inter_op_threads": int,
+    "graph_optimization": str,  # DISABLE, BASIC, EXTENDED o ALL
+    "execution_mode": str,  # SEQUENTIAL o PARALLEL
+    "cpu_mem_arena": bool,
+    "mem_pattern": bool,
+    "arena_extend_strategy": str,  # kNextPowerOfTwo o kSameAsRequested
+}
+
+DEFAULTS = {
+    "detector": {"model": "yolo-v9-t-384-license-plate-end2end"},
+    "ocr": {"model": "global-plates-mobile-vit-v2-model"},
+}
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "DISABLE": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "BASIC": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "EXTENDED": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "ALL": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+EXECUTION_MODES = {
+    "SEQUENTIAL": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "PARALLEL": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+
+def _parse(key, value):
+    if SETTING_TYPES[key] is bool:
+        return str(value).lower() in ("1", "true", "yes")
+    return SETTING_TYPES[key](value)
+
+
+def resolve_inference_settings(profile=None):
+    """
+    Settings for the detector and OCR sessions: library defaults, overlaid with the
+    selected INFERENCE_PROFILE and then with {STAGE}_{KEY} environment variables.
+    """
+    profile = (profile or Config.INFERENCE_PROFILE).upper()
+    if profile not in Config.INFERENCE_PROFILES:
+        raise ValueError(f"Unknown inference profile: {profile}")
+
+    settings = {"profile": profile}
+    for stage in STAGES:
+        stage_settings = dict(DEFAULTS[stage])
+        stage_settings.update(Config.INFERENCE_PROFILES[profile].get(stage, {}))
+        for key in SETTING_TYPES:
+            value = os.getenv(f"{stage.upper()}_{key.upper()}")
+            if value not in (None, ""):
+                stage_settings[key] = _parse(key, value)
+        settings[stage] = stage_settings
+    return settings
+
+
+def build_session_options(stage_settings):
+    """ONNX Runtime SessionOptions for one stage, None when nothing is customised."""
+    keys = ("intra_op_threads", "inter_op_threads", "graph_optimization", "execution_mode", "cpu_mem_arena", "mem_pattern")
+    if not any(key in stage_settings for key in keys):
+        return None
+
+    options = ort.SessionOptions()
+    if "intra_op_threads" in stage_settings:
+        options.intra_op_num_threads = stage_settings["intra_op_threads"]
+    if "inter_op_threads" in stage_settings:
+        options.inter_op_num_threads = stage_settings["inter_op_threads"]
+    if "graph_optimization" in stage_settings:
+        options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[stage_settings["graph_optimization"].upper()]
+    if "execution_mode" in stage_settings:
+        options.execution_mode = EXECUTION_MODES[stage_settings["execution_mode"].upper()]
+    if "cpu_mem_arena" in stage_settings:
+        options.enable_cpu_mem_arena = stage_settings["cpu_mem_arena"]
+    if "mem_pattern" in stage_settings:
+        options.enable_mem_pattern = stage_settings["mem_pattern"]
+    return options
+
+
+def build_providers(stage_settings):
+    """CPU provider with arena options, or None to let the library pick the defaults."""
+    if "arena_extend_strategy" not in stage_settings:
+        return None
+    return [("CPUExecutionProvider", {"arena_extend_strategy": stage_settings["arena_extend_strategy"]})]
+
+
+class ModelFileDetector(DefaultDetector):
+    """DefaultDetector loading a local YOLOv9 ONNX file, e.g. an INT8-quantized export."""
+
+    def __init__(self, model_path, conf_thresh=0.4, providers=None, sess_options=None):
+        self.detector = YoloV9ObjectDetector(
+            model_path=model_path,
+            class_labels=["License Plate"],
+            conf_thresh=conf_thresh,
+            providers=providers,
+            sess_options=sess_options,
+        )
+
+
+def create_alpr(settings):
+    """Builds the ALPR models for the resolved settings."""
+    detector_settings, ocr_settings = settings["detector"], settings["ocr"]
+    detector = None
+    if detector_settings.get("model_path"):
+        detector = ModelFileDetector(
+            detector_settings["model_path"],
+            providers=build_providers(detector_settings),
+            sess_options=build_session_options(detector_settings),
+        )
+
+    ocr_model_path = ocr_settings.get("model_path")
+    alpr = ALPR(
+        detector=detector,
+        detector_model=detector_settings["model"],
+        detector_providers=build_providers(detector_settings),
+        detector_sess_options=build_session_options(detector_settings),
+        ocr_model=None if ocr_model_path else ocr_settings["model"],
+        ocr_providers=build_providers(ocr_settings),
+        ocr_sess_options=build_session_options(ocr_settings),
+        ocr_model_path=ocr_model_path,
+        ocr_config_path=ocr_settings.get("config_path") if ocr_model_path else None,
+    )
+    logger.info(f"Inference profile {settings['profile']}: detector {detector_settings}, ocr {ocr_settings}")
+    return alpr
@@ -0,0 +1,229 @@
+import json
+import time
+import logging
+import threading
+from collections import deque
+from src.config import Config
+from src.metrics import metrics
+from src.processing.frame_sources import create_frame_source
+
+
+class Lane:
+    """
+    One gate lane: its own frame source, motion input/LEDs (GPIO pins), ROI and control point.
+    Lanes are read from the JSON file in LANES_CONFIG:
+
+        {"lanes": [
+            {"name": "entry", "source": {"type": "CAMERA", "camera_num": 0},
+             "gpio_pins": {"processing": 18, "access_granted": 23, "access_denied": 24, "motion_sensor": 17},
+             "roi": "0.1,0.3;0.9,0.3;0.9,1;0.1,1", "poc_id": "..."},
+            {"name": "exit", "source": {"type": "STREAM", "url": "rtsp://..."}, ...}
+        ]}
+    """
+
+    def __init__(self, name, source=None, gpio_pins=None, roi=None, poc_id=None):
+        self.name = name
+        self.source = source or {}
+        self.gpio_pins = gpio_pins
+        self.roi = roi
+        self.poc_id = poc_id
+
+    def create_source(self):
+        return create_frame_source(
+            self.source.get("type"),
+            path=self.source.get("path"),
+            url=self.source.get("url"),
+            camera_num=self.source.get("camera_num", 0),
+        )
+
+
+def load_lanes(path=None):
+    """Lanes defined in LANES_CONFIG, or an empty list when the process serves a single lane."""
+    path = path or Config.LANES_CONFIG
+    if not path:
+        return []
+    with open(path) as config_file:
+        lanes = [Lane(**lane) for lane in json.load(config_file)["lanes"]]
+    names = [lane.name for lane in lanes]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicated lane names in {path}: {names}")
+    return lanes
+
+
+def jain_fairness(values):
+    """Jain's index: 1.0 when every lane gets the same value, 1/n when a single lane gets it all."""
+    values = [value for value in values if value is not None]
+    if not values or not any(values):
+        return 1.0
+    return sum(values) ** 2 / (len(values) * sum(value * value for value in values))
+
+
+class _LaneRequest:
+    """A frame waiting for its turn on the shared models."""
+
+    def __init__(self, frame, read_plates, tracker=None):
+        self.frame = frame
+        self.read_plates = read_plates  # False = solo deteccion (pipeline con OCR por etapas)
+        self.tracker = tracker
+        self.submitted_at = time.perf_counter()
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class LaneScheduler:
+    """
+    Shares one DetectionEngine between lanes.
+    Every cycle the scheduler takes the oldest frame of each waiting lane, starting from
+    a rotating lane so no lane is always served first, runs detection on each and a
+    single batched OCR call over all their plate crops. Lanes rarely queue more than one
+    frame since their detectors wait for the answer.
+    """
+
+    def __init__(self, engine):
+        self.logger = logging.getLogger(__name__)
+        self.engine = engine
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._lanes = []
+        self._next_lane = 0
+        self._running = False
+        self._thread = None
+        self.cycles = 0
+
+    def register(self, name):
+        with self._condition:
+            if name not in self._lanes:
+                self._lanes.append(name)
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="lane-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the scheduler; frames still waiting fail so their lanes do not block forever."""
+        with self._condition:
+            self._running = False
+            waiting = [request for requests in self._pending.values() for request in requests]
+            self._pending.clear()
+            self._condition.notify_all()
+        for request in waiting:
+            request.frame.release()
+            request.error = RuntimeError("Lane scheduler stopped")
+            request.done.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def submit(self, name, frame, read_plates=True, tracker=None):
+        """Queues the lane's frame and blocks until it has been analysed."""
+        request = _LaneRequest(frame, read_plates, tracker)
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("Lane scheduler is not running")
+            if name not in self._lanes:
+                self._lanes.append(name)
+            self._pending.setdefault(name, deque()).append(request)
+            self._condition.notify_all()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _next_batch(self):
+        """Waits for pending frames and takes them in round-robin order."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending or not self._running)
+            if not self._running:
+                return []
+            order = self._lanes[self._next_lane:] + self._lanes[:self._next_lane]
+            self._next_lane = (self._next_lane + 1) % len(self._lanes)
+            batch = []
+            for name in order:
+                requests = self._pending.get(name)
+                if requests:
+                    batch.append((name, requests.popleft()))
+                    if not requests:
+                        del self._pending[name]
+            return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self._serve(batch)
+            except Exception as e:
+                self.logger.error(f"Error serving lanes {[name for name, _ in batch]}: {e}")
+                for _, request in batch:
+                    if not request.done.is_set():
+                        request.error = e
+                        request.done.set()
+
+    def _serve(self, batch):
+        candidates = {}
+        for name, request in batch:
+            candidates[name] = self.engine.detect(request.frame, request.tracker)
+
+        ocr_lanes = [name for name, request in batch if request.read_plates]
+        if ocr_lanes:
+            results = self.engine.read_plates_batch([candidates[name] for name in ocr_lanes])
+            for name, lane_results in zip(ocr_lanes, results):
+                candidates[name] = lane_results
+
+        self.cycles += 1
+        metrics.increment("lanes.cycles")
+        finished_at = time.perf_counter()
+        for name, request in batch:
+            metrics.observe(f"lane.{name}.latency", finished_at - request.submitted_at)
+            metrics.increment(f"lane.{name}.served")
+            request.result = candidates[name]
+            request.done.set()
+
+    def stats(self):
+        """Per-lane served frames and latency, plus Jain's fairness index over the p95 latencies."""
+        lanes = {
+            name: {"served": metrics.counter(f"lane.{name}.served"), "latency": metrics.timing(f"lane.{name}.latency")}
+            for name in self._lanes
+        }
+        p95 = [lane["latency"]["p95_ms"] if lane["latency"] else None for lane in lanes.values()]
+        fairness = jain_fairness(p95)
+        metrics.set_gauge("lanes.fairness", fairness)
+        return {"cycles": self.cycles, "fairness": fairness, "lanes": lanes}
+
+
+class LaneEngine:
+    """
+    Engine seen by one lane's PlateDetector: frames come from the lane's own source and
+    inference goes through the shared LaneScheduler.
+    """
+
+    def __init__(self, lane, scheduler, source=None):
+        self.lane = lane
+        self.scheduler = scheduler
+        self.shared = scheduler.engine
+        self.alpr = self.shared.alpr
+        self.cold_start_seconds = self.shared.cold_start_seconds
+        self.source = (source or lane.create_source()).start()
+        self.shared.warm_up(self.source.frame_size())
+        scheduler.register(lane.name)
+
+    def capture_frame(self):
+        return self.source.read()
+
+    def predict(self, frame, tracker=None):
+        return self.scheduler.submit(self.lane.name, frame, tracker=tracker)
+
+    def detect(self, frame, tracker=None):
+        return self.scheduler.submit(self.lane.name, frame, read_plates=False, tracker=tracker)
+
+    def read_plates(self, candidates):
+        return self.shared.read_plates(candidates)
+
+    def read_plates_batch(self, candidate_groups):
+        return self.shared.read_plates_batch(candidate_groups)
+
+    def shutdown(self):
+        self.source.stop()
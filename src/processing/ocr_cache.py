@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+from src.config import Config
+from src.metrics import metrics
+
+
+def crop_hash(crop, width=32, height=8, margin=4):
+    """
+    Difference hash of a grayscale plate crop: the crop is normalized to width+1 x height
+    and each pixel gets two bits, brighter / darker than its right neighbour by more than
+    margin, so sensor noise on flat areas does not flip bits.
+    """
+    small = cv2.resize(crop, (width + 1, height), interpolation=cv2.INTER_AREA).astype(np.int16)
+    delta = small[:, 1:] - small[:, :-1]
+    bits = np.concatenate([delta > margin, delta < -margin])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class OcrCache:
+    """
+    LRU of OCR reads keyed by the tracked vehicle and the perceptual hash of its plate crop.
+    A crop whose hash is within max_distance bits of a cached crop of the same track is
+    considered the same plate image and gets the cached OcrResult instead of another model
+    call. Entries never match across tracks: crops of two plates differing in one glyph
+    can hash only 3 bits apart, closer than sensor noise on the same plate, so the hash
+    alone cannot tell two vehicles apart.
+    """
+
+    def __init__(self, max_entries=256, max_distance=4):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._entries = OrderedDict()  # (track, hash) -> OcrResult
+        self._lock = threading.Lock()
+        self._cost_per_crop = 0.0  # segundos, promedio movil del OCR por recorte
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, track, crop_key):
+        """Cached OcrResult of the track for the crop hash, or None."""
+        with self._lock:
+            key = (track, crop_key)
+            if key not in self._entries:
+                key = self._nearest(track, crop_key)
+            if key is None:
+                self.misses += 1
+                metrics.increment("ocr_cache.misses")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.increment("ocr_cache.hits")
+            metrics.increment("ocr_cache.saved_ms", self._cost_per_crop * 1000)
+            return self._entries[key]
+
+    def _nearest(self, track, crop_key):
+        if not self.max_distance:
+            return None
+        best, best_distance = None, self.max_distance + 1
+        for key in self._entries:
+            if key[0] != track:
+                continue
+            distance = hamming(key[1], crop_key)
+            if distance < best_distance:
+                best, best_distance = key, distance
+        return best
+
+    def put(self, track, crop_key, ocr):
+        with self._lock:
+            key = (track, crop_key)
+            self._entries[key] = ocr
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_cost(self, seconds, crops):
+        """Feeds the OCR time of a model call, used to estimate the time saved by each hit."""
+        per_crop = seconds / crops
+        with self._lock:
+            self._cost_per_crop = per_crop if not self._cost_per_crop else 0.9 * self._cost_per_crop + 0.1 * per_crop
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def create_ocr_cache():
+    """OcrCache from the OCR_CACHE_* settings, None when disabled."""
+    if not Config.OCR_CACHE_ENABLED:
+        return None
+    return OcrCache(Config.OCR_CACHE_SIZE, Config.OCR_CACHE_MAX_DISTANCE)
@@ -0,0 +1,40 @@
+from collections import Counter, deque
+
+
+class PlateConsensus:
+    """
+    Sliding window over the last N analysed frames.
+    A plate is confirmed once it has been read in at least K of those frames.
+    """
+
+    def __init__(self, required_reads, window_size):
+        if required_reads < 1 or window_size < required_reads:
+            raise ValueError("Consensus requires 1 <= K <= N")
+        self.required_reads = required_reads
+        self.window_size = window_size
+        self._window = deque(maxlen=window_size)
+        self._counts = Counter()
+        self.confirmed = None
+
+    def add_frame(self, plates):
+        """
+        Registers the valid (normalized) plates read in one frame, an empty iterable
+        counts as a frame without reads. Returns the confirmed plate, if any.
+        """
+        if self.confirmed is not None:
+            return self.confirmed
+
+        if len(self._window) == self.window_size:
+            self._counts.subtract(self._window[0])
+        frame_plates = frozenset(plates)
+        self._window.append(frame_plates)
+        self._counts.update(frame_plates)
+
+        for plate in frame_plates:
+            if self._counts[plate] >= self.required_reads:
+                self.confirmed = plate
+                break
+        return self.confirmed
+
+    def frames_seen(self):
+        return len(self._window)
@@ -0,0 +1,64 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from src.metrics import metrics
+
+
+class PlateCooldownCache:
+    """
+    In-memory cooldown per normalized plate.
+    The first decision for a plate opens a window of ttl seconds during which further
+    reads of the same vehicle are suppressed (and counted) instead of re-running the
+    access decision.
+    """
+
+    def __init__(self, ttl, max_entries=1024, clock=time.monotonic):
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # plate -> [expires_at, suppressed_hits]
+        self.suppressed = 0
+
+    def should_suppress(self, plate):
+        """
+        Returns True if a decision for this plate was taken less than ttl seconds ago.
+        Otherwise opens a new cooldown window for the plate and returns False.
+        """
+        now = self._clock()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._entries.get(plate)
+            if entry is not None:
+                entry[1] += 1
+                self.suppressed += 1
+                metrics.increment("decision.cooldown_suppressed")
+                return True
+
+            self._entries[plate] = [now + self.ttl, 0]
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return False
+
+    def _evict_expired(self, now):
+        # Las entradas se insertan en orden de expiracion, basta revisar desde el inicio
+        while self._entries:
+            plate, (expires_at, hits) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[plate]
+            if hits:
+                self.logger.debug(f"Cooldown for {plate} expired, {hits} repeated reads suppressed")
+
+    def clear(self, plate=None):
+        with self._lock:
+            if plate is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(plate, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
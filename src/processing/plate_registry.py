@@ -0,0 +1,177 @@
+import logging
+import threading
+from collections import Counter
+from src.config import Config
+from src.metrics import metrics
+from src.processing.plates import normalize_plate
+
+# Caracteres que el OCR confunde entre si; sustituir uno por otro del mismo grupo cuesta menos
+CONFUSABLE_GROUPS = ("O0DQ", "I1LJ", "B8", "S5", "Z2", "G6", "A4", "T7")
+CONFUSABLE_COST = 0.5
+
+_SUBSTITUTION_COSTS = {
+    (a, b): CONFUSABLE_COST for group in CONFUSABLE_GROUPS for a in group for b in group if a != b
+}
+
+
+def plate_distance(a, b):
+    """
+    Levenshtein distance where substituting OCR-confusable characters (O/0, I/1, B/8...)
+    costs CONFUSABLE_COST instead of 1. Still a metric, so it can back a BK-tree.
+    """
+    if a == b:
+        return 0.0
+    previous = [float(j) for j in range(len(b) + 1)]
+    for i, char_a in enumerate(a, 1):
+        current = [float(i)]
+        for j, char_b in enumerate(b, 1):
+            substitution = 0.0 if char_a == char_b else _SUBSTITUTION_COSTS.get((char_a, char_b), 1.0)
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + substitution))
+        previous = current
+    return previous[-1]
+
+
+class _Node:
+    __slots__ = ("plate", "children")
+
+    def __init__(self, plate):
+        self.plate = plate
+        self.children = {}  # distancia -> _Node
+
+
+class PlateRegistry:
+    """
+    In-memory BK-tree over the registered plates, used to map a noisy OCR read to the
+    vehicle it most likely belongs to. Removed plates are tombstoned and the tree is
+    rebuilt once they outnumber the live ones.
+    """
+
+    def __init__(self, plates=()):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._root = None
+        self._plates = set()
+        self._removed = set()
+        self._holders = Counter()  # plate -> filas de vehicles que la tienen, segun la ultima sincronizacion
+        for plate in plates:
+            self.add(plate)
+
+    def __contains__(self, plate):
+        return plate in self._plates
+
+    def __len__(self):
+        return len(self._plates)
+
+    def add(self, plate):
+        with self._lock:
+            if plate in self._plates:
+                return
+            self._plates.add(plate)
+            if plate in self._removed:
+                self._removed.discard(plate)
+                return
+            if self._root is None:
+                self._root = _Node(plate)
+                return
+            node = self._root
+            while True:
+                distance = plate_distance(plate, node.plate)
+                child = node.children.get(distance)
+                if child is None:
+                    node.children[distance] = _Node(plate)
+                    return
+                node = child
+
+    def remove(self, plate):
+        with self._lock:
+            if plate not in self._plates:
+                return
+            self._plates.discard(plate)
+            self._removed.add(plate)
+            if len(self._removed) > len(self._plates):
+                self._rebuild()
+
+    def _rebuild(self):
+        plates = list(self._plates)
+        self._root, self._plates, self._removed = None, set(), set()
+        for plate in plates:
+            self.add(plate)
+
+    def candidates(self, read, max_distance=1.0, limit=3):
+        """Registered plates within max_distance of read as (plate, distance), closest first."""
+        matches = []
+        with self._lock:
+            pending = [self._root] if self._root is not None else []
+            while pending:
+                node = pending.pop()
+                distance = plate_distance(read, node.plate)
+                if distance <= max_distance and node.plate not in self._removed:
+                    matches.append((node.plate, distance))
+                for child_distance, child in node.children.items():
+                    if distance - max_distance <= child_distance <= distance + max_distance:
+                        pending.append(child)
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches[:limit]
+
+    def resolve(self, read, max_distance=1.0):
+        """
+        The registered plate read most likely stands for, or None when there is no plate
+        within max_distance or the closest ones are tied.
+        """
+        if read in self._plates:
+            return read
+        matches = self.candidates(read, max_distance, limit=2)
+        if not matches or (len(matches) == 2 and matches[0][1] == matches[1][1]):
+            return None
+        return matches[0][0]
+
+    def sync(self, vehicles):
+        """
+        Applies the current (vehicle id, plate) rows of the vehicles table: only new and
+        deleted plates touch the tree. A plate is counted per row, so it is only removed
+        once no vehicle holds it anymore.
+        """
+        current = Counter(normalize_plate(plate) for _, plate in vehicles if plate)
+        with self._lock:
+            added = removed = 0
+            for plate in self._holders:
+                if plate not in current:
+                    self.remove(plate)
+                    removed += 1
+            for plate in current:
+                if plate not in self._holders:
+                    self.add(plate)
+                    added += 1
+            self._holders = current
+        if added or removed:
+            self.logger.info(f"Plate registry synced: {added} added, {removed} removed, {len(self)} plates")
+        metrics.set_gauge("plate_registry.size", len(self))
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_plate_registry():
+    """Process-wide registry loaded from the vehicles table on first use, None when disabled."""
+    global _registry
+    if not Config.PLATE_REGISTRY_ENABLED:
+        return None
+    with _registry_lock:
+        if _registry is None:
+            _registry = PlateRegistry()
+            refresh_plate_registry(_registry)
+        return _registry
+
+
+def refresh_plate_registry(registry=None):
+    """Re-reads the vehicles table into the registry (after every vehicle sync)."""
+    from src.database.models import VehicleModel
+
+    registry = registry or _registry
+    if registry is None:
+        return
+    try:
+        registry.sync(VehicleModel().find_all_plates())
+    except Exception as e:
+        registry.logger.error(f"Unable to refresh plate registry: {e}")
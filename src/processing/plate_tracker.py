@@ -0,0 +1,167 @@
+import itertools
+import logging
+import threading
+from dataclasses import dataclass
+import cv2
+import numpy as np
+from fast_alpr.base import BoundingBox, DetectionResult
+from src.config import Config
+from src.metrics import metrics
+
+_tracker_ids = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class TrackedDetection(DetectionResult):
+    """DetectionResult plus the id of the track (vehicle) it belongs to."""
+    track_id: int = None
+
+
+def iou(a, b):
+    """Intersection over union of two BoundingBoxes."""
+    x1, y1 = max(a.x1, b.x1), max(a.y1, b.y1)
+    x2, y2 = min(a.x2, b.x2), min(a.y2, b.y2)
+    intersection = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a.x2 - a.x1) * (a.y2 - a.y1) + (b.x2 - b.x1) * (b.y2 - b.y1) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+class _Track:
+    def __init__(self, track_id, detection, points):
+        self.track_id = track_id
+        self.detection = detection
+        self.points = points  # esquinas dentro de la patente, seguidas con flujo optico
+
+    def to_detection(self):
+        return TrackedDetection(
+            self.detection.label, self.detection.confidence, self.detection.bounding_box, self.track_id
+        )
+
+
+class PlateTracker:
+    """
+    Follows the plates found by the detector between full detections.
+    The detector runs every `detect_every` frames, when there is nothing to follow, or
+    when optical flow loses the plate; in between each plate box is shifted by the median
+    Lucas-Kanade motion of the corners found inside it. Detections are matched to the
+    previous tracks by IoU so a vehicle keeps the same track id across the pass.
+    """
+    MAX_CORNERS = 40
+    FLOW_WINDOW = (15, 15)
+    MAX_FORWARD_BACKWARD_ERROR = 1.0  # pixels
+
+    def __init__(self, detect_every=5, min_iou=0.3, min_points=6):
+        self.logger = logging.getLogger(__name__)
+        self.detect_every = detect_every
+        self.min_iou = min_iou
+        self.min_points = min_points
+        self._lock = threading.Lock()
+        self.tracker_id = next(_tracker_ids)  # distingue las pistas de cada carril
+        self._next_id = 1
+        self.reset()
+
+    def reset(self):
+        """Forgets every track, called at the start of each detection pass."""
+        self._tracks = []
+        self._previous = None
+        self._since_detection = 0
+        self.detections = 0
+        self.tracked_frames = 0
+
+    def update(self, image, detect_fn):
+        """
+        Returns the TrackedDetections for image, calling detect_fn(image) only when a full
+        detection is due or tracking failed.
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        with self._lock:
+            tracked = None
+            if self._tracks and self._previous is not None and self._since_detection < self.detect_every - 1:
+                tracked = self._propagate(gray)
+            if tracked is None:
+                tracked = self._detect(image, gray, detect_fn)
+            else:
+                self._since_detection += 1
+                self.tracked_frames += 1
+                metrics.increment("tracker.tracked_frames")
+            self._previous = gray
+            return tracked
+
+    def _detect(self, image, gray, detect_fn):
+        detections = detect_fn(image)
+        self._since_detection = 0
+        self.detections += 1
+        metrics.increment("tracker.detections")
+
+        unmatched = list(self._tracks)
+        tracks = []
+        for detection in detections:
+            best = max(unmatched, key=lambda track: iou(track.detection.bounding_box, detection.bounding_box), default=None)
+            if best is not None and iou(best.detection.bounding_box, detection.bounding_box) >= self.min_iou:
+                unmatched.remove(best)
+                track_id = best.track_id
+            else:
+                track_id = self._next_id
+                self._next_id += 1
+            tracks.append(_Track(track_id, detection, self._corners(gray, detection.bounding_box)))
+        self._tracks = tracks
+        return [track.to_detection() for track in tracks]
+
+    def _corners(self, gray, bbox):
+        mask = np.zeros(gray.shape, dtype=np.uint8)
+        mask[max(bbox.y1, 0):max(bbox.y2, 0), max(bbox.x1, 0):max(bbox.x2, 0)] = 255
+        points = cv2.goodFeaturesToTrack(gray, self.MAX_CORNERS, 0.01, 3, mask=mask)
+        return points if points is not None else np.empty((0, 1, 2), dtype=np.float32)
+
+    def _propagate(self, gray):
+        """Moves every track with optical flow, None as soon as one of them is lost."""
+        for track in self._tracks:
+            if len(track.points) < self.min_points:
+                return None
+
+        moved = []
+        for track in self._tracks:
+            points = track.points
+            forward, status, _ = cv2.calcOpticalFlowPyrLK(self._previous, gray, points, None, winSize=self.FLOW_WINDOW, maxLevel=2)
+            backward, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._previous, forward, None, winSize=self.FLOW_WINDOW, maxLevel=2)
+            error = np.linalg.norm((points - backward).reshape(-1, 2), axis=1)
+            good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < self.MAX_FORWARD_BACKWARD_ERROR)
+            if good.sum() < self.min_points:
+                return None
+
+            dx, dy = np.median((forward - points).reshape(-1, 2)[good], axis=0)
+            bbox = track.detection.bounding_box
+            height, width = gray.shape
+            shifted = BoundingBox(
+                x1=int(np.clip(round(bbox.x1 + dx), 0, width)), y1=int(np.clip(round(bbox.y1 + dy), 0, height)),
+                x2=int(np.clip(round(bbox.x2 + dx), 0, width)), y2=int(np.clip(round(bbox.y2 + dy), 0, height)),
+            )
+            if shifted.x2 <= shifted.x1 or shifted.y2 <= shifted.y1:
+                return None
+            detection = DetectionResult(track.detection.label, track.detection.confidence, shifted)
+            moved.append((track, detection, forward[good].reshape(-1, 1, 2)))
+
+        for track, detection, points in moved:
+            track.detection = detection
+            track.points = points
+        return [track.to_detection() for track in self._tracks]
+
+    def stats(self):
+        frames = self.detections + self.tracked_frames
+        return {
+            "frames": frames,
+            "detections": self.detections,
+            "tracked_frames": self.tracked_frames,
+            "detection_ratio": self.detections / frames if frames else 0.0,
+        }
+
+
+def create_plate_tracker():
+    """PlateTracker from the TRACKER_* settings, None when tracking is disabled."""
+    if not Config.TRACKER_ENABLED:
+        return None
+    return PlateTracker(
+        detect_every=Config.TRACKER_DETECT_EVERY,
+        min_iou=Config.TRACKER_MIN_IOU,
+        min_points=Config.TRACKER_MIN_POINTS,
+    )
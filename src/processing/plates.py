@@ -0,0 +1,123 @@
+import re
+import json
+from src.config import Config
+
+_SEPARATORS = re.compile(r"[\s\-\.·_]+")
+
+
+def normalize_plate(plate):
+    """Canonical form of an OCR read: uppercase, without spaces, dashes or dots."""
+    if not plate:
+        return ""
+    return _SEPARATORS.sub("", plate).upper()
+
+
+# Confusiones tipicas del OCR segun lo que se espera en la posicion
+DIGIT_FOR_LETTER = {"O": "0", "D": "0", "Q": "0", "I": "1", "L": "1", "J": "1", "Z": "2", "A": "4",
+                    "S": "5", "G": "6", "T": "7", "B": "8"}
+LETTER_FOR_DIGIT = {"0": "O", "1": "I", "2": "Z", "4": "A", "5": "S", "6": "G", "7": "T", "8": "B"}
+
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+DIGITS = "0123456789"
+
+
+class PlateFormat:
+    """
+    One national plate format given as a slot template: L = letter, D = digit, A = either.
+    `letters` optionally restricts the letters a format uses (e.g. no vowels).
+    """
+
+    def __init__(self, name, template, letters=LETTERS):
+        if not template or set(template) - set("LDA"):
+            raise ValueError(f"Invalid template for plate format {name}: {template!r}")
+        self.name = name
+        self.template = template
+        self.letters = letters
+
+    def pattern(self):
+        letters = f"[{self.letters}]"
+        slots = {"L": letters, "D": r"\d", "A": f"(?:{letters}|\\d)"}
+        return "".join(slots[slot] for slot in self.template)
+
+    def correct(self, plate):
+        """Plate with misread characters swapped to fit the slots, and the number of swaps; None if impossible."""
+        if len(plate) != len(self.template):
+            return None
+        chars, corrections = [], 0
+        for char, slot in zip(plate, self.template):
+            if slot == "L" and char not in self.letters:
+                char, corrections = LETTER_FOR_DIGIT.get(char), corrections + 1
+                if char is None or char not in self.letters:
+                    return None
+            elif slot == "D" and char not in DIGITS:
+                char, corrections = DIGIT_FOR_LETTER.get(char), corrections + 1
+                if char is None:
+                    return None
+            elif slot == "A" and char not in self.letters and char not in DIGITS:
+                return None
+            chars.append(char)
+        return "".join(chars), corrections
+
+
+class PlateMatch:
+    __slots__ = ("plate", "plate_type", "corrections")
+
+    def __init__(self, plate, plate_type, corrections=0):
+        self.plate = plate
+        self.plate_type = plate_type
+        self.corrections = corrections
+
+    def __repr__(self):
+        return f"PlateMatch({self.plate!r}, {self.plate_type!r}, corrections={self.corrections})"
+
+
+class PlateValidator:
+    """
+    Precompiled validation of every configured format.
+    All formats are joined into one anchored regex with a named group each, so a clean
+    read costs a single match; only reads that fail it go through position-aware
+    correction (letters expected in some slots, digits in others), keeping the format
+    that needs the fewest swaps, at most max_corrections.
+    """
+
+    def __init__(self, formats, max_corrections=2):
+        self.formats = [
+            PlateFormat(name, **spec) if isinstance(spec, dict) else PlateFormat(name, spec)
+            for name, spec in formats.items()
+        ]
+        self.max_corrections = max_corrections
+        self._by_group = {f"f{index}": plate_format for index, plate_format in enumerate(self.formats)}
+        self._matcher = re.compile(
+            "^(?:" + "|".join(f"(?P<{group}>{plate_format.pattern()})" for group, plate_format in self._by_group.items()) + ")$"
+        )
+        self._by_length = {}
+        for plate_format in self.formats:
+            self._by_length.setdefault(len(plate_format.template), []).append(plate_format)
+
+    def validate(self, plate):
+        """PlateMatch for a normalized or raw read, None when it fits no format."""
+        plate = normalize_plate(plate)
+        match = self._matcher.match(plate)
+        if match is not None:
+            return PlateMatch(plate, self._by_group[match.lastgroup].name)
+
+        best = None
+        for plate_format in self._by_length.get(len(plate), ()):
+            corrected = plate_format.correct(plate)
+            if corrected is not None and corrected[1] <= self.max_corrections:
+                if best is None or corrected[1] < best.corrections:
+                    best = PlateMatch(corrected[0], plate_format.name, corrected[1])
+        return best
+
+
+def load_plate_formats(path=None):
+    """Formats from the PLATE_FORMATS_FILE JSON ({name: template | {template, letters}}), else Config.PLATE_FORMATS."""
+    path = path or Config.PLATE_FORMATS_FILE
+    if not path:
+        return Config.PLATE_FORMATS
+    with open(path) as formats_file:
+        return json.load(formats_file)
+
+
+def create_plate_validator():
+    return PlateValidator(load_plate_formats(), Config.PLATE_MAX_CORRECTIONS)
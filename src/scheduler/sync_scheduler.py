@@ -4,6 +4,7 @@ from src.config import Config
 from src.services.parking_service import ParkingService
 from src.services.event_service import EventService
 from src.database.models import ConfigModel
+from src.processing.plate_registry import refresh_plate_registry
 
 class SyncScheduler:
     def __init__(self):
@@ -17,6 +18,7 @@ class SyncScheduler:
         parking_service.sync_parking()
         event_service = EventService()
         event_service.sync_pending_events()
+        refresh_plate_registry()
 
     def start_scheduler(self):
         config_db = ConfigModel()
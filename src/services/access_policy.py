@@ -0,0 +1,60 @@
+"""
+Access rules applied to the remote answers, shared by the services (at the gate) and by
+the reconciliation of decisions whose remote lookups missed the decision budget.
+"""
+
+
+def remote_event_type(remote_event):
+    """Last event type from the /events answer (None when the server has none)."""
+    return remote_event.get("type") if remote_event is not None else None
+
+
+def remote_access_decision(remote_access, last_event_type):
+    """(authorized, parking identifier) from the /access answer for a plate unknown locally."""
+    if remote_access is None:
+        return last_event_type == "ACCESS" or False, None
+    return last_event_type == "ACCESS" or remote_access.get("authorized"), remote_access.get("identifier")
+
+
+def remote_parking_decision(remote_parking, last_event_type):
+    """(authorized, parking identifier) from the /parking answer for a known vehicle without a local spot."""
+    first_available = next((parking for parking in remote_parking or () if parking.get("available")), None)
+    if first_available:
+        return True, first_available.get("identifier")
+    identifier = remote_parking[0].get("identifier") if remote_parking else None
+    return last_event_type == "ACCESS" or False, identifier
+
+
+def local_parking_decision(parking, last_event_type):
+    """(authorized, parking identifier) from the local available parking row."""
+    authorized = parking[5]
+    if authorized == False and last_event_type == "ACCESS":
+        authorized = True
+    return authorized, parking[2]
+
+
+def reconcile_decision(deadline, last_event_type):
+    """
+    (last event type, authorized) of a decision recomputed from the answers of its remote
+    lookups, including the ones that missed the deadline (they must be done), and the
+    last_event_type it was taken with. Local state is not read again: by now the gate
+    already registered its own event. None when a lookup failed and there is nothing to
+    compare with.
+    """
+    answers = dict(deadline.answers)
+    for name, future in deadline.missed.items():
+        if not future.done() or future.exception() is not None:
+            return None
+        answers[name] = future.result()
+
+    if "event" in deadline.missed:
+        last_event_type = remote_event_type(answers["event"])
+    if "access" in answers:
+        authorized, _ = remote_access_decision(answers["access"], last_event_type)
+    elif "parking" in answers:
+        authorized, _ = remote_parking_decision(answers["parking"], last_event_type)
+    elif "local_parking" in answers:
+        authorized, _ = local_parking_decision(answers["local_parking"], last_event_type)
+    else:
+        return None
+    return last_event_type, authorized
@@ -1,28 +1,50 @@
 from src.config import Config
 from src.database.models import VehicleModel
 from src.database.models import ParkingModel
+from src.database.authorization_index import authorization_index
 import logging
 from src.http.synchronous_api_client import SynchronousAPIClient  # Usamos el cliente síncrono
+from src.http.lookup_cache import remote_lookup_cache, DeadlineExceeded
+from src.services.access_policy import remote_access_decision, remote_parking_decision, local_parking_decision
 
 class AccessService:
 
-    def __init__(self):
+    def __init__(self, index=authorization_index):
         self.logger = logging.getLogger(__name__)
+        self.index = index
 
-    def is_vehicle_authorized(self, plate, last_event_type):
-        parking_db = ParkingModel()
-        vehicle_db = VehicleModel()
-        api_client = SynchronousAPIClient(Config.HTTP_SERVER_HOST)
+    def _find_vehicle(self, plate):
+        if self.index.loaded:
+            return self.index.find_vehicle(plate)
+        return VehicleModel().find_vehicle_by_plate(plate)
+
+    def _find_available_parking(self, user_id):
+        if self.index.loaded:
+            return self.index.find_available_parking(user_id)
+        return ParkingModel().find_by_user_id(user_id)
+
+    def is_vehicle_authorized(self, plate, last_event_type, deadline=None):
         try:
             self.logger.info(f"Requesting authorization for plate {plate}")
-            vehicle = vehicle_db.find_vehicle_by_plate(plate)
+            # Patentes conocidas se resuelven en memoria; la API solo se crea si hay que ir al servidor
+            vehicle = self._find_vehicle(plate)
             if vehicle is None:
                 self.logger.info(f"Vehicle with license plate {plate} not found locally")
                 entityId = Config.ENTITY_ID
+                endpoint = f"/access/entity/{entityId}/plate/{plate}"
                 try:
-                    remote_access = api_client.get(f"/access/entity/{entityId}/plate/{plate}")
+                    remote_access = remote_lookup_cache.get(
+                        endpoint,
+                        lambda: SynchronousAPIClient(Config.HTTP_SERVER_HOST).get(endpoint),
+                        ttl=Config.REMOTE_ACCESS_TTL_S,
+                        negative_ttl=Config.REMOTE_NOT_FOUND_TTL_S,
+                        name="access",
+                        deadline=deadline,
+                    )
                     if remote_access is not None:
-                        return last_event_type=="ACCESS" or remote_access.get("authorized"), remote_access.get("identifier")
+                        return remote_access_decision(remote_access, last_event_type)
+                except DeadlineExceeded:
+                    self.logger.warning("Remote authorization not back within the decision budget, using local policy")
                 except Exception as ex:
                     self.logger.warning("Unable to check authorization remotely")
             else:
@@ -30,24 +52,27 @@ class AccessService:
                 user_id = vehicle[1]
                 self.logger.info(f"Vehicle user_id {user_id} found locally, proceeding with validation")
 
-                parking = parking_db.find_by_user_id(user_id)
+                parking = self._find_available_parking(user_id)
                 if parking is None:
                     self.logger.warning("No parking available found locally, checking remotely...")
+                    api_client = SynchronousAPIClient(Config.HTTP_SERVER_HOST)
+                    endpoint = f"/parking/find-by-user/{user_id}"
                     try:
-                        remote_parking = api_client.get(f"/parking/find-by-user/{user_id}")
-                        first_available = next((parking for parking in remote_parking if parking.get("available")), None)
-                        if (first_available):
-                            return True, first_available.get("identifier")
-                        else:
-                            return last_event_type=="ACCESS" or False, remote_parking[0].get("identifier")
+                        # Sin cache (ttl 0), solo para acotar la espera y compartir llamadas simultaneas
+                        remote_parking = remote_lookup_cache.get(
+                            endpoint, lambda: api_client.get(endpoint), ttl=0, name="parking", deadline=deadline
+                        )
+                        return remote_parking_decision(remote_parking, last_event_type)
+                    except DeadlineExceeded:
+                        self.logger.warning("Remote parking not back within the decision budget, using local policy")
                     except Exception as ex:
                         self.logger.warning(f"Unable to check remote parking... {ex}")
                 else:
-                    authorized = parking[5]
-                    if authorized == False and last_event_type == "ACCESS":
-                        authorized = True
+                    if deadline is not None:
+                        deadline.answers["local_parking"] = parking  # para conciliar si el evento remoto llega tarde
+                    authorized, identifier = local_parking_decision(parking, last_event_type)
                     self.logger.info(f"Authorization obtained locally is_authorized: {authorized}")
-                    return  authorized, parking[2]
+                    return authorized, identifier
             return last_event_type=="ACCESS" or False, None    
         except Exception as ex:
             self.logger.error(f"Unable to validate access {ex}")
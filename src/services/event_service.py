@@ -2,6 +2,8 @@ from src.config import Config
 from src.database.models import EventModel
 import logging
 from src.http.synchronous_api_client import SynchronousAPIClient  # Usamos el cliente síncrono
+from src.http.lookup_cache import remote_lookup_cache, DeadlineExceeded
+from src.services.access_policy import remote_event_type
 from src.messaging.mqtt_event_service import MqttEventService
 from datetime import datetime
 
@@ -47,17 +49,27 @@ class EventService:
         except Exception as ex:
             self.logger.error(f"Unable to syncronize pending events {ex}")    
 
-    def find_last_registered_event_type(self, plate):
+    def find_last_registered_event_type(self, plate, deadline=None):
         try:
             self.logger.info(f"Finding last event by license plate... {plate}")
             event = self.event_db.find_last_event_by_plate(plate)
             if event is None:
                 self.logger.info(f"Event with license plate {plate} not found locally")
                 entityId = Config.ENTITY_ID
+                endpoint = f"/events/entity/{entityId}/plate/{plate}"
                 try:
-                    remote_event = self.api_client.get(f"/events/entity/{entityId}/plate/{plate}")
-                    if remote_event is not None:
-                        return remote_event.get("type")
+                    remote_event = remote_lookup_cache.get(
+                        endpoint,
+                        lambda: self.api_client.get(endpoint),
+                        ttl=Config.REMOTE_EVENT_TTL_S,
+                        negative_ttl=Config.REMOTE_NOT_FOUND_TTL_S,
+                        name="event",
+                        deadline=deadline,
+                    )
+                    return remote_event_type(remote_event)
+                except DeadlineExceeded:
+                    self.logger.warning("Remote event not back within the decision budget, using local policy")
+                    return None
                 except Exception as ex:
                     self.logger.warning("Unable to obtain event remotely")
                     return None
@@ -78,20 +78,11 @@ class ParkingService:
         Args:
             remote_parking (list): List of parking records fetched from the API.
         """
-        for parking in remote_parking:
-            existing_parking = self.db_client.find_by_id(parking.get("id"))
-            api_date_str = parking.get("lastUpdatedAt")
-            api_date = datetime.strptime(api_date_str, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%d %H:%M:%S")
-
-            if existing_parking:
-                local_date = _parse_to_local_date(existing_parking[8])
-                if api_date > local_date:
-                    self.logger.info("Updating local parking")
-                    self.db_client.update_parking(self.db_client.map_to_update_db(parking))
-                else:
-                    self.logger.info("Parking is up to date")
-            else:
-                self.db_client.create_parking(self.db_client.map_to_insert_db(parking))
+        # Un solo upsert en una transaccion: los nuevos se insertan y los existentes solo si el remoto es mas reciente
+        written = self.db_client.upsert_parking(
+            (self.db_client.map_to_insert_db(parking) for parking in remote_parking), only_newer=True
+        )
+        self.logger.info(f"Parking sync merged {written} of {len(remote_parking)} remote parking lots")
 
 
     
@@ -102,6 +93,4 @@ class ParkingService:
         Args:
             parking_lots (list): List of parking data to be inserted.
         """
-        for parking in parking_lots:
-            db_parking = self.db_client.map_to_insert_db(parking)
-            self.db_client.create_parking(db_parking)
\ No newline at end of file
+        self.db_client.upsert_parking(self.db_client.map_to_insert_db(parking) for parking in parking_lots)
\ No newline at end of file
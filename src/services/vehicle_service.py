@@ -1,5 +1,6 @@
 from src.config import Config
 from src.database.models import VehicleModel
+from src.processing.plate_registry import refresh_plate_registry
 import logging
 from src.http.synchronous_api_client import SynchronousAPIClient  # Usamos el cliente síncrono
 
@@ -32,16 +33,7 @@ class VehicleService:
 
     def insert_vehicles(self, vehicles):
         db_client = VehicleModel()
-        for vehicle in vehicles:
-            db_vehicle = (
-                vehicle.get("id"),
-                vehicle.get("plate"),
-                vehicle.get("vehicleType"),
-                vehicle.get("user").get("id"),
-                vehicle.get("user").get("type"),
-                vehicle.get("createdAt"),
-                vehicle.get("lastUpdatedAt")
-            )
-            # Aquí insertamos de manera síncrona
-            db_client.create_vehicle(db_vehicle)
+        # Una sola transaccion; las tuplas se generan a medida que se insertan
+        db_client.upsert_vehicles(db_client.map_to_insert_db(vehicle) for vehicle in vehicles)
+        refresh_plate_registry()
 
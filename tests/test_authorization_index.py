@@ -0,0 +1,98 @@
+import os
+import tempfile
+import threading
+import unittest
+from src.database.database_connector import DatabaseConnector
+from src.database.authorization_index import AuthorizationIndex
+
+
+class TestAuthorizationIndex(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.db = DatabaseConnector(self.path)
+        self.db.initialize_database()
+        conn = self.db.get_conn()
+        conn.execute("INSERT INTO vehicles (id, user_id, user_type, plate, vehicle_type) VALUES ('v1', 'u1', 'OWNER', 'ABCD12', 'CAR')")
+        conn.execute("INSERT INTO parking (id, user_id, identifier, is_for_visit, available) VALUES ('p1', 'u1', 'A-1', 0, 0)")
+        conn.execute("INSERT INTO parking (id, user_id, identifier, is_for_visit, available) VALUES ('p2', 'u1', 'A-2', 0, 1)")
+        conn.commit()
+        conn.close()
+        self.index = AuthorizationIndex()
+        self.index.hydrate(self.db)
+
+    def tearDown(self):
+        DatabaseConnector.close_all()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_matches_table_lookups(self):
+        self.assertEqual(self.index.find_vehicle("ABCD12")[1], "u1")
+        self.assertIsNone(self.index.find_vehicle("ZZZZ99"))
+        self.assertEqual(self.index.find_available_parking("u1")[2], "A-2")
+        self.assertIsNone(self.index.find_available_parking("u2"))
+
+    def test_writes_keep_index_current(self):
+        self.index.update_parking_by_identifier("A-2", {"available": False})
+        self.assertIsNone(self.index.find_available_parking("u1"))
+        self.index.update_parking_by_identifier("A-1", {"available": True})
+        self.assertEqual(self.index.find_available_parking("u1")[2], "A-1")
+
+        self.index.put_vehicle({"id": "v1", "plate": "ABCD13"})
+        self.assertIsNone(self.index.find_vehicle("ABCD12"))
+        self.assertEqual(self.index.find_vehicle("ABCD13")[1], "u1")
+
+        self.index.put_parking({"id": "p2", "user_id": "u2", "identifier": "A-2", "available": True})
+        self.assertEqual(self.index.find_available_parking("u2")[0], "p2")
+
+    def test_refresh_applies_only_the_given_rows(self):
+        conn = self.db.get_conn()
+        conn.execute("UPDATE parking SET available = 0 WHERE id = 'p2'")
+        conn.execute("INSERT INTO parking (id, user_id, identifier, is_for_visit, available) VALUES ('p3', 'u1', 'A-3', 0, 1)")
+        conn.execute("UPDATE vehicles SET plate = 'ABCD13' WHERE id = 'v1'")
+        conn.commit()
+        self.index.refresh(parking_ids=["p3"], db=self.db)
+        self.assertEqual(self.index.find_available_parking("u1")[2], "A-2")  # p2 no se releyo
+        self.index.refresh(vehicle_ids=["v1"], parking_ids=["p2", "p3"], db=self.db)
+        self.assertEqual(self.index.find_available_parking("u1")[2], "A-3")
+        self.assertIsNone(self.index.find_vehicle("ABCD12"))
+        self.assertEqual(self.index.find_vehicle("ABCD13")[0], "v1")
+
+    def test_swapped_plates_keep_both_vehicles(self):
+        self.index.put_vehicle({"id": "v2", "user_id": "u2", "plate": "WXYZ34"})
+        self.index.put_vehicle({"id": "v2", "plate": "TEMP00"})
+        self.index.put_vehicle({"id": "v1", "plate": "WXYZ34"})
+        self.index.put_vehicle({"id": "v2", "plate": "ABCD12"})
+        self.assertEqual(self.index.find_vehicle("WXYZ34")[0], "v1")
+        self.assertEqual(self.index.find_vehicle("ABCD12")[0], "v2")
+
+    def test_reads_while_parking_moves_between_users(self):
+        for i in range(200):
+            self.index.put_parking({"id": f"q{i}", "user_id": "u1", "identifier": f"Q-{i}", "available": False})
+        errors = []
+        stop = threading.Event()
+
+        def read():
+            try:
+                while not stop.is_set():
+                    self.index.find_available_parking("u1")
+                    self.index.find_available_parking("u2")
+            except Exception as e:
+                errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        for reader in readers:
+            reader.start()
+        for round_ in range(20):
+            for i in range(200):
+                self.index.put_parking({"id": f"q{i}", "user_id": "u2" if round_ % 2 == 0 else "u1"})
+        stop.set()
+        for reader in readers:
+            reader.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.index.find_available_parking("u1")[2], "A-2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+from src.config import Config
+from src.database.database_connector import DatabaseConnector
+from src.database.authorization_index import authorization_index
+from src.database.models import VehicleModel, ParkingModel
+from src.services.parking_service import ParkingService
+
+
+def api_vehicle(index, plate=None, updated="2025-01-01 00:00:00"):
+    return {
+        "id": f"v{index}", "plate": plate or f"PL{index:04d}", "vehicleType": "CAR",
+        "user": {"id": f"u{index}", "type": "OWNER"}, "createdAt": "2025-01-01 00:00:00", "lastUpdatedAt": updated,
+    }
+
+
+class TestBulkUpsert(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.database_url = Config.DATABASE_URL
+        Config.DATABASE_URL = self.path
+        DatabaseConnector().initialize_database()
+        self.vehicles = VehicleModel()
+
+    def tearDown(self):
+        authorization_index.loaded = False
+        DatabaseConnector.close_all()
+        Config.DATABASE_URL = self.database_url
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def count(self, table):
+        return DatabaseConnector().get_conn().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_inserts_then_updates_in_chunks(self):
+        rows = (self.vehicles.map_to_insert_db(api_vehicle(i)) for i in range(2500))
+        self.assertEqual(self.vehicles.upsert_vehicles(rows, chunk_size=1000), 2500)
+        rows = (self.vehicles.map_to_insert_db(api_vehicle(i, updated="2025-02-01 00:00:00")) for i in range(10))
+        self.vehicles.upsert_vehicles(rows)
+        self.assertEqual(self.count("vehicles"), 2500)
+        self.assertEqual(self.vehicles.find_last_sync_vehicle()[6], "2025-02-01 00:00:00")
+
+    def test_conflicting_row_is_skipped(self):
+        rows = [self.vehicles.map_to_insert_db(api_vehicle(i)) for i in range(5)]
+        rows.append(self.vehicles.map_to_insert_db(api_vehicle(99, plate="PL0001")))  # patente de otro vehiculo
+        self.assertEqual(self.vehicles.upsert_vehicles(rows, chunk_size=4), 5)
+        self.assertEqual(self.count("vehicles"), 5)
+
+    def test_parking_upsert(self):
+        parking = ParkingModel()
+        lots = [{"id": f"p{i}", "user": {"id": f"u{i}"}, "identifier": f"P-{i}", "isForVisit": False, "available": True,
+                 "createdAt": "2025-01-01 00:00:00", "lastUpdatedAt": "2025-01-01 00:00:00"} for i in range(30)]
+        parking.upsert_parking(parking.map_to_insert_db(lot) for lot in lots)
+        lots[0]["available"] = False
+        parking.upsert_parking(parking.map_to_insert_db(lot) for lot in lots[:1])
+        self.assertEqual(self.count("parking"), 30)
+        self.assertEqual(parking.find_by_id("p0")[5], 0)
+
+    def test_updates_keep_created_at(self):
+        parking = ParkingModel()
+        lot = {"id": "p1", "user": {"id": "u1"}, "identifier": "P-1", "isForVisit": False, "available": True,
+               "createdAt": "2025-01-01 00:00:00", "lastUpdatedAt": "2025-01-01 00:00:00"}
+        parking.upsert_parking([parking.map_to_insert_db(lot)])
+        self.vehicles.upsert_vehicles([self.vehicles.map_to_insert_db(api_vehicle(1))])
+
+        lot.update(createdAt="2025-03-01 00:00:00", lastUpdatedAt="2025-03-01 00:00:00", available=False)
+        parking.upsert_parking([parking.map_to_insert_db(lot)])
+        vehicle = api_vehicle(1, updated="2025-03-01 00:00:00")
+        vehicle["createdAt"] = "2025-03-01 00:00:00"
+        self.vehicles.upsert_vehicles([self.vehicles.map_to_insert_db(vehicle)])
+
+        self.assertEqual(parking.find_by_id("p1")[5:7], (0, "2025-01-01 00:00:00"))
+        self.assertEqual(self.vehicles.find_vehicle_by_plate("PL0001")[5:7], ("2025-01-01 00:00:00", "2025-03-01 00:00:00"))
+
+    def test_sync_merge_applies_only_newer_rows(self):
+        def lot(i, available, updated):
+            return {"id": f"p{i}", "user": {"id": f"u{i}"}, "identifier": f"P-{i}", "isForVisit": False,
+                    "available": available, "createdAt": "2025-01-01 00:00:00", "lastUpdatedAt": updated}
+
+        parking = ParkingModel()
+        parking.upsert_parking(parking.map_to_insert_db(lot(i, True, "2025-01-02 00:00:00")) for i in range(2))
+        ParkingService()._process_remote_parking([
+            lot(0, False, "2025-01-03 00:00:00"),  # mas reciente
+            lot(1, False, "2025-01-01 00:00:00"),  # mas viejo que el local
+            lot(2, False, "2025-01-03 00:00:00"),  # nuevo
+        ])
+        self.assertEqual([parking.find_by_id(f"p{i}")[5] for i in range(3)], [0, 1, 0])
+
+    def test_upserts_keep_loaded_index_current_without_hydrating(self):
+        parking = ParkingModel()
+        self.vehicles.upsert_vehicles([self.vehicles.map_to_insert_db(api_vehicle(1))])
+        parking.upsert_parking([parking.map_to_insert_db({
+            "id": "p1", "user": {"id": "u1"}, "identifier": "P-1", "isForVisit": False, "available": False,
+            "createdAt": "2025-01-01 00:00:00", "lastUpdatedAt": "2025-01-01 00:00:00"})])
+        authorization_index.hydrate()
+        hydrate, authorization_index.hydrate = authorization_index.hydrate, None  # no debe llamarse
+        try:
+            self.vehicles.upsert_vehicles([self.vehicles.map_to_insert_db(api_vehicle(1, plate="NEW001")),
+                                           self.vehicles.map_to_insert_db(api_vehicle(2))])
+            parking.upsert_parking([parking.map_to_insert_db({
+                "id": "p1", "user": {"id": "u1"}, "identifier": "P-1", "isForVisit": False, "available": True,
+                "createdAt": "2025-01-01 00:00:00", "lastUpdatedAt": "2025-01-02 00:00:00"})], only_newer=True)
+        finally:
+            del authorization_index.hydrate
+        self.assertIsNone(authorization_index.find_vehicle("PL0001"))
+        self.assertEqual(authorization_index.find_vehicle("NEW001")[0], "v1")
+        self.assertEqual(authorization_index.find_vehicle("PL0002")[0], "v2")
+        self.assertEqual(authorization_index.find_available_parking("u1")[0], "p1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import cv2
+import numpy as np
+from src.processing.change_gate import FrameChangeGate, parse_roi
+
+RNG = np.random.default_rng(3)
+LEFT_HALF = parse_roi("0,0;0.5,0;0.5,1;0,1")
+
+
+def scene(car_x=None, noise=0):
+    """480x640 BGR street: grey background, optionally a dark car box at car_x, plus sensor noise."""
+    image = np.full((480, 640, 3), 120, dtype=np.uint8)
+    cv2.rectangle(image, (0, 400), (639, 479), (90, 90, 90), -1)
+    if car_x is not None:
+        cv2.rectangle(image, (car_x, 250), (car_x + 160, 380), (30, 30, 200), -1)
+    if noise:
+        image = np.clip(image.astype(int) + RNG.integers(-noise, noise + 1, image.shape), 0, 255).astype(np.uint8)
+    return image
+
+
+class TestFrameChangeGate(unittest.TestCase):
+    def test_first_frame_is_always_analysed(self):
+        self.assertFalse(FrameChangeGate().should_skip(scene()))
+
+    def test_static_scene_with_sensor_noise_is_skipped(self):
+        gate = FrameChangeGate()
+        gate.should_skip(scene(noise=4))
+        self.assertTrue(all(gate.should_skip(scene(noise=4)) for _ in range(5)))
+        self.assertEqual(gate.stats()["skipped"], 5)
+        self.assertAlmostEqual(gate.stats()["skip_ratio"], 5 / 6)
+
+    def test_motion_is_analysed(self):
+        gate = FrameChangeGate()
+        gate.should_skip(scene(car_x=100))
+        self.assertFalse(gate.should_skip(scene(car_x=140)))
+        self.assertFalse(gate.should_skip(scene(car_x=180)))
+
+    def test_slow_motion_is_compared_against_the_last_analysed_frame(self):
+        gate = FrameChangeGate()
+        gate.should_skip(scene(car_x=100))
+        # Un pixel por frame no alcanza, pero el cambio se acumula contra la referencia
+        decisions = [gate.should_skip(scene(car_x=100 + step)) for step in range(1, 12)]
+        self.assertTrue(decisions[0])
+        self.assertIn(False, decisions)
+
+    def test_motion_outside_the_roi_is_skipped(self):
+        gate = FrameChangeGate(roi=LEFT_HALF)
+        gate.should_skip(scene(car_x=420))
+        self.assertTrue(gate.should_skip(scene(car_x=460)))  # el auto se mueve en la mitad derecha
+
+    def test_motion_inside_the_roi_is_analysed(self):
+        gate = FrameChangeGate(roi=LEFT_HALF)
+        gate.should_skip(scene(car_x=60))
+        self.assertFalse(gate.should_skip(scene(car_x=100)))
+
+    def test_reset_forces_the_next_frame(self):
+        gate = FrameChangeGate()
+        gate.should_skip(scene())
+        self.assertTrue(gate.should_skip(scene()))
+        gate.reset()
+        self.assertFalse(gate.should_skip(scene()))
+        self.assertTrue(gate.should_skip(scene()))
+
+    def test_resolution_change_resets_the_reference(self):
+        gate = FrameChangeGate()
+        gate.should_skip(scene())
+        self.assertFalse(gate.should_skip(scene()[:240]))
+
+    def test_time_saved_uses_measured_inference(self):
+        gate = FrameChangeGate()
+        gate.should_skip(scene())
+        gate.record_inference(0.2)
+        gate.should_skip(scene())
+        gate.should_skip(scene())
+        self.assertAlmostEqual(gate.stats()["time_saved_s"], 0.4)
+
+    def test_parse_roi(self):
+        self.assertIsNone(parse_roi(""))
+        self.assertEqual(parse_roi("0,0;1,0;1,1;"), [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0)])
+        with self.assertRaises(ValueError):
+            parse_roi("0,0;1,1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from src.database.database_connector import DatabaseConnector
+
+
+class TestPooledConnections(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.db = DatabaseConnector(self.path, pooled=True)
+        self.db.initialize_database()
+
+    def tearDown(self):
+        DatabaseConnector.close_all()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_one_connection_per_thread(self):
+        conn = self.db.get_conn()
+        self.assertIs(DatabaseConnector(self.path, pooled=True).get_conn(), conn)
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.db.get_conn()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], conn)
+
+    def test_close_discards_unfinished_transaction(self):
+        conn = self.db.get_conn()
+        conn.execute("BEGIN TRANSACTION")
+        conn.execute("INSERT INTO events (id, poc_id, plate, type) VALUES ('e1', 1, 'ABCD12', 'ACCESS')")
+        conn.close()
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(self.db.get_conn().execute("SELECT COUNT(*) FROM events").fetchone()[0], 0)
+
+    def test_short_lived_threads_do_not_leak_connections(self):
+        self.db.get_conn()
+        baseline = DatabaseConnector.open_connections()
+        opened = []
+
+        def query():
+            conn = self.db.get_conn()
+            conn.execute("SELECT COUNT(*) FROM events").fetchone()
+            opened.append(conn)
+
+        threads = [threading.Thread(target=query) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for _ in range(8):
+                executor.submit(query)
+
+        self.assertEqual(len(opened), 28)
+        self.assertEqual(DatabaseConnector.open_connections(), baseline)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            opened[0].execute("SELECT 1")
+
+    def test_close_all_reopens(self):
+        conn = self.db.get_conn()
+        DatabaseConnector.close_all()
+        self.assertIsNot(self.db.get_conn(), conn)
+
+
+if __name__ == "__main__":
+    unittest.main()
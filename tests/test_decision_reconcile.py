@@ -0,0 +1,85 @@
+import logging
+import threading
+import unittest
+from src.config import Config
+from src.http.lookup_cache import LookupCache, Deadline, DeadlineExceeded
+from src.services.access_policy import reconcile_decision
+
+# mqtt_event_service arma sus topicos con ENTITY_ID al importarse
+Config.ENTITY_ID = Config.ENTITY_ID or "test-entity"
+from src.processing.detector import PlateDetector  # noqa: E402
+
+
+class RecordingEvents:
+    def __init__(self):
+        self.published = []
+        self.corrections = []
+
+    def publish_event(self, event_type, plate, poc_id=None):
+        self.published.append(event_type)
+
+    def publish_correction(self, event_type, decided_type, plate, poc_id=None):
+        self.corrections.append((event_type, decided_type))
+
+
+class TestDecisionReconcile(unittest.TestCase):
+    """A decision whose remote event lookup misses the budget, for an unknown plate the server authorizes."""
+
+    def decide_with_late_event(self, remote_last_event):
+        cache = LookupCache()
+        release = threading.Event()
+
+        def late_event():
+            release.wait(5)
+            return {"type": remote_last_event}
+
+        deadline = Deadline(0.02)
+        try:
+            cache.get("event", late_event, ttl=10, name="event", deadline=deadline)
+            self.fail("event lookup should miss the deadline")
+        except DeadlineExceeded:
+            last_event_type = None  # politica local: sin evento conocido
+        cache.get("access", lambda: {"authorized": True, "identifier": "A-1"}, ttl=10, name="access", deadline=deadline)
+        release.set()
+        return last_event_type, deadline
+
+    def reconcile(self, remote_last_event):
+        last_event_type, deadline = self.decide_with_late_event(remote_last_event)
+        detector = PlateDetector.__new__(PlateDetector)
+        detector.logger = logging.getLogger(__name__)
+        detector.poc_id = None
+        events = RecordingEvents()
+        detector._reconcile(events, "ABCD12", last_event_type, True, deadline)
+        return events
+
+    def test_remote_agrees(self):
+        # El servidor dice que la ultima fue EXIT: ACCESS era lo correcto
+        events = self.reconcile("EXIT")
+        self.assertEqual(events.corrections, [])
+        self.assertEqual(events.published, [])
+
+    def test_remote_disagrees(self):
+        # El servidor dice que el vehiculo ya estaba adentro: debio ser EXIT
+        events = self.reconcile("ACCESS")
+        self.assertEqual(events.corrections, [("CORRECTED_EXIT", "ACCESS")])
+        self.assertEqual(events.published, [])  # la correccion no se guarda como evento local
+
+    def test_failed_lookup_is_not_reconciled(self):
+        cache = LookupCache()
+        release = threading.Event()
+
+        def failing():
+            release.wait(5)
+            raise ConnectionError("down")
+
+        deadline = Deadline(0.02)
+        with self.assertRaises(DeadlineExceeded):
+            cache.get("access", failing, ttl=10, name="access", deadline=deadline)
+        release.set()
+        with self.assertRaises(ConnectionError):
+            deadline.missed["access"].result(timeout=5)
+        self.assertIsNone(reconcile_decision(deadline, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
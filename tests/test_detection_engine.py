@@ -0,0 +1,66 @@
+import unittest
+from unittest import mock
+import numpy as np
+from fast_alpr.base import OcrResult
+import src.processing.detection_engine as detection_engine
+from src.processing.detection_engine import DetectionEngine
+from src.processing.frame_sources import FrameSource
+
+
+class SizedSource(FrameSource):
+    def __init__(self, size):
+        super().__init__()
+        self.size = size
+
+    def frame_size(self):
+        return self.size
+
+
+class RecordingAlpr:
+    """Models stand-in that records the shapes it was warmed up with."""
+
+    def __init__(self):
+        self.detector_shapes = []
+        self.ocr_shapes = []
+        self.ocr = self
+
+    def predict(self, image):
+        if image.shape[:2] == DetectionEngine.WARM_UP_PLATE_SIZE:
+            self.ocr_shapes.append(image.shape)
+            return OcrResult("", 0.0)
+        self.detector_shapes.append(image.shape)
+        return []
+
+
+class TestWarmUp(unittest.TestCase):
+    def setUp(self):
+        self.alpr = RecordingAlpr()
+        patcher = mock.patch.object(detection_engine, "create_alpr", lambda settings: self.alpr)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def engine(self, **kwargs):
+        return DetectionEngine(inference_settings={"profile": "TEST"}, **kwargs)
+
+    def test_uses_the_source_frame_size(self):
+        self.engine(source=SizedSource((1280, 720)))
+        self.assertEqual(self.alpr.detector_shapes, [(720, 1280, 3)])
+        self.assertEqual(len(self.alpr.ocr_shapes), 1)
+
+    def test_each_size_is_warmed_up_once(self):
+        engine = self.engine(default_source=False, frame_size=(640, 480))
+        engine.warm_up((640, 480))
+        engine.warm_up((1920, 1080))
+        self.assertEqual(self.alpr.detector_shapes, [(480, 640, 3), (1080, 1920, 3)])
+        self.assertEqual(len(self.alpr.ocr_shapes), 1)
+
+    def test_unknown_size_only_warms_up_ocr(self):
+        engine = self.engine(default_source=False)
+        self.assertEqual(self.alpr.detector_shapes, [])
+        self.assertEqual(len(self.alpr.ocr_shapes), 1)
+        engine.warm_up((320, 240))
+        self.assertEqual(self.alpr.detector_shapes, [(240, 320, 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
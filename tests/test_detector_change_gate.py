@@ -0,0 +1,72 @@
+import unittest
+from unittest import mock
+import numpy as np
+from fast_alpr import ALPRResult
+from fast_alpr.base import BoundingBox, DetectionResult, OcrResult
+from src.config import Config
+from src.processing.change_gate import FrameChangeGate
+from src.processing.frame_sources import Frame
+from src.processing.plate_consensus import PlateConsensus
+
+# mqtt_event_service arma sus topicos con ENTITY_ID al importarse
+Config.ENTITY_ID = Config.ENTITY_ID or "test-entity"
+from src.processing.detector import PlateDetector  # noqa: E402
+
+STATIC_SCENE = np.full((480, 640, 3), 120, dtype=np.uint8)
+
+
+class OneReadEngine:
+    """Engine stand-in that reads the same plate on every frame it analyses."""
+    alpr = None
+
+    def __init__(self):
+        self.predicted = 0
+
+    def predict(self, frame, tracker=None):
+        self.predicted += 1
+        detection = DetectionResult("License Plate", 0.99, BoundingBox(10, 10, 110, 40))
+        return [ALPRResult(detection=detection, ocr=OcrResult("ABCD12", 0.99))]
+
+
+class FakeGpio:
+    def led_on(self, name):
+        pass
+
+    def led_off(self, name):
+        pass
+
+
+class RecordingDetector(PlateDetector):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.handled = []
+
+    def _handle_plate_detection(self, plate):
+        self.handled.append(plate)
+
+
+class TestStaticSceneDoesNotVote(unittest.TestCase):
+    def setUp(self):
+        for name, value in (("PLATE_REGISTRY_ENABLED", False), ("TRACKER_ENABLED", False)):
+            patcher = mock.patch.object(Config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.engine = OneReadEngine()
+        self.detector = RecordingDetector(engine=self.engine, gpio=FakeGpio(), change_gate=FrameChangeGate())
+
+    def test_one_read_of_a_stopped_car_is_not_confirmed(self):
+        consensus = PlateConsensus(3, 5)
+        for _ in range(5):
+            self.detector._process_results(self.detector._infer(Frame(STATIC_SCENE.copy())), consensus)
+        self.assertEqual(self.engine.predicted, 1)  # los otros 4 frames los salto el gate
+        self.assertIsNone(consensus.confirmed)
+        self.assertEqual(self.detector.handled, [])
+
+    def test_skipped_frames_are_not_decided_without_consensus(self):
+        for _ in range(5):
+            self.detector._process_results(self.detector._infer(Frame(STATIC_SCENE.copy())))
+        self.assertEqual(self.detector.handled, ["ABCD12"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import threading
+import unittest
+from src.config import Config
+from src.database.database_connector import DatabaseConnector
+from src.database.event_writer import EventWriter
+from src.database.last_event_cache import last_event_cache
+from src.database.models import EventModel
+
+
+class TestEventWriter(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.database_url = Config.DATABASE_URL
+        Config.DATABASE_URL = self.path
+        DatabaseConnector().initialize_database()
+        last_event_cache.clear()
+        self.writer = EventWriter(max_batch=8, max_latency_s=0.2)
+
+    def tearDown(self):
+        self.writer.stop()
+        DatabaseConnector.close_all()
+        Config.DATABASE_URL = self.database_url
+        last_event_cache.clear()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def count_events(self):
+        return DatabaseConnector().get_conn().execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def test_events_are_committed_in_groups(self):
+        futures = [self.writer.submit(f"e{i}", "ACCESS", 1, f"PL{i:04d}") for i in range(20)]
+        self.assertEqual([future.result(timeout=5) for future in futures], [f"e{i}" for i in range(20)])
+        self.assertEqual(self.count_events(), 20)
+        self.assertIsNone(self.writer.pending_event("PL0000"))
+
+    def test_queued_event_is_visible_before_commit(self):
+        self.writer.submit("e1", "ACCESS", 1, "ABCD12")
+        self.assertEqual(self.writer.pending_event("ABCD12")[3], "ACCESS")
+        self.assertEqual(last_event_cache.get("ABCD12")[3], "ACCESS")
+        self.writer.stop()
+        self.assertEqual(self.count_events(), 1)
+
+    def test_submit_after_stop_writes_synchronously(self):
+        self.writer.submit("e1", "ACCESS", 1, "ABCD12")
+        self.writer.stop()
+        future = self.writer.submit("e2", "EXIT", 1, "ABCD12")
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), "e2")
+        self.assertIsNone(self.writer._thread)  # no arranca otro hilo
+        self.assertEqual(self.count_events(), 2)
+
+    def test_concurrent_stop_does_not_orphan_events(self):
+        futures = []
+
+        def submit():
+            for i in range(50):
+                futures.append(self.writer.submit(f"e{i}", "ACCESS", 1, f"PL{i:04d}"))
+
+        thread = threading.Thread(target=submit)
+        thread.start()
+        self.writer.stop()
+        thread.join(timeout=10)
+        self.assertEqual([future.result(timeout=5) for future in futures], [f"e{i}" for i in range(50)])
+        self.assertEqual(self.count_events(), 50)
+
+    def test_failed_event_reports_error(self):
+        self.writer.submit("e1", "ACCESS", 1, "ABCD12").result(timeout=5)
+        duplicate = self.writer.submit("e1", "EXIT", 1, "ABCD12")
+        with self.assertRaises(Exception):
+            duplicate.result(timeout=5)
+        last_event_cache.clear()
+        self.assertEqual(EventModel().find_last_event_by_plate("ABCD12")[3], "ACCESS")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,223 @@
+import threading
+import time
+import unittest
+from src.processing.frame_pipeline import DROP_POLICY_FIFO, DROP_POLICY_LATEST, FramePipeline, FrameRing
+from src.processing.frame_sources import Frame
+
+
+class CountingFrame(Frame):
+    def __init__(self, index, timestamp=None):
+        super().__init__(None, timestamp, index)
+        self.released = 0
+
+    def release(self):
+        self.released += 1
+
+
+class FrameSequence:
+    """capture_fn over n frames, None once exhausted."""
+
+    def __init__(self, n, delay=0.0):
+        self.frames = [CountingFrame(i) for i in range(n)]
+        self._next = iter(self.frames)
+        self.delay = delay
+
+    def __call__(self):
+        if self.delay:
+            time.sleep(self.delay)
+        return next(self._next, None)
+
+
+class TestFrameRing(unittest.TestCase):
+    def test_fifo_keeps_order(self):
+        ring = FrameRing(4, DROP_POLICY_FIFO)
+        for i in range(3):
+            ring.put(CountingFrame(i))
+        self.assertEqual([ring.get(timeout=0).index for _ in range(3)], [0, 1, 2])
+        self.assertIsNone(ring.get(timeout=0))
+
+    def test_fifo_overflow_drops_and_releases_oldest(self):
+        ring = FrameRing(2, DROP_POLICY_FIFO)
+        frames = [CountingFrame(i) for i in range(3)]
+        for frame in frames:
+            ring.put(frame)
+        self.assertEqual(ring.dropped_overflow, 1)
+        self.assertEqual(frames[0].released, 1)
+        self.assertEqual([ring.get(timeout=0).index for _ in range(2)], [1, 2])
+
+    def test_fifo_drops_frames_older_than_max_age(self):
+        ring = FrameRing(4, DROP_POLICY_FIFO, max_age=0.5)
+        now = time.perf_counter()
+        old = [CountingFrame(0, timestamp=now - 2), CountingFrame(1, timestamp=now - 2)]
+        for frame in old + [CountingFrame(2, timestamp=now), CountingFrame(3, timestamp=now)]:
+            ring.put(frame)
+        self.assertEqual(ring.get(timeout=0).index, 2)  # los vencidos no salen nunca
+        self.assertEqual([frame.released for frame in old], [1, 1])
+        self.assertEqual(ring.dropped_stale, 2)
+        self.assertEqual(ring.get(timeout=0).index, 3)
+
+    def test_latest_never_returns_an_expired_frame(self):
+        ring = FrameRing(4, DROP_POLICY_LATEST, max_age=0.5)
+        now = time.perf_counter()
+        old = [CountingFrame(0, timestamp=now - 2), CountingFrame(1, timestamp=now - 1)]
+        for frame in old:
+            ring.put(frame)
+        self.assertIsNone(ring.get(timeout=0.05))  # el mas nuevo tambien vencio
+        self.assertEqual([frame.released for frame in old], [1, 1])
+        self.assertEqual((ring.dropped_stale, ring.depth()), (2, 0))
+
+        threading.Timer(0.05, ring.put, args=(CountingFrame(2),)).start()
+        self.assertEqual(ring.get(timeout=2).index, 2)  # sigue esperando uno vigente
+
+    def test_latest_takes_newest_and_releases_the_rest(self):
+        ring = FrameRing(4, DROP_POLICY_LATEST)
+        frames = [CountingFrame(i) for i in range(3)]
+        for frame in frames:
+            ring.put(frame)
+        self.assertEqual(ring.get(timeout=0).index, 2)
+        self.assertEqual([frame.released for frame in frames], [1, 1, 0])
+        self.assertEqual(ring.dropped_stale, 2)
+        self.assertEqual(ring.depth(), 0)
+
+    def test_close_releases_pending_and_wakes_readers(self):
+        ring = FrameRing(4, DROP_POLICY_FIFO)
+        pending = CountingFrame(0)
+        ring.put(pending)
+        ring.close()
+        self.assertEqual(pending.released, 1)
+        self.assertIsNone(ring.get(timeout=0))
+
+        ring = FrameRing(4, DROP_POLICY_FIFO)
+        got = []
+        reader = threading.Thread(target=lambda: got.append(ring.get(timeout=5)))
+        reader.start()
+        time.sleep(0.05)
+        ring.close()
+        reader.join(timeout=1)
+        self.assertFalse(reader.is_alive())
+        self.assertEqual(got, [None])
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            FrameRing(4, "RANDOM")
+
+
+class TestFramePipeline(unittest.TestCase):
+    def test_single_worker_fifo_delivers_every_frame_in_order(self):
+        source = FrameSequence(20)
+        seen = []
+        pipeline = FramePipeline(source, lambda frame: frame.index, lambda frame, result: seen.append(result),
+                                 ring_size=20, workers=1, policy=DROP_POLICY_FIFO)
+        self.assertEqual(pipeline.run(), 20)
+        self.assertEqual(seen, list(range(20)))
+
+    def test_max_frames_is_exact_with_several_workers(self):
+        source = FrameSequence(100, delay=0.001)
+        seen = []
+        lock = threading.Lock()
+
+        def on_result(frame, result):
+            with lock:
+                seen.append(result)
+
+        def infer(frame):
+            time.sleep(0.005)
+            return frame.index
+
+        pipeline = FramePipeline(source, infer, on_result, ring_size=4, workers=3, policy=DROP_POLICY_FIFO)
+        self.assertEqual(pipeline.run(max_frames=10), 10)
+        self.assertEqual(len(seen), 10)
+
+    def test_latest_policy_skips_frames_a_slow_worker_cannot_keep_up_with(self):
+        source = FrameSequence(40, delay=0.002)
+        seen = []
+
+        def infer(frame):
+            time.sleep(0.02)
+            return frame.index
+
+        pipeline = FramePipeline(source, infer, lambda frame, result: seen.append(result), ring_size=4, workers=1)
+        pipeline.run()
+        self.assertLess(len(seen), 40)
+        self.assertEqual(seen, sorted(seen))
+        self.assertGreater(pipeline.ring.dropped_stale + pipeline.ring.dropped_overflow, 0)
+        # cada frame capturado se analizo o se libero
+        for frame in source.frames[:pipeline.captured]:
+            self.assertTrue(frame.index in seen or frame.released, frame.index)
+
+    def test_stop_from_another_thread_shuts_down(self):
+        source = FrameSequence(10_000, delay=0.001)
+        pipeline = FramePipeline(source, lambda frame: None, lambda frame, result: None, ring_size=4, workers=2)
+        timer = threading.Timer(0.1, pipeline.stop)
+        timer.start()
+        started_at = time.perf_counter()
+        pipeline.run()
+        self.assertLess(time.perf_counter() - started_at, 2)
+        self.assertLess(pipeline.captured, 10_000)
+        self.assertEqual(pipeline.ring.depth(), 0)
+
+    def test_should_stop_ends_the_run(self):
+        source = FrameSequence(10_000, delay=0.001)
+        seen = []
+        pipeline = FramePipeline(source, lambda frame: frame.index, lambda frame, result: seen.append(result))
+        pipeline.run(should_stop=lambda: len(seen) >= 5)
+        self.assertLess(len(seen), 20)
+
+    def test_worker_exception_does_not_stop_the_pipeline(self):
+        source = FrameSequence(6)
+        seen = []
+
+        def infer(frame):
+            if frame.index == 2:
+                raise RuntimeError("model failure")
+            return frame.index
+
+        pipeline = FramePipeline(source, infer, lambda frame, result: seen.append(result),
+                                 ring_size=6, workers=1, policy=DROP_POLICY_FIFO)
+        with self.assertLogs("src.processing.frame_pipeline", "ERROR"):
+            self.assertEqual(pipeline.run(), 6)
+        self.assertEqual(seen, [0, 1, 3, 4, 5])
+
+    def test_capture_exception_ends_the_run(self):
+        def capture():
+            raise IOError("camera gone")
+
+        pipeline = FramePipeline(capture, lambda frame: None, lambda frame, result: None)
+        with self.assertLogs("src.processing.frame_pipeline", "ERROR"):
+            self.assertEqual(pipeline.run(), 0)
+
+    def test_staged_ocr_batches_frames_and_keeps_their_results_apart(self):
+        source = FrameSequence(12)
+        seen = {}
+        calls = []
+
+        def ocr(groups):
+            calls.append(len(groups))
+            return [[f"read-{candidate}" for candidate in candidates] for candidates in groups]
+
+        pipeline = FramePipeline(source, lambda frame: [frame.index], lambda frame, result: seen.update({frame.index: result}),
+                                 ring_size=12, workers=2, policy=DROP_POLICY_FIFO, ocr_fn=ocr, ocr_batch_size=4)
+        self.assertEqual(pipeline.run(), 12)
+        self.assertEqual(seen, {i: [f"read-{i}"] for i in range(12)})
+        self.assertEqual(sum(calls), 12)
+        self.assertTrue(all(size <= 4 for size in calls))
+
+    def test_skipped_frames_bypass_the_ocr_stage(self):
+        source = FrameSequence(6)
+        seen = {}
+        groups_read = []
+
+        def ocr(groups):
+            groups_read.extend(groups)
+            return [[f"read-{candidate}" for candidate in candidates] for candidates in groups]
+
+        detect = lambda frame: None if frame.index % 2 else [frame.index]  # los impares se saltean
+        pipeline = FramePipeline(source, detect, lambda frame, result: seen.update({frame.index: result}),
+                                 policy=DROP_POLICY_FIFO, ring_size=6, ocr_fn=ocr)
+        self.assertEqual(pipeline.run(), 6)
+        self.assertEqual(seen, {0: ["read-0"], 1: None, 2: ["read-2"], 3: None, 4: ["read-4"], 5: None})
+        self.assertEqual(sorted(groups_read), [[0], [2], [4]])
+
+
+if __name__ == "__main__":
+    unittest.main()
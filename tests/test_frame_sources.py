@@ -0,0 +1,291 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+import unittest
+import cv2
+import numpy as np
+from src.processing.frame_sources import (
+    PACING_FAST, PACING_REALTIME, CameraFrameSource, ImageDirectoryFrameSource, StreamFrameSource,
+    VideoFileFrameSource, create_frame_source,
+)
+
+LORES = (64, 48)
+
+
+class FakeRequest:
+    """Camera request whose lores YUV420 image is one grey level (neutral chroma)."""
+
+    def __init__(self, level):
+        width, height = LORES
+        self.lores = np.full((height * 3 // 2, width), 128, dtype=np.uint8)
+        self.lores[:height] = level
+        self.released = False
+
+    def release(self):
+        self.released = True
+
+
+class FakePicamera2:
+    def __init__(self, camera_num=0):
+        self.levels = iter(range(20, 250, 20))
+
+    def create_preview_configuration(self, main=None, lores=None, buffer_count=None):
+        return {"main": main, "lores": lores, "buffer_count": buffer_count}
+
+    def configure(self, config):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+    def capture_request(self):
+        return FakeRequest(next(self.levels))
+
+
+class FakeMappedArray:
+    def __init__(self, request, stream):
+        self.array = getattr(request, stream)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class TestCameraDualStream(unittest.TestCase):
+    def setUp(self):
+        self.saved_module = sys.modules.get("picamera2")
+        sys.modules["picamera2"] = types.SimpleNamespace(Picamera2=FakePicamera2, MappedArray=FakeMappedArray)
+        self.saved_delay = CameraFrameSource.CAMERA_INIT_DELAY
+        CameraFrameSource.CAMERA_INIT_DELAY = 0
+        self.source = CameraFrameSource(dual_stream=True, lores_resolution=LORES, buffer_count=2).start()
+
+    def tearDown(self):
+        self.source.stop()
+        CameraFrameSource.CAMERA_INIT_DELAY = self.saved_delay
+        if self.saved_module is None:
+            del sys.modules["picamera2"]
+        else:
+            sys.modules["picamera2"] = self.saved_module
+
+    def test_held_frame_is_not_overwritten(self):
+        held = self.source.read()
+        level = int(held.image.mean())
+        for _ in range(4):
+            frame = self.source.read()
+            self.assertIsNot(frame.image, held.image)
+            frame.release()
+        self.assertEqual(int(held.image.mean()), level)
+        self.assertFalse(held.request.released)
+
+    def test_released_buffers_are_reused(self):
+        first = self.source.read()
+        second = self.source.read()
+        buffers = {id(first.image), id(second.image)}
+        first.release()
+        second.release()
+        second.release()  # liberar dos veces no devuelve el buffer dos veces
+        third, fourth = self.source.read(), self.source.read()
+        self.assertEqual({id(third.image), id(fourth.image)}, buffers)
+        self.assertTrue(first.request.released)
+
+    def test_frame_size_is_the_lores_size(self):
+        self.assertEqual(self.source.frame_size(), LORES)
+        self.assertEqual(self.source.read().image.shape[:2], (LORES[1], LORES[0]))
+
+    def test_more_held_frames_than_buffers_get_their_own(self):
+        frames = [self.source.read() for _ in range(3)]
+        self.assertEqual(len({id(frame.image) for frame in frames}), 3)
+        self.assertEqual(len({int(frame.image.mean()) for frame in frames}), 3)
+
+
+def level(frame):
+    """Index of a generated frame, encoded as its grey level (20 + 20 * index)."""
+    return round((frame.image.mean() - 20) / 20)
+
+
+class GeneratedMedia(unittest.TestCase):
+    """A 10 frame, 20 fps video and a folder of 5 images whose grey level encodes their index."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.video = os.path.join(cls.directory, "clip.avi")
+        writer = cv2.VideoWriter(cls.video, cv2.VideoWriter_fourcc(*"MJPG"), 20, (64, 48))
+        for index in range(10):
+            writer.write(np.full((48, 64, 3), 20 + 20 * index, dtype=np.uint8))
+        writer.release()
+
+        cls.images = os.path.join(cls.directory, "images")
+        os.mkdir(cls.images)
+        for index in range(5):
+            cv2.imwrite(os.path.join(cls.images, f"frame_{index:02d}.png"), np.full((48, 64, 3), 20 + 20 * index, dtype=np.uint8))
+        with open(os.path.join(cls.images, "frame_02b.jpg"), "wb") as handle:
+            handle.write(b"not an image")
+        with open(os.path.join(cls.images, "notes.txt"), "w") as handle:
+            handle.write("ignored")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+
+class TestVideoFileFrameSource(GeneratedMedia):
+    def read_all(self, source, limit=100):
+        frames = []
+        while len(frames) < limit:
+            frame = source.read()
+            if frame is None:
+                break
+            frames.append(frame)
+        return frames
+
+    def test_fast_reads_every_frame_then_eof(self):
+        source = VideoFileFrameSource(self.video).start()
+        frames = self.read_all(source)
+        source.stop()
+        self.assertEqual([level(frame) for frame in frames], list(range(10)))
+        self.assertEqual([frame.index for frame in frames], list(range(10)))
+
+    def test_loop_rewinds_at_eof(self):
+        source = VideoFileFrameSource(self.video, loop=True).start()
+        frames = self.read_all(source, limit=25)
+        source.stop()
+        self.assertEqual([level(frame) for frame in frames], list(range(10)) * 2 + list(range(5)))
+        self.assertEqual(frames[-1].index, 24)
+
+    def test_realtime_pacing_follows_the_frame_rate(self):
+        source = VideoFileFrameSource(self.video, pacing=PACING_REALTIME).start()
+        started_at = time.perf_counter()
+        self.read_all(source)
+        elapsed = time.perf_counter() - started_at
+        source.stop()
+        self.assertGreaterEqual(elapsed, 0.4)  # 10 frames a 20 fps: 0.45 s desde el primero
+        self.assertLess(elapsed, 1.5)
+
+    def test_frame_size(self):
+        source = VideoFileFrameSource(self.video)
+        self.assertIsNone(source.frame_size())
+        self.assertEqual(source.start().frame_size(), (64, 48))
+        source.stop()
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            VideoFileFrameSource(os.path.join(self.directory, "missing.mp4")).start()
+
+
+class TestStreamFrameSource(GeneratedMedia):
+    def setUp(self):
+        self.saved = StreamFrameSource.RECONNECT_DELAY, StreamFrameSource.READ_TIMEOUT
+        StreamFrameSource.RECONNECT_DELAY, StreamFrameSource.READ_TIMEOUT = 0.05, 0.5
+
+    def tearDown(self):
+        StreamFrameSource.RECONNECT_DELAY, StreamFrameSource.READ_TIMEOUT = self.saved
+
+    def test_reconnects_when_the_stream_ends(self):
+        # El archivo se termina como un stream que se corta: el grabber vuelve a abrirlo
+        source = StreamFrameSource(self.video).start()
+        try:
+            indexes = []
+            deadline = time.monotonic() + 5
+            while len(indexes) < 15 and time.monotonic() < deadline:
+                frame = source.read()
+                if frame is not None:
+                    indexes.append(frame.index)
+        finally:
+            source.stop()
+        self.assertGreaterEqual(len(indexes), 15)
+        self.assertEqual(indexes, sorted(indexes))
+        self.assertGreater(indexes[-1], 10)
+
+    def test_frame_size_does_not_consume_a_frame(self):
+        source = StreamFrameSource(self.video).start()
+        try:
+            self.assertEqual(source.frame_size(), (64, 48))
+            self.assertIsNotNone(source.read())
+        finally:
+            source.stop()
+
+    def test_slow_reader_only_gets_the_newest_frame(self):
+        source = StreamFrameSource(self.video).start()
+        try:
+            first = source.read()
+            time.sleep(0.2)
+            second = source.read()
+        finally:
+            source.stop()
+        self.assertIsNotNone(second)
+        self.assertGreater(second.index, first.index + 1)
+
+    def test_unreachable_stream_times_out(self):
+        source = StreamFrameSource(os.path.join(self.directory, "missing.avi"))
+        with self.assertLogs("src.processing.frame_sources", "WARNING"):
+            source.start()
+            started_at = time.perf_counter()
+            self.assertIsNone(source.read())
+            source.stop()
+        self.assertGreaterEqual(time.perf_counter() - started_at, 0.4)
+
+    def test_missing_url(self):
+        with self.assertRaises(ValueError):
+            StreamFrameSource("").start()
+
+
+class TestImageDirectoryFrameSource(GeneratedMedia):
+    def test_reads_images_in_name_order_skipping_unreadable_files(self):
+        source = ImageDirectoryFrameSource(self.images).start()
+        self.assertEqual(len(source.files), 6)  # el .txt no cuenta
+        with self.assertLogs("src.processing.frame_sources", "WARNING"):
+            frames = [source.read() for _ in range(5)]
+        self.assertEqual([level(frame) for frame in frames], list(range(5)))
+        self.assertIsNone(source.read())
+
+    def test_frame_size_of_the_first_readable_image(self):
+        self.assertEqual(ImageDirectoryFrameSource(self.images).start().frame_size(), (64, 48))
+
+    def test_loop(self):
+        source = ImageDirectoryFrameSource(self.images, loop=True).start()
+        with self.assertLogs("src.processing.frame_sources", "WARNING"):
+            frames = [source.read() for _ in range(12)]
+        self.assertEqual([level(frame) for frame in frames], list(range(5)) * 2 + [0, 1])
+
+    def test_realtime_pacing_uses_fps(self):
+        source = ImageDirectoryFrameSource(self.images, pacing=PACING_REALTIME, fps=50).start()
+        started_at = time.perf_counter()
+        with self.assertLogs("src.processing.frame_sources", "WARNING"):
+            for _ in range(5):
+                source.read()
+        self.assertGreaterEqual(time.perf_counter() - started_at, 0.08)  # 4 intervalos de 20 ms
+
+    def test_missing_directory(self):
+        with self.assertRaises(FileNotFoundError):
+            ImageDirectoryFrameSource(os.path.join(self.directory, "missing")).start()
+
+
+class TestCreateFrameSource(unittest.TestCase):
+    def test_source_types(self):
+        self.assertIsInstance(create_frame_source("video", path="clip.mp4"), VideoFileFrameSource)
+        self.assertIsInstance(create_frame_source("STREAM", url="rtsp://camera/1"), StreamFrameSource)
+        self.assertIsInstance(create_frame_source("IMAGES", path="frames"), ImageDirectoryFrameSource)
+        self.assertEqual(create_frame_source("CAMERA", camera_num=1).camera_num, 1)
+        with self.assertRaises(ValueError):
+            create_frame_source("SCREEN")
+
+    def test_video_path_overrides_config(self):
+        source = create_frame_source("VIDEO", path="lane_2.mp4")
+        self.assertEqual(source.path, "lane_2.mp4")
+        self.assertIn(source.pacing, (PACING_FAST, PACING_REALTIME))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+import os
+import queue
+import signal
+import threading
+import time
+import unittest
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from unittest import mock
+import numpy as np
+from fast_alpr.base import BoundingBox, DetectionResult, OcrResult
+import src.processing.detection_engine as detection_engine
+from src.config import Config
+from src.processing.frame_sources import Frame, FrameSource
+from src.processing.inference_pool import ProcessPoolEngine
+
+
+class IdleSource(FrameSource):
+    def read(self):
+        return None
+
+
+SLOW_BRIGHTNESS = 1  # frames de este brillo tardan SLOW_SECONDS en el worker
+SLOW_SECONDS = 1.0
+
+
+class FakeAlpr:
+    """Models stand-in: one plate per frame whose text encodes the frame's mean brightness."""
+
+    class Detector:
+        def predict(self, image):
+            if int(image.mean()) == SLOW_BRIGHTNESS:
+                time.sleep(SLOW_SECONDS)
+            return [DetectionResult("License Plate", 0.9, BoundingBox(0, 0, 40, 20))]
+
+    class OcrModel:
+        def run(self, crops, return_confidence=False):
+            texts = [f"AB{int(crop.mean()):04d}" for crop in crops]
+            return texts, np.full((len(crops), 6), 0.97)
+
+    class Ocr:
+        def __init__(self):
+            self.ocr_model = FakeAlpr.OcrModel()
+
+        def predict(self, crop):
+            return OcrResult("", 0.0)
+
+    def __init__(self):
+        self.detector = self.Detector()
+        self.ocr = self.Ocr()
+
+    def predict(self, image):
+        return []
+
+
+def fake_create_alpr(settings):
+    return FakeAlpr()
+
+
+def failing_create_alpr(settings):
+    raise FileNotFoundError("detector.onnx")
+
+
+class ForkedWorkers(unittest.TestCase):
+    """The workers are forked so they inherit the fake models patched into detection_engine."""
+
+    create_alpr = staticmethod(fake_create_alpr)
+
+    @classmethod
+    def setUpClass(cls):
+        cls.saved = detection_engine.create_alpr, Config.INFERENCE_START_METHOD
+        detection_engine.create_alpr = cls.create_alpr
+        Config.INFERENCE_START_METHOD = "fork"
+
+    @classmethod
+    def tearDownClass(cls):
+        detection_engine.create_alpr, Config.INFERENCE_START_METHOD = cls.saved
+
+
+class TestProcessPoolEngine(ForkedWorkers):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = ProcessPoolEngine(source=IdleSource(), processes=2, slots=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.shutdown()
+        super().tearDownClass()
+
+    def test_startup(self):
+        self.assertTrue(all(worker.is_alive() for worker in self.engine._workers))
+        self.assertGreater(self.engine.cold_start_seconds, 0)
+
+    def test_round_trip(self):
+        # Mas pedidos que slots: cada slot vuelve al pool con la respuesta
+        for brightness in (10, 120, 250, 60):
+            image = np.full((48, 64, 3), brightness, dtype=np.uint8)
+            results = self.engine.predict(Frame(image))
+            self.assertEqual([result.ocr.text for result in results], [f"AB{brightness:04d}"])
+
+
+def frame(brightness):
+    return Frame(np.full((48, 64, 3), brightness, dtype=np.uint8))
+
+
+class TestWorkerFailures(ForkedWorkers):
+    """One worker and one slot, so a slot that is not given back blocks the next frame."""
+
+    def setUp(self):
+        self.engine = ProcessPoolEngine(source=IdleSource(), processes=1, slots=1)
+        self.addCleanup(self.engine.shutdown)
+
+    def predict_in_background(self):
+        outcome = {}
+
+        def predict():
+            try:
+                outcome["result"] = self.engine.predict(frame(SLOW_BRIGHTNESS))
+            except Exception as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=predict)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while self.engine._current[0] == -1 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertNotEqual(self.engine._current[0], -1)  # el worker ya tiene el frame
+        return thread, outcome
+
+    def test_killed_worker_fails_the_frame_and_is_restarted(self):
+        dead = self.engine._workers[0]
+        thread, outcome = self.predict_in_background()
+        started_at = time.monotonic()
+        with self.assertLogs("src.processing.inference_pool", "ERROR"):
+            os.kill(dead.pid, signal.SIGKILL)
+            thread.join(timeout=5)
+        self.assertLess(time.monotonic() - started_at, Config.INFERENCE_TASK_TIMEOUT_S)
+        self.assertIsInstance(outcome.get("error"), RuntimeError)
+        self.assertIn("died", str(outcome["error"]))
+
+        # El slot del worker muerto volvio al pool y el reemplazo responde
+        self.assertEqual([result.ocr.text for result in self.engine.predict(frame(120))], ["AB0120"])
+        self.assertIsNot(self.engine._workers[0], dead)
+        self.assertTrue(self.engine._workers[0].is_alive())
+
+    def test_engine_fails_after_too_many_restarts(self):
+        with mock.patch.object(Config, "INFERENCE_MAX_WORKER_RESTARTS", 0):
+            thread, outcome = self.predict_in_background()
+            with self.assertLogs("src.processing.inference_pool", "ERROR"):
+                os.kill(self.engine._workers[0].pid, signal.SIGKILL)
+                thread.join(timeout=5)
+        self.assertIsInstance(outcome.get("error"), RuntimeError)
+        with self.assertRaises(RuntimeError) as raised:
+            self.engine.predict(frame(120))
+        self.assertIn("failed", str(raised.exception))
+
+    def test_timed_out_slot_comes_back_with_the_late_answer(self):
+        with mock.patch.object(Config, "INFERENCE_TASK_TIMEOUT_S", SLOW_SECONDS / 4):
+            with self.assertRaises(FutureTimeoutError):
+                self.engine.predict(frame(SLOW_BRIGHTNESS))
+        self.assertEqual(len(self.engine._orphaned), 1)
+        self.assertEqual([result.ocr.text for result in self.engine.predict(frame(60))], ["AB0060"])
+        self.assertEqual(self.engine._orphaned, {})
+
+
+class TestProcessPoolStartupFailure(ForkedWorkers):
+    create_alpr = staticmethod(failing_create_alpr)
+
+    def test_worker_failing_to_load_models_raises(self):
+        with self.assertRaises(RuntimeError) as raised:
+            ProcessPoolEngine(source=IdleSource(), processes=1, slots=1)
+        self.assertIn("failed to start", str(raised.exception))
+        self.assertIn("detector.onnx", str(raised.exception))
+
+
+class TestWaitUntilReady(unittest.TestCase):
+    def test_worker_exiting_without_reporting_raises(self):
+        class DeadWorker:
+            name = "inference-0"
+            exitcode = -9
+
+            def is_alive(self):
+                return False
+
+        engine = ProcessPoolEngine.__new__(ProcessPoolEngine)
+        engine._workers = [DeadWorker()]
+        engine._results = queue.Queue()
+        with self.assertRaises(RuntimeError) as raised:
+            engine._wait_until_ready(timeout=5)
+        self.assertIn("exited during startup", str(raised.exception))
+
+    def test_ready_timeout(self):
+        class SlowWorker:
+            name = "inference-0"
+            exitcode = None
+
+            def is_alive(self):
+                return True
+
+        engine = ProcessPoolEngine.__new__(ProcessPoolEngine)
+        engine._workers = [SlowWorker()]
+        engine._results = queue.Queue()
+        with self.assertRaises(RuntimeError) as raised:
+            engine._wait_until_ready(timeout=0)
+        self.assertIn("not ready", str(raised.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import unittest
+from unittest import mock
+import onnxruntime as ort
+from src.config import Config
+from src.processing.inference_settings import (
+    DEFAULTS, build_providers, build_session_options, resolve_inference_settings,
+)
+
+
+def clean_environment(**values):
+    """os.environ without any {DETECTOR|OCR}_* override, plus values."""
+    environment = {key: value for key, value in os.environ.items() if not key.startswith(("DETECTOR_", "OCR_"))}
+    environment.update(values)
+    return mock.patch.dict(os.environ, environment, clear=True)
+
+
+class TestResolveInferenceSettings(unittest.TestCase):
+    def test_default_profile_is_the_library_defaults(self):
+        with clean_environment():
+            settings = resolve_inference_settings("DEFAULT")
+        self.assertEqual(settings, {"profile": "DEFAULT", "detector": DEFAULTS["detector"], "ocr": DEFAULTS["ocr"]})
+
+    def test_profile_overlays_the_defaults(self):
+        with clean_environment():
+            settings = resolve_inference_settings("pi4")  # el nombre no distingue mayusculas
+        self.assertEqual(settings["profile"], "PI4")
+        self.assertEqual(settings["detector"]["model"], "yolo-v9-t-256-license-plate-end2end")
+        self.assertEqual(settings["detector"]["intra_op_threads"], 3)
+        self.assertEqual(settings["ocr"]["model"], DEFAULTS["ocr"]["model"])  # el perfil no lo cambia
+        self.assertEqual(settings["ocr"]["arena_extend_strategy"], "kSameAsRequested")
+
+    def test_selected_profile_comes_from_config(self):
+        with clean_environment(), mock.patch.object(Config, "INFERENCE_PROFILE", "X86"):
+            self.assertEqual(resolve_inference_settings()["profile"], "X86")
+
+    def test_environment_overrides_the_profile(self):
+        with clean_environment(DETECTOR_INTRA_OP_THREADS="2", OCR_MODEL_PATH="ocr_int8.onnx",
+                               OCR_CPU_MEM_ARENA="false", DETECTOR_MEM_PATTERN="yes", DETECTOR_EXECUTION_MODE=""):
+            settings = resolve_inference_settings("PI4")
+        self.assertEqual(settings["detector"]["intra_op_threads"], 2)
+        self.assertEqual(settings["detector"]["execution_mode"], "SEQUENTIAL")  # vacio = sin override
+        self.assertIs(settings["detector"]["mem_pattern"], True)
+        self.assertEqual(settings["ocr"]["model_path"], "ocr_int8.onnx")
+        self.assertIs(settings["ocr"]["cpu_mem_arena"], False)
+
+    def test_profiles_are_not_modified(self):
+        with clean_environment(DETECTOR_INTRA_OP_THREADS="1"):
+            resolve_inference_settings("PI5")
+        self.assertEqual(Config.INFERENCE_PROFILES["PI5"]["detector"]["intra_op_threads"], 3)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            resolve_inference_settings("JETSON")
+
+
+class TestSessionOptions(unittest.TestCase):
+    def test_nothing_customised(self):
+        self.assertIsNone(build_session_options({"model": "x"}))
+        self.assertIsNone(build_providers({"model": "x"}))
+
+    def test_options_and_providers(self):
+        options = build_session_options({
+            "intra_op_threads": 3, "inter_op_threads": 1, "graph_optimization": "all",
+            "execution_mode": "SEQUENTIAL", "cpu_mem_arena": False, "mem_pattern": True,
+        })
+        self.assertEqual(options.intra_op_num_threads, 3)
+        self.assertEqual(options.inter_op_num_threads, 1)
+        self.assertEqual(options.graph_optimization_level, ort.GraphOptimizationLevel.ORT_ENABLE_ALL)
+        self.assertEqual(options.execution_mode, ort.ExecutionMode.ORT_SEQUENTIAL)
+        self.assertFalse(options.enable_cpu_mem_arena)
+        self.assertEqual(
+            build_providers({"arena_extend_strategy": "kSameAsRequested"}),
+            [("CPUExecutionProvider", {"arena_extend_strategy": "kSameAsRequested"})],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from collections import deque
+from src.processing.frame_sources import Frame, ImageDirectoryFrameSource, StreamFrameSource
+from src.processing.lanes import Lane, LaneEngine, LaneScheduler, jain_fairness, load_lanes
+
+
+class FakeEngine:
+    """Shared engine stand-in: detection returns one candidate per frame, OCR tags it."""
+    alpr = None
+    cold_start_seconds = 0.0
+
+    def __init__(self, detect_delay=0.0, fail_on=None):
+        self.detect_delay = detect_delay
+        self.fail_on = fail_on
+        self.detected = []
+        self.ocr_calls = []
+        self.warmed_up = []
+
+    def detect(self, frame, tracker=None):
+        if self.detect_delay:
+            time.sleep(self.detect_delay)
+        if frame.image == self.fail_on:
+            raise RuntimeError("model failure")
+        self.detected.append(frame.image)
+        return [frame.image]
+
+    def read_plates_batch(self, candidate_groups):
+        self.ocr_calls.append(len(candidate_groups))
+        return [[f"{candidate}:read" for candidate in group] for group in candidate_groups]
+
+    def read_plates(self, candidates):
+        return self.read_plates_batch([candidates])[0]
+
+    def warm_up(self, frame_size):
+        self.warmed_up.append(frame_size)
+
+
+def lane_names(count):
+    """Unique lane names, so the per-lane metrics of one test do not mix with another's."""
+    suffix = uuid.uuid4().hex[:6]
+    return [f"lane{index}-{suffix}" for index in range(count)]
+
+
+class TestLoadLanes(unittest.TestCase):
+    def write_config(self, lanes):
+        handle, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, "w") as config_file:
+            json.dump({"lanes": lanes}, config_file)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_no_config_means_single_lane_mode(self):
+        self.assertEqual(load_lanes(""), [])
+
+    def test_parses_lanes(self):
+        path = self.write_config([
+            {"name": "entry", "source": {"type": "IMAGES", "path": "/tmp"},
+             "gpio_pins": {"motion_sensor": 17}, "roi": "0,0;1,0;1,1", "poc_id": "poc-1"},
+            {"name": "exit", "source": {"type": "STREAM", "url": "rtsp://camera/2"}},
+        ])
+        entry, exit_lane = load_lanes(path)
+        self.assertEqual((entry.name, entry.gpio_pins, entry.roi, entry.poc_id),
+                         ("entry", {"motion_sensor": 17}, "0,0;1,0;1,1", "poc-1"))
+        self.assertIsInstance(entry.create_source(), ImageDirectoryFrameSource)
+        self.assertEqual(entry.create_source().path, "/tmp")
+        self.assertIsInstance(exit_lane.create_source(), StreamFrameSource)
+        self.assertEqual(exit_lane.create_source().url, "rtsp://camera/2")
+        self.assertIsNone(exit_lane.poc_id)
+
+    def test_duplicated_names(self):
+        path = self.write_config([{"name": "entry"}, {"name": "entry"}])
+        with self.assertRaises(ValueError):
+            load_lanes(path)
+
+    def test_unknown_keys_are_rejected(self):
+        path = self.write_config([{"name": "entry", "camera": 0}])
+        with self.assertRaises(TypeError):
+            load_lanes(path)
+
+
+class TestJainFairness(unittest.TestCase):
+    def test_values(self):
+        self.assertAlmostEqual(jain_fairness([10, 10, 10]), 1.0)
+        self.assertAlmostEqual(jain_fairness([30, 0, 0]), 1 / 3)
+        self.assertAlmostEqual(jain_fairness([10, None, 10]), 1.0)  # carril sin datos
+        self.assertEqual(jain_fairness([]), 1.0)
+        self.assertEqual(jain_fairness([0, 0]), 1.0)
+
+
+class TestLaneScheduler(unittest.TestCase):
+    def test_rotates_the_first_lane_of_each_cycle(self):
+        scheduler = LaneScheduler(FakeEngine())
+        names = lane_names(3)
+        for name in names:
+            scheduler.register(name)
+        scheduler._running = True
+        firsts = []
+        for _ in range(3):
+            with scheduler._condition:
+                for name in names:
+                    scheduler._pending.setdefault(name, deque()).append(object())
+            batch = scheduler._next_batch()
+            self.assertEqual(sorted(name for name, _ in batch), sorted(names))
+            firsts.append(batch[0][0])
+        self.assertEqual(firsts, names)
+
+    def test_busy_lanes_are_served_evenly(self):
+        engine = FakeEngine(detect_delay=0.001)
+        scheduler = LaneScheduler(engine).start()
+        self.addCleanup(scheduler.stop)
+        names = lane_names(3)
+        results = {name: [] for name in names}
+
+        def lane(name):
+            for index in range(20):
+                results[name].append(scheduler.submit(name, Frame(f"{name}/{index}")))
+
+        threads = [threading.Thread(target=lane, args=(name,)) for name in names]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        for name in names:
+            self.assertEqual(results[name], [[f"{name}/{index}:read"] for index in range(20)])
+        stats = scheduler.stats()
+        self.assertEqual([stats["lanes"][name]["served"] for name in names], [20, 20, 20])
+        self.assertGreater(stats["fairness"], 0.8)
+        self.assertLess(stats["cycles"], 60)  # los carriles comparten ciclos (y llamadas de OCR)
+
+    def test_detection_only_requests_skip_ocr(self):
+        engine = FakeEngine()
+        scheduler = LaneScheduler(engine).start()
+        self.addCleanup(scheduler.stop)
+        name, = lane_names(1)
+        self.assertEqual(scheduler.submit(name, Frame("plate"), read_plates=False), ["plate"])
+        self.assertEqual(engine.ocr_calls, [])
+
+    def test_engine_error_reaches_the_lane(self):
+        scheduler = LaneScheduler(FakeEngine(fail_on="bad")).start()
+        self.addCleanup(scheduler.stop)
+        name, = lane_names(1)
+        with self.assertLogs("src.processing.lanes", "ERROR"), self.assertRaises(RuntimeError):
+            scheduler.submit(name, Frame("bad"))
+        self.assertEqual(scheduler.submit(name, Frame("good")), ["good:read"])
+
+    def test_stop_fails_waiting_frames_and_later_submits(self):
+        detecting, release = threading.Event(), threading.Event()
+
+        class BlockingEngine(FakeEngine):
+            def detect(self, frame, tracker=None):
+                detecting.set()
+                release.wait(5)
+                return super().detect(frame, tracker)
+
+        scheduler = LaneScheduler(BlockingEngine()).start()
+        busy, waiting = lane_names(2)
+        outcomes = {}
+
+        def lane(name):
+            try:
+                outcomes[name] = scheduler.submit(name, Frame(name))
+            except RuntimeError as e:
+                outcomes[name] = e
+
+        busy_thread = threading.Thread(target=lane, args=(busy,))
+        busy_thread.start()
+        self.assertTrue(detecting.wait(2))  # el ciclo del primer carril ya tomo su frame
+        waiting_thread = threading.Thread(target=lane, args=(waiting,))
+        waiting_thread.start()
+        while waiting not in scheduler._pending:
+            time.sleep(0.005)
+
+        stopper = threading.Thread(target=scheduler.stop)
+        stopper.start()
+        waiting_thread.join(timeout=2)
+        self.assertFalse(waiting_thread.is_alive())
+        self.assertIsInstance(outcomes[waiting], RuntimeError)
+
+        release.set()
+        stopper.join(timeout=5)
+        busy_thread.join(timeout=2)
+        self.assertEqual(outcomes[busy], [f"{busy}:read"])
+        with self.assertRaises(RuntimeError):
+            scheduler.submit(busy, Frame("late"))
+
+
+class TestLaneEngine(unittest.TestCase):
+    def test_registers_and_warms_up_at_the_lane_source_size(self):
+        class SizedSource(ImageDirectoryFrameSource):
+            def start(self):
+                return self
+
+            def frame_size(self):
+                return (1280, 720)
+
+        engine = FakeEngine()
+        scheduler = LaneScheduler(engine)
+        name, = lane_names(1)
+        LaneEngine(Lane(name), scheduler, source=SizedSource("unused"))
+        self.assertEqual(engine.warmed_up, [(1280, 720)])
+        self.assertEqual(scheduler._lanes, [name])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+from src.config import Config
+from src.database.database_connector import DatabaseConnector
+from src.database.last_event_cache import last_event_cache
+from src.database.models import EventModel
+
+
+class TestLastEvent(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.database_url = Config.DATABASE_URL
+        Config.DATABASE_URL = self.path
+        DatabaseConnector().initialize_database()
+        last_event_cache.clear()
+        self.events = EventModel()
+
+    def tearDown(self):
+        Config.DATABASE_URL = self.database_url
+        DatabaseConnector.close_all()
+        last_event_cache.clear()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_last_event_follows_writes(self):
+        self.assertIsNone(self.events.find_last_event_by_plate("ABCD12"))
+        self.events.register_event("e1", "ACCESS", 1, "ABCD12")
+        self.assertEqual(self.events.find_last_event_by_plate("ABCD12")[3], "ACCESS")
+        self.events.register_event("e2", "EXIT", 1, "ABCD12")
+        self.assertEqual(self.events.find_last_event_by_plate("ABCD12")[3], "EXIT")
+
+    def test_cold_lookup_uses_latest_row(self):
+        conn = DatabaseConnector().get_conn()
+        conn.executemany(
+            "INSERT INTO events (id, poc_id, plate, type, created_at) VALUES (?, 1, 'ABCD12', ?, ?)",
+            [("e1", "ACCESS", "2025-01-01 10:00:00"), ("e3", "ACCESS", "2025-01-03 10:00:00"), ("e2", "EXIT", "2025-01-02 10:00:00")],
+        )
+        conn.commit()
+        conn.close()
+        event = self.events.find_last_event_by_plate("ABCD12")
+        self.assertEqual((event[0], event[3]), ("e3", "ACCESS"))
+        self.assertIs(self.events.find_last_event_by_plate("ABCD12"), event)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import threading
+import unittest
+import requests
+from src.http.lookup_cache import LookupCache, Deadline, DeadlineExceeded
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def not_found():
+    response = requests.Response()
+    response.status_code = 404
+    raise requests.HTTPError(response=response)
+
+
+class TestLookupCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = LookupCache(max_entries=2, clock=self.clock)
+        self.calls = 0
+
+    def fetch(self, value):
+        def call():
+            self.calls += 1
+            return value
+        return call
+
+    def test_ttl_and_negative_ttl(self):
+        self.assertEqual(self.cache.get("a", self.fetch({"type": "ACCESS"}), ttl=10), {"type": "ACCESS"})
+        self.assertEqual(self.cache.get("a", self.fetch(None), ttl=10), {"type": "ACCESS"})
+        self.clock.now = 11
+        self.assertIsNone(self.cache.get("a", self.fetch(None), ttl=10, negative_ttl=60))
+        self.assertIsNone(self.cache.get("b", not_found, ttl=10, negative_ttl=60))
+        self.clock.now = 60
+        self.assertIsNone(self.cache.get("a", self.fetch({"type": "EXIT"}), ttl=10))
+        self.assertEqual(self.calls, 2)
+
+    def test_errors_are_not_cached(self):
+        def fail():
+            raise requests.ConnectionError("down")
+        with self.assertRaises(requests.ConnectionError):
+            self.cache.get("a", fail, ttl=10)
+        self.assertEqual(self.cache.get("a", self.fetch(1), ttl=10), 1)
+
+    def test_lru_bound(self):
+        for key in "abc":
+            self.cache.get(key, self.fetch(key), ttl=10)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.get("a", self.fetch("new"), ttl=10), "new")
+
+    def test_concurrent_callers_share_one_call(self):
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            self.calls += 1
+            return "ok"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get("a", slow, ttl=10))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["ok"] * 8)
+        self.assertEqual(self.calls, 1)
+
+    def test_deadline_falls_back_and_caches_late_answer(self):
+        cache = LookupCache()
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return {"authorized": True}
+
+        deadline = Deadline(0.05)
+        with self.assertRaises(DeadlineExceeded):
+            cache.get("a", slow, ttl=10, deadline=deadline)
+        self.assertEqual(deadline.outcome, "fallback")
+        release.set()
+        self.assertEqual(deadline.missed["remote"].result(timeout=5), {"authorized": True})
+        self.assertEqual(cache.get("a", self.fetch(None), ttl=10, deadline=Deadline(0.05)), {"authorized": True})
+        self.assertEqual(self.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
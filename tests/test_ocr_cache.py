@@ -0,0 +1,57 @@
+import unittest
+import cv2
+import numpy as np
+from fast_alpr.base import OcrResult
+from src.processing.ocr_cache import OcrCache, crop_hash, hamming
+
+RNG = np.random.default_rng(1)
+FIRST_CAR = (1, 1)  # (tracker id, track id)
+SECOND_CAR = (1, 2)
+
+
+def plate_crop(text, noise=0):
+    """Grayscale crop of a plate: dark glyphs on a light background, with optional sensor noise."""
+    crop = np.full((40, 140), 220, dtype=np.uint8)
+    cv2.putText(crop, text, (6, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 20, 2, cv2.LINE_AA)
+    if noise:
+        crop = np.clip(crop.astype(int) + RNG.integers(-noise, noise + 1, crop.shape), 0, 255).astype(np.uint8)
+    return crop
+
+
+class TestOcrCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = OcrCache(max_entries=2, max_distance=4)
+        self.cache.put(FIRST_CAR, crop_hash(plate_crop("TTWC85")), OcrResult("TTWC85", 0.97))
+
+    def test_same_plate_with_sensor_noise_hits(self):
+        self.assertEqual(self.cache.get(FIRST_CAR, crop_hash(plate_crop("TTWC85", noise=2))).text, "TTWC85")
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_plate_one_glyph_apart_misses_on_another_track(self):
+        # 'TTWC8S' queda a pocos bits de 'TTWC85': solo la pista los separa
+        other = crop_hash(plate_crop("TTWC8S"))
+        self.assertLessEqual(hamming(other, crop_hash(plate_crop("TTWC85"))), self.cache.max_distance)
+        self.assertIsNone(self.cache.get(SECOND_CAR, other))
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.hit_rate(), 0.0)
+
+    def test_one_glyph_differences_miss_across_tracks(self):
+        for track_id, text in enumerate(["TTWG85", "TTWC88", "TTWCS5", "TTWB85"], start=2):
+            with self.subTest(text=text):
+                self.assertIsNone(self.cache.get((1, track_id), crop_hash(plate_crop(text))))
+
+    def test_same_track_id_of_another_tracker_misses(self):
+        self.assertIsNone(self.cache.get((2, 1), crop_hash(plate_crop("TTWC85"))))
+
+    def test_bounded_size_evicts_least_recently_used(self):
+        second, third = crop_hash(plate_crop("ABCD12")), crop_hash(plate_crop("WXYZ34"))
+        self.cache.put(SECOND_CAR, second, OcrResult("ABCD12", 0.97))
+        self.cache.get(FIRST_CAR, crop_hash(plate_crop("TTWC85")))
+        self.cache.put((1, 3), third, OcrResult("WXYZ34", 0.97))
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get(SECOND_CAR, second))
+        self.assertIsNotNone(self.cache.get(FIRST_CAR, crop_hash(plate_crop("TTWC85"))))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from src.processing.plate_consensus import PlateConsensus
+from src.processing.plates import normalize_plate
+
+
+class TestPlateConsensus(unittest.TestCase):
+    def test_confirms_after_k_reads_in_window(self):
+        consensus = PlateConsensus(required_reads=3, window_size=5)
+        self.assertIsNone(consensus.add_frame(["TTWC85"]))
+        self.assertIsNone(consensus.add_frame([]))
+        self.assertIsNone(consensus.add_frame(["TTWC86"]))
+        self.assertIsNone(consensus.add_frame(["TTWC85"]))
+        self.assertEqual(consensus.add_frame(["TTWC85"]), "TTWC85")
+
+    def test_reads_outside_window_are_forgotten(self):
+        consensus = PlateConsensus(required_reads=2, window_size=2)
+        consensus.add_frame(["TTWC85"])
+        consensus.add_frame([])
+        consensus.add_frame([])
+        self.assertIsNone(consensus.add_frame(["TTWC85"]))
+        self.assertEqual(consensus.add_frame(["TTWC85"]), "TTWC85")
+
+    def test_duplicate_reads_in_one_frame_count_once(self):
+        consensus = PlateConsensus(required_reads=2, window_size=3)
+        self.assertIsNone(consensus.add_frame(["TTWC85", "TTWC85"]))
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            PlateConsensus(required_reads=4, window_size=3)
+
+    def test_normalize_plate(self):
+        self.assertEqual(normalize_plate(" tt-wc·85 "), "TTWC85")
+        self.assertEqual(normalize_plate(None), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from src.processing.plate_cooldown import PlateCooldownCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPlateCooldownCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = PlateCooldownCache(ttl=30, max_entries=2, clock=self.clock)
+
+    def test_repeated_reads_are_suppressed_within_window(self):
+        self.assertFalse(self.cache.should_suppress("TTWC85"))
+        self.assertTrue(self.cache.should_suppress("TTWC85"))
+        self.assertTrue(self.cache.should_suppress("TTWC85"))
+        self.assertEqual(self.cache.suppressed, 2)
+
+    def test_window_expires(self):
+        self.cache.should_suppress("TTWC85")
+        self.clock.now = 31
+        self.assertFalse(self.cache.should_suppress("TTWC85"))
+        self.assertEqual(len(self.cache), 1)
+
+    def test_bounded_size_evicts_oldest(self):
+        self.cache.should_suppress("AAAA11")
+        self.cache.should_suppress("BBBB22")
+        self.cache.should_suppress("CCCC33")
+        self.assertEqual(len(self.cache), 2)
+        self.assertFalse(self.cache.should_suppress("AAAA11"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import random
+import string
+import unittest
+from src.processing.plate_registry import PlateRegistry, plate_distance
+
+
+def random_plate(rng):
+    return "".join(rng.choices(string.ascii_uppercase, k=4)) + "".join(rng.choices(string.digits, k=2))
+
+
+class TestPlateRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = PlateRegistry(["TTWC85", "ABCD12", "BBCD12"])
+
+    def test_confusable_substitution_is_cheaper(self):
+        self.assertEqual(plate_distance("TTWC85", "TTWC8S"), 0.5)
+        self.assertEqual(plate_distance("TTWC85", "TTWC86"), 1.0)
+        self.assertEqual(plate_distance("TTWC85", "TWC85"), 1.0)
+
+    def test_resolves_noisy_read_to_unique_plate(self):
+        self.assertEqual(self.registry.resolve("TTWCB5"), "TTWC85")
+        self.assertEqual(self.registry.resolve("TTWC85"), "TTWC85")
+        self.assertIsNone(self.registry.resolve("XXXX99"))
+
+    def test_tied_candidates_are_not_resolved(self):
+        self.assertIsNone(self.registry.resolve("CBCD12"))
+        self.assertEqual(self.registry.candidates("CBCD12"), [("ABCD12", 1.0), ("BBCD12", 1.0)])
+
+    def test_matches_brute_force(self):
+        rng = random.Random(3)
+        plates = {random_plate(rng) for _ in range(200)}
+        registry = PlateRegistry(plates)
+        for _ in range(50):
+            read = random_plate(rng)
+            expected = sorted(
+                ((plate, plate_distance(read, plate)) for plate in plates if plate_distance(read, plate) <= 2),
+                key=lambda match: (match[1], match[0]),
+            )
+            self.assertEqual(registry.candidates(read, max_distance=2, limit=len(plates)), expected)
+
+    def test_sync_applies_changed_plates(self):
+        registry = PlateRegistry()
+        registry.sync([("v1", "TTWC85"), ("v2", "ABCD12")])
+        registry.sync([("v1", "TTWC86"), ("v3", "WXYZ34")])
+        self.assertEqual(len(registry), 2)
+        self.assertNotIn("TTWC85", registry)
+        self.assertEqual(registry.resolve("TTWC8G"), "TTWC86")
+        self.assertIsNone(registry.resolve("ABCD12"))
+
+    def test_plate_shared_by_two_vehicles_stays_until_both_drop_it(self):
+        registry = PlateRegistry()
+        registry.sync([("v1", "TTWC85"), ("v2", "ttwc85")])
+        registry.sync([("v1", "ABCD12"), ("v2", "TTWC85")])  # v1 cambia de patente
+        self.assertIn("TTWC85", registry)
+        self.assertEqual(registry.resolve("TTWCB5"), "TTWC85")
+        registry.sync([("v1", "ABCD12")])  # se borra v2
+        self.assertNotIn("TTWC85", registry)
+        self.assertIsNone(registry.resolve("TTWCB5"))
+
+
+if __name__ == "__main__":
+    unittest.main()
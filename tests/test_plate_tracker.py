@@ -0,0 +1,61 @@
+import unittest
+import numpy as np
+from fast_alpr.base import BoundingBox, DetectionResult
+from src.processing.plate_tracker import PlateTracker, iou
+
+PLATE = np.random.default_rng(0).integers(0, 255, (40, 120, 3), dtype=np.uint8)
+
+
+def scene(x, y):
+    """Gray frame with a textured plate-sized patch at (x, y)."""
+    image = np.full((360, 640, 3), 90, dtype=np.uint8)
+    image[y:y + 40, x:x + 120] = PLATE
+    return image
+
+
+class FakeDetector:
+    def __init__(self):
+        self.calls = 0
+        self.position = (0, 0)
+
+    def __call__(self, image):
+        self.calls += 1
+        x, y = self.position
+        return [DetectionResult("License Plate", 0.95, BoundingBox(x, y, x + 120, y + 40))]
+
+
+class TestPlateTracker(unittest.TestCase):
+    def test_detector_runs_every_k_frames_and_box_follows_plate(self):
+        tracker = PlateTracker(detect_every=5)
+        detector = FakeDetector()
+        track_ids = set()
+        for frame in range(20):
+            detector.position = (100 + 3 * frame, 200 - frame)
+            detections = tracker.update(scene(*detector.position), detector)
+            self.assertEqual(len(detections), 1)
+            x, y = detector.position
+            self.assertGreater(iou(detections[0].bounding_box, BoundingBox(x, y, x + 120, y + 40)), 0.8)
+            track_ids.add(detections[0].track_id)
+
+        self.assertEqual(detector.calls, 4)
+        self.assertEqual(track_ids, {1})
+
+    def test_lost_plate_forces_detection(self):
+        tracker = PlateTracker(detect_every=10)
+        detector = FakeDetector()
+        detector.position = (100, 100)
+        tracker.update(scene(100, 100), detector)
+        tracker.update(np.full((360, 640, 3), 90, dtype=np.uint8), detector)
+        self.assertEqual(detector.calls, 2)
+
+    def test_reset_starts_new_tracks(self):
+        tracker = PlateTracker(detect_every=5)
+        detector = FakeDetector()
+        detector.position = (100, 100)
+        first = tracker.update(scene(100, 100), detector)[0].track_id
+        tracker.reset()
+        self.assertNotEqual(tracker.update(scene(100, 100), detector)[0].track_id, first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from src.processing.plates import PlateValidator
+
+FORMATS = {
+    "CL_VEHICLE": "LLLLDD",
+    "CL_MOTORBIKE": "LLLD",
+    "CL_NEW_MOTORBIKE": "LLLLD",
+}
+
+
+class TestPlateValidator(unittest.TestCase):
+    def setUp(self):
+        self.validator = PlateValidator(FORMATS)
+
+    def test_clean_read_matches_its_type(self):
+        match = self.validator.validate("TTWC85")
+        self.assertEqual((match.plate, match.plate_type, match.corrections), ("TTWC85", "CL_VEHICLE", 0))
+        self.assertEqual(self.validator.validate("ABC1").plate_type, "CL_MOTORBIKE")
+
+    def test_read_is_normalized(self):
+        self.assertEqual(self.validator.validate("tt-wc 85").plate, "TTWC85")
+
+    def test_position_aware_correction(self):
+        match = self.validator.validate("TTWCB5")
+        self.assertEqual((match.plate, match.corrections), ("TTWC85", 1))
+        self.assertEqual(self.validator.validate("7TWC8S").plate, "TTWC85")
+
+    def test_too_many_corrections_or_unknown_length_fail(self):
+        self.assertIsNone(self.validator.validate("7TWCBS"))
+        self.assertIsNone(self.validator.validate("TTWC855"))
+
+    def test_format_with_restricted_letters(self):
+        validator = PlateValidator({"NO_VOWELS": {"template": "LLLLDD", "letters": "BCDFGHJKLPRSTVWXYZ"}})
+        self.assertIsNotNone(validator.validate("BBCD12"))
+        self.assertIsNone(validator.validate("ABCD12"))
+
+    def test_invalid_template_is_rejected(self):
+        with self.assertRaises(ValueError):
+            PlateValidator({"BAD": "LLX"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import re
+import sqlite3
+import tempfile
+import unittest
+from src.config import Config
+from src.database.database_connector import DatabaseConnector
+from src.database.migrations import SCHEMA_VERSION, run_migrations, schema_version
+from src.database.last_event_cache import last_event_cache
+from src.database.models import VehicleModel, ParkingModel, EventModel, ConfigModel
+
+ROWS = 5000
+
+# Lecturas completas por diseño (cargan el registro de patentes en memoria)
+FULL_READS = {"SELECT id, plate FROM vehicles"}
+# Tablas de una fila por entidad, recorrerlas es lo mas barato
+SMALL_TABLES = {"config"}
+
+
+class TestQueryPlans(unittest.TestCase):
+    """Runs every model query against a populated database and checks its EXPLAIN QUERY PLAN."""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.database_url = Config.DATABASE_URL
+        Config.DATABASE_URL = self.path
+        DatabaseConnector().initialize_database()
+        last_event_cache.clear()
+
+        conn = DatabaseConnector().get_conn()
+        conn.executemany(
+            "INSERT INTO vehicles (id, user_id, user_type, plate, vehicle_type, updated_at) VALUES (?, ?, 'OWNER', ?, 'CAR', ?)",
+            [(f"v{i}", f"u{i}", f"PL{i:04d}", f"2025-01-01 {i % 24:02d}:00:00") for i in range(ROWS)],
+        )
+        conn.executemany(
+            "INSERT INTO parking (id, user_id, identifier, is_for_visit, available, updated_at) VALUES (?, ?, ?, 0, ?, ?)",
+            [(f"p{i}", f"u{i}", f"P-{i}", i % 2, f"2025-01-01 {i % 24:02d}:00:00") for i in range(ROWS)],
+        )
+        conn.executemany(
+            "INSERT INTO events (id, poc_id, plate, type, created_at, sync) VALUES (?, 1, ?, 'ACCESS', ?, ?)",
+            [(f"e{i}", f"PL{i % 500:04d}", f"2025-01-{i % 28 + 1:02d} 10:00:00", int(i % 10 != 0)) for i in range(ROWS * 4)],
+        )
+        conn.execute("INSERT INTO config (id, entity_id) VALUES ('c1', 'entity')")
+        conn.commit()
+        conn.execute("ANALYZE")
+
+        self.statements = []
+        conn.set_trace_callback(self.statements.append)
+
+    def tearDown(self):
+        DatabaseConnector().get_conn().set_trace_callback(None)
+        DatabaseConnector.close_all()
+        Config.DATABASE_URL = self.database_url
+        last_event_cache.clear()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def run_model_queries(self):
+        vehicles, parking, events, config = VehicleModel(), ParkingModel(), EventModel(), ConfigModel()
+        vehicles.find_vehicle_by_plate("PL0001")
+        vehicles.find_all_plates()
+        vehicles.find_last_sync_vehicle()
+        vehicles.update_vehicle(("PL0002", "CAR", "u2", "OWNER", "2025-01-01 00:00:00", "2025-01-02 00:00:00", "v2"))
+        vehicles.create_vehicle(("v-new", "NEW001", "CAR", "u-new", "OWNER", "2025-01-01 00:00:00", "2025-01-01 00:00:00"))
+        config.find_config("entity")
+        config.update_config((5, 2, 10, 10, "2025-01-01 00:00:00", True), "entity")
+        parking.find_last_sync_parking()
+        parking.find_by_id("p1")
+        parking.find_by_user_id("u1")
+        parking.find_parking_by_identifier("P-1")
+        parking.update_parking_availability("P-1", False, "PL0001", "2025-01-02 00:00:00")
+        parking.update_parking_sync("P-1")
+        parking.update_parking(("u1", "P-1", None, False, True, None, "2025-01-02 00:00:00", "p1"))
+        events.find_last_event_by_plate("PL0001")
+        events.find_pending_events()
+        events.mark_event_as_synced("e1")
+        events.mark_batch_as_sync(["e2", "e3"])
+
+    def test_schema_is_current(self):
+        self.assertEqual(schema_version(DatabaseConnector().get_conn()), SCHEMA_VERSION)
+
+    def test_migrations_upgrade_existing_database(self):
+        conn = DatabaseConnector().get_conn()
+        conn.execute("PRAGMA user_version = 0")
+        conn.execute("DROP INDEX idx_events_pending")
+        self.assertEqual(run_migrations(conn), SCHEMA_VERSION)
+        self.assertIsNotNone(conn.execute("SELECT name FROM sqlite_master WHERE name = 'idx_events_pending'").fetchone())
+
+    def test_no_model_query_scans_a_table(self):
+        self.run_model_queries()
+        queries = [
+            sql for sql in self.statements
+            if re.match(r"\s*(SELECT|UPDATE|DELETE)", sql, re.IGNORECASE) and sql.strip() not in FULL_READS
+        ]
+        self.assertGreater(len(queries), 10)
+
+        plan_conn = sqlite3.connect(self.path)
+        try:
+            for sql in queries:
+                plan = [row[3] for row in plan_conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+                for step in plan:
+                    table = re.match(r"SCAN (\w+)", step)
+                    scan = table is not None and table.group(1) not in SMALL_TABLES and "USING" not in step
+                    with self.subTest(sql=" ".join(sql.split())):
+                        self.assertFalse(scan, f"full scan: {plan}")
+                        self.assertNotIn("TEMP B-TREE", step, f"sort without index: {plan}")
+        finally:
+            plan_conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()